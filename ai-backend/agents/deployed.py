@@ -0,0 +1,77 @@
+"""
+Deployed Agents - 배포된 에이전트 실행기 캐시
+deployed_agents 설정으로 빌드한 LangGraph executor 를 설정 버전(실행에 쓰이는 필드의 해시)별로 재사용
+설정이 바뀌면 다음 요청에서 새 그래프로 교체되어 이전 프롬프트가 사용되지 않음
+"""
+from collections import OrderedDict
+import threading
+
+from config import get_settings
+from utils.hashing import content_hash
+from utils.metrics import hit_counter
+from utils.supabase import get_deployed_agent, invalidate_deployed_agent
+from .langgraph_executor import LangGraphAgentExecutor
+
+settings = get_settings()
+
+# Compiled executors kept (least recently used evicted)
+MAX_EXECUTORS = 256
+
+_executors: OrderedDict[str, tuple[str, LangGraphAgentExecutor]] = OrderedDict()
+_lock = threading.Lock()
+_executor_counter = hit_counter("deployed_agent_executor")
+
+
+def config_version(config: dict) -> str:
+    """Hash of the configuration fields the executor is built from"""
+    return content_hash(
+        config.get("model"),
+        config.get("temperature"),
+        config.get("system_prompt"),
+        sorted(config.get("capabilities") or []),
+    )
+
+
+def build_executor(config: dict) -> LangGraphAgentExecutor:
+    return LangGraphAgentExecutor(
+        model=config.get("model") or settings.default_model,
+        temperature=float(config.get("temperature") if config.get("temperature") is not None else settings.default_temperature),
+        system_prompt=config.get("system_prompt") or "",
+        tool_names=config.get("capabilities") or [],
+    )
+
+
+async def get_deployed_executor(agent_id: str) -> tuple[dict, str, LangGraphAgentExecutor] | None:
+    """
+    Executor for a deployed agent, rebuilt only when its configuration changes.
+
+    Returns:
+        (config, config_version, executor), or None if the agent does not exist
+    """
+    config = await get_deployed_agent(agent_id)
+    if config is None:
+        return None
+
+    version = config_version(config)
+    with _lock:
+        entry = _executors.get(agent_id)
+        if entry and entry[0] == version:
+            _executors.move_to_end(agent_id)
+            _executor_counter.hit()
+            return config, version, entry[1]
+
+    _executor_counter.miss()
+    executor = build_executor(config)
+    with _lock:
+        _executors[agent_id] = (version, executor)
+        _executors.move_to_end(agent_id)
+        while len(_executors) > MAX_EXECUTORS:
+            _executors.popitem(last=False)
+    return config, version, executor
+
+
+def invalidate_deployed_executor(agent_id: str) -> None:
+    """Forget the cached configuration and executor of a deployed agent"""
+    invalidate_deployed_agent(agent_id)
+    with _lock:
+        _executors.pop(agent_id, None)
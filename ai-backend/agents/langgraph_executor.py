@@ -487,10 +487,12 @@ class DocsAgentExecutor(LangGraphAgentExecutor):
             "ai_docs_create",
             "ai_docs_search",
             "ai_docs_get",
+            "ai_docs_get_many",
             "ai_docs_analyze",
             "ai_docs_update",
             "ai_docs_list",
             "ai_docs_delete",
+            "ai_docs_semantic_search",
         ]
 
         system_prompt = """당신은 문서 관리 전문 AI 어시스턴트입니다.
@@ -498,6 +500,7 @@ class DocsAgentExecutor(LangGraphAgentExecutor):
 주요 기능:
 - 문서 생성: 분석, 요약, 보고서, 회의록 등 다양한 유형의 문서 작성
 - 문서 검색: 키워드 기반 문서 검색
+- 시맨틱 검색: 질문과 관련된 문서 구절(청크)만 검색 - 전체 문서를 읽기 전에 먼저 사용
 - 문서 분석: AI 기반 문서 내용 분석 및 요약
 - 문서 관리: 문서 수정, 삭제, 목록 조회
 
@@ -525,6 +528,8 @@ class SheetAgentExecutor(LangGraphAgentExecutor):
             "ai_sheet_query",
             "ai_sheet_add_column",
             "ai_sheet_list",
+            "ai_sheet_import",
+            "calculator_batch",
         ]
 
         system_prompt = """당신은 스프레드시트 및 데이터 분석 전문 AI 어시스턴트입니다.
@@ -532,8 +537,10 @@ class SheetAgentExecutor(LangGraphAgentExecutor):
 주요 기능:
 - 시트 생성: 새로운 스프레드시트 생성 및 컬럼 정의
 - 데이터 관리: 행 추가, 셀 업데이트, 컬럼 추가
+- 파일 가져오기: CSV/XLSX 파일을 시트로 대량 가져오기
 - 데이터 분석: 통계 분석, 트렌드 분석, 이상치 탐지
 - 자연어 쿼리: 자연어로 데이터 질문에 답변
+- 일괄 계산: calculator_batch 로 컬럼 전체에 수식을 한 번에 적용 (행마다 반복 호출하지 마세요)
 
 데이터 분석 시 구체적인 수치와 인사이트를 제공하세요.
 복잡한 분석 결과는 이해하기 쉽게 설명해주세요."""
@@ -559,6 +566,7 @@ class EmailAgentExecutor(LangGraphAgentExecutor):
             "email_search",
             "email_mark_read",
             "email_summarize_inbox",
+            "email_triage_batch",
         ]
 
         system_prompt = """당신은 이메일 관리 및 분석 전문 AI 어시스턴트입니다.
@@ -569,6 +577,9 @@ class EmailAgentExecutor(LangGraphAgentExecutor):
 - 이메일 번역: 다국어 이메일 번역
 - 답장 작성: 적절한 톤의 답장 초안 작성
 - 받은 편지함 요약: 전체 받은 편지함 요약
+- 일괄 분류: 미분류 이메일 전체의 중요도/카테고리/답장 필요 여부 한 번에 분류
+
+여러 이메일을 분류할 때는 email_analyze 를 반복 호출하지 말고 email_triage_batch 를 사용하세요.
 
 이메일 분석 시 중요도와 필요한 조치를 명확히 제시하세요.
 답장 작성 시 상황에 맞는 적절한 톤을 사용하세요."""
@@ -595,8 +606,8 @@ class MultiAgentExecutor(LangGraphAgentExecutor):
 1. 문서 관리 (ai_docs_*): 문서 생성, 검색, 분석, 수정
 2. 스프레드시트 (ai_sheet_*): 데이터 분석, 쿼리, 통계
 3. 이메일 (email_*): 이메일 분석, 번역, 답장 작성
-4. 웹 검색 (web_search_tool): 웹 정보 검색
-5. 계산기 (calculator_tool): 수학 계산
+4. 웹 검색 (web_search_tool, web_search_many): 웹 정보 검색 (여러 검색어는 web_search_many 로 한 번에)
+5. 계산기 (calculator_tool, calculator_batch): 수학 계산, 여러 값/시트 컬럼 일괄 계산
 
 복잡한 작업은 여러 도구를 조합하여 처리하세요.
 각 단계의 진행 상황을 명확히 설명해주세요.
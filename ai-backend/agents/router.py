@@ -3,10 +3,11 @@ Agent API Router
 Provides REST endpoints for agent execution with support for
 both legacy and LangGraph-based executors
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Literal, Optional
+import hmac
 import json
 
 from .executor import AgentExecutor
@@ -18,8 +19,12 @@ from .langgraph_executor import (
     MultiAgentExecutor,
     create_agent_executor,
 )
+from .deployed import get_deployed_executor, invalidate_deployed_executor
+from config import get_settings
+from utils.chat_history import get_chat_history, get_chat_history_page, history_writer, save_chat_message
 
 router = APIRouter()
+settings = get_settings()
 
 
 # ============================================
@@ -58,6 +63,20 @@ class SpecializedAgentRequest(BaseModel):
     thread_id: str | None = None  # For memory persistence
 
 
+class DeployedAgentRunRequest(BaseModel):
+    message: str
+    session_id: str
+    context: dict = Field(default_factory=dict)
+
+
+class DeployedAgentWebhook(BaseModel):
+    """Supabase database webhook payload for deployed_agents"""
+    type: Literal["INSERT", "UPDATE", "DELETE"]
+    table: str
+    record: dict | None = None
+    old_record: dict | None = None
+
+
 class StreamEvent(BaseModel):
     type: Literal["token", "tool_start", "tool_end", "error", "done"]
     content: str | None = None
@@ -498,6 +517,68 @@ async def run_custom_agent(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ============================================
+# Deployed Agent Endpoints
+# ============================================
+@router.post("/deployed/{agent_id}/run", response_model=AgentRunResponse)
+async def run_deployed_agent(agent_id: str, request: DeployedAgentRunRequest):
+    """Run a deployed agent within a chat session (history is loaded and saved)"""
+    try:
+        deployed = await get_deployed_executor(agent_id)
+        if deployed is None:
+            raise HTTPException(status_code=404, detail=f"Deployed agent not found: {agent_id}")
+        config, version, executor = deployed
+
+        history = await get_chat_history(agent_id, request.session_id)
+        result = await executor.run(
+            message=request.message,
+            chat_history=[{"role": m["role"], "content": m["content"]} for m in history],
+            context=request.context,
+        )
+
+        await save_chat_message(agent_id, request.session_id, {"role": "user", "content": request.message})
+        await save_chat_message(agent_id, request.session_id, {"role": "assistant", "content": result["output"]})
+
+        return AgentRunResponse(
+            output=result["output"],
+            intermediate_steps=result.get("intermediate_steps", []),
+            tool_calls_count=result.get("tool_calls_count", 0),
+            metadata={**result.get("metadata", {}), "agent_name": config.get("name"), "config_version": version},
+            error=result.get("error"),
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/deployed/{agent_id}/invalidate")
+async def invalidate_deployed_agent_cache(agent_id: str):
+    """Drop the cached configuration and executor after an agent is edited"""
+    invalidate_deployed_executor(agent_id)
+    return {"success": True, "agent_id": agent_id}
+
+
+@router.post("/deployed/webhook")
+async def deployed_agents_webhook(
+    payload: DeployedAgentWebhook,
+    x_webhook_secret: Optional[str] = Header(None),
+):
+    """Supabase database webhook on deployed_agents: invalidate the changed agent"""
+    if settings.deployed_agents_webhook_secret and not hmac.compare_digest(
+        x_webhook_secret or "", settings.deployed_agents_webhook_secret
+    ):
+        raise HTTPException(status_code=401, detail="Invalid webhook secret")
+    if payload.table != "deployed_agents":
+        return {"success": True, "invalidated": None}
+
+    record = payload.record or payload.old_record or {}
+    if record.get("id"):
+        invalidate_deployed_executor(record["id"])
+    return {"success": True, "invalidated": record.get("id")}
+
+
 # ============================================
 # Utility Endpoints
 # ============================================
@@ -541,21 +622,21 @@ async def list_agent_types():
                 "name": "Documents Agent",
                 "description": "문서 생성, 검색, 분석 전문 에이전트",
                 "default_model": "gpt-4o",
-                "tools": ["ai_docs_create", "ai_docs_search", "ai_docs_get", "ai_docs_analyze", "ai_docs_update", "ai_docs_list", "ai_docs_delete"],
+                "tools": ["ai_docs_create", "ai_docs_search", "ai_docs_get", "ai_docs_get_many", "ai_docs_analyze", "ai_docs_update", "ai_docs_list", "ai_docs_delete", "ai_docs_semantic_search"],
             },
             {
                 "type": "sheet",
                 "name": "Spreadsheet Agent",
                 "description": "스프레드시트 데이터 관리 및 분석 전문 에이전트",
                 "default_model": "gpt-4o",
-                "tools": ["ai_sheet_create", "ai_sheet_get", "ai_sheet_add_rows", "ai_sheet_update_cell", "ai_sheet_analyze", "ai_sheet_query", "ai_sheet_add_column", "ai_sheet_list"],
+                "tools": ["ai_sheet_create", "ai_sheet_get", "ai_sheet_add_rows", "ai_sheet_update_cell", "ai_sheet_analyze", "ai_sheet_query", "ai_sheet_add_column", "ai_sheet_list", "ai_sheet_import", "calculator_batch"],
             },
             {
                 "type": "email",
                 "name": "Email Agent",
                 "description": "이메일 관리 및 AI 분석 전문 에이전트",
                 "default_model": "grok-3-fast",
-                "tools": ["email_get", "email_list", "email_analyze", "email_translate", "email_draft_reply", "email_search", "email_mark_read", "email_summarize_inbox"],
+                "tools": ["email_get", "email_list", "email_analyze", "email_translate", "email_draft_reply", "email_search", "email_mark_read", "email_summarize_inbox", "email_triage_batch"],
             },
             {
                 "type": "multi",
@@ -568,6 +649,26 @@ async def list_agent_types():
     }
 
 
+@router.get("/chat_history/{agent_id}/{session_id}")
+async def chat_history(
+    agent_id: str,
+    session_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+):
+    """Session chat history, newest page first; pass next_cursor for older messages"""
+    try:
+        return await get_chat_history_page(agent_id, session_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/chat_history/stats")
+async def chat_history_stats():
+    """Write-behind chat history buffer: queue depth and flush latency"""
+    return history_writer.stats()
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -14,6 +14,19 @@ class Settings(BaseSettings):
     supabase_anon_key: str = ""
     supabase_service_role_key: str = ""
 
+    # Database connection pool (PostgREST over HTTP/2 keep-alive)
+    db_pool_size: int = 20
+    db_timeout: float = 30.0
+    db_max_retries: int = 2
+
+    # Local file holding chat history rows not yet written to the database
+    chat_history_spill_path: str = "data/chat_history_spill.jsonl"
+    # Rows the database rejected (constraint/data errors), kept for inspection and replay
+    chat_history_dead_letter_path: str = "data/chat_history_dead_letter.jsonl"
+
+    # Shared secret Supabase sends (X-Webhook-Secret) with deployed_agents change webhooks
+    deployed_agents_webhook_secret: str = ""
+
     # Server
     host: str = "0.0.0.0"
     port: int = 8000
@@ -6,6 +6,10 @@ from config import get_settings
 from agents.router import router as agents_router
 from tools.router import router as tools_router
 from skills.youtube_router import router as youtube_router
+from tools.doc_index import indexer
+from tools.doc_summarizer import summarizer
+from utils.supabase import close_clients
+from utils.chat_history import history_writer
 
 settings = get_settings()
 
@@ -14,9 +18,16 @@ settings = get_settings()
 async def lifespan(app: FastAPI):
     # Startup
     print("Starting AI Backend...")
+    summarizer.start()
+    indexer.start()
+    history_writer.start()
     yield
     # Shutdown
     print("Shutting down AI Backend...")
+    await summarizer.stop()
+    await indexer.stop()
+    await history_writer.stop()
+    await close_clients()
 
 
 app = FastAPI(
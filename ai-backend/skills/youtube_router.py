@@ -1,18 +1,50 @@
 """
 YouTube Transcript API Router
 FastAPI 라우터로 YouTube 자막 추출 기능 제공
+모든 외부 호출은 비동기(httpx, asyncio 서브프로세스)로 처리되어 느린 영상이 다른 요청을 막지 않음
 """
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
-import os
-import subprocess
+import asyncio
+import glob
 import json
+import os
+import re
+import shutil
+import sys
 import tempfile
+import threading
+import time
+
+import httpx
 
 router = APIRouter()
 
+# 단계별 타임아웃 (초)
+SUPADATA_TIMEOUT = 30
+BRIGHTDATA_TIMEOUT = 30
+SCRAPERAPI_TIMEOUT = 60
+YTDLP_INFO_TIMEOUT = 60
+YTDLP_SUBTITLE_TIMEOUT = 120
+SUMMARY_TIMEOUT = 120
+# 동시에 실행할 수 있는 yt-dlp 프로세스 수 (전체 요청 합계)
+MAX_YTDLP_PROCESSES = 4
+# 앞 제공자가 응답하지 않을 때 다음 제공자를 추가로 시작하기까지의 대기 시간 (초)
+PROVIDER_HEDGE_DELAY = 3.0
+# 기록이 없는 제공자의 예상 응답 시간 (초) - 기본 시도 순서
+PROVIDER_PRIOR_SECONDS = {
+    'supadata': 2.0,
+    'brightdata': 5.0,
+    'scraperapi': 10.0,
+    'ytdlp': 15.0,
+}
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+_ytdlp_slots = asyncio.Semaphore(MAX_YTDLP_PROCESSES)
+
 
 class YouTubeRequest(BaseModel):
     url: str
@@ -62,14 +94,168 @@ class YouTubeResponse(BaseModel):
     error: Optional[str] = None
 
 
-def get_transcript_with_supadata(video_id: str, languages: List[str] = ['ko', 'en']) -> dict:
+# ============================================
+# 공통 헬퍼
+# ============================================
+async def run_ytdlp(args: List[str], timeout: float, cwd: Optional[str] = None) -> tuple[int, str]:
+    """yt-dlp 를 비동기 서브프로세스로 실행 (동시 실행 수 제한, 타임아웃/취소 시 프로세스 종료)
+
+    Returns:
+        (returncode, stdout)
+    """
+    async with _ytdlp_slots:
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, '-m', 'yt_dlp', *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+        )
+        try:
+            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except BaseException:
+            # 타임아웃 또는 요청 취소 시 프로세스가 남지 않도록 종료
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        return proc.returncode, stdout.decode('utf-8', errors='replace')
+
+
+def _format_timestamp(start: float) -> str:
+    mins = int(start // 60)
+    secs = int(start % 60)
+    return f"{mins:02d}:{secs:02d}"
+
+
+def _default_video_info(video_id: str) -> dict:
+    return {
+        'id': video_id,
+        'title': '',
+        'channel': '',
+        'thumbnail': f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg',
+        'date': '',
+        'views': '',
+    }
+
+
+def _video_info_from_ytdlp(video_id: str, stdout: str) -> Optional[dict]:
+    """yt-dlp -j 출력에서 영상 정보 추출"""
+    for line in reversed(stdout.strip().split('\n')):
+        if line.strip().startswith('{'):
+            try:
+                info = json.loads(line)
+            except ValueError:
+                return None
+            return {
+                'id': video_id,
+                'title': info.get('title', ''),
+                'channel': info.get('channel', info.get('uploader', '')),
+                'thumbnail': info.get('thumbnail', f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg'),
+                'date': info.get('upload_date', '')[:10] if info.get('upload_date') else '',
+                'views': f"{info.get('view_count', 0):,}회" if info.get('view_count') else '',
+            }
+    return None
+
+
+async def fetch_video_info(video_id: str, proxy: Optional[str] = None, timeout: float = YTDLP_INFO_TIMEOUT) -> Optional[dict]:
+    """yt-dlp 로 영상 정보만 가져오기"""
+    args = ['--skip-download', '-j']
+    if proxy:
+        args.extend(['--proxy', proxy])
+    args.append(f'https://www.youtube.com/watch?v={video_id}')
+
+    returncode, stdout = await run_ytdlp(args, timeout)
+    if returncode == 0 and stdout:
+        return _video_info_from_ytdlp(video_id, stdout)
+    return None
+
+
+def _parse_player_response(page: str) -> Optional[dict]:
+    match = re.search(r'ytInitialPlayerResponse\s*=\s*(\{.+?\});', page)
+    return json.loads(match.group(1)) if match else None
+
+
+def _select_caption(captions: List[dict], languages: List[str]) -> dict:
+    """언어 우선순위대로 자막 트랙 선택 (없으면 첫 번째 트랙)"""
+    for lang in languages:
+        for cap in captions:
+            if cap.get('languageCode') == lang:
+                return cap
+    return captions[0]
+
+
+def _parse_caption_xml(xml: str) -> List[dict]:
+    transcript = []
+    for start, text in re.findall(r'<text start="([^"]+)"[^>]*>([^<]*)</text>', xml):
+        text = text.replace('&amp;', '&').replace('&#39;', "'").replace('&quot;', '"').replace('&lt;', '<').replace('&gt;', '>')
+        if text.strip():
+            start_sec = float(start)
+            transcript.append({
+                'start': start_sec,
+                'duration': 0,
+                'text': text.strip(),
+                'timestamp': _format_timestamp(start_sec)
+            })
+    return transcript
+
+
+def _transcript_result(video_info: dict, transcript: List[dict]) -> dict:
+    return {
+        'success': True,
+        'videoInfo': video_info,
+        'transcript': transcript,
+        'fullText': ' '.join([t['text'] for t in transcript])
+    }
+
+
+async def _transcript_from_watch_page(client: httpx.AsyncClient, video_id: str, languages: List[str], wrap_url=None) -> Optional[dict]:
+    """watch 페이지의 captionTracks 에서 자막 추출 (프록시 서비스 공용)
+
+    wrap_url: 요청 URL 을 프록시 API URL 로 감싸는 함수 (ScraperAPI 등)
+    """
+    wrap_url = wrap_url or (lambda url: url)
+    headers = {'User-Agent': USER_AGENT}
+
+    resp = await client.get(wrap_url(f'https://www.youtube.com/watch?v={video_id}'), headers=headers)
+    if resp.status_code != 200 or 'captionTracks' not in resp.text:
+        return None
+
+    player_response = _parse_player_response(resp.text)
+    if not player_response:
+        return None
+    captions = player_response.get('captions', {}).get('playerCaptionsTracklistRenderer', {}).get('captionTracks', [])
+    if not captions:
+        return None
+
+    # 자막 다운로드
+    selected = _select_caption(captions, languages)
+    cap_resp = await client.get(wrap_url(selected['baseUrl']), headers=headers)
+    if cap_resp.status_code != 200:
+        return None
+
+    transcript = _parse_caption_xml(cap_resp.text)
+    if not transcript:
+        return None
+
+    details = player_response.get('videoDetails', {})
+    video_info = _default_video_info(video_id)
+    video_info.update({
+        'title': details.get('title', ''),
+        'channel': details.get('author', ''),
+        'views': f"{int(details.get('viewCount', 0)):,}회" if details.get('viewCount') else '',
+    })
+    return _transcript_result(video_info, transcript)
+
+
+# ============================================
+# 자막 제공자
+# ============================================
+async def get_transcript_with_supadata(video_id: str, languages: List[str] = ['ko', 'en']) -> dict:
     """Supadata API를 사용하여 자막 추출 (유료 서비스, 안정적)
 
     환경변수 SUPADATA_API_KEY 필요
     가입: https://supadata.ai
     """
-    import requests
-
     api_key = os.environ.get('SUPADATA_API_KEY')
     if not api_key:
         return {'success': False, 'error': 'SUPADATA_API_KEY 환경변수가 설정되지 않았습니다. https://supadata.ai 에서 무료 가입하세요.'}
@@ -78,7 +264,8 @@ def get_transcript_with_supadata(video_id: str, languages: List[str] = ['ko', 'e
         lang = languages[0] if languages else 'en'
         url = f"https://api.supadata.ai/v1/youtube/transcript?url=https://www.youtube.com/watch?v={video_id}&lang={lang}"
 
-        resp = requests.get(url, headers={'x-api-key': api_key}, timeout=30)
+        async with httpx.AsyncClient(timeout=SUPADATA_TIMEOUT) as client:
+            resp = await client.get(url, headers={'x-api-key': api_key})
 
         if resp.status_code == 401:
             return {'success': False, 'error': 'Supadata API 키가 유효하지 않습니다'}
@@ -90,225 +277,115 @@ def get_transcript_with_supadata(video_id: str, languages: List[str] = ['ko', 'e
 
         # 응답 파싱
         transcript = []
-        full_text = []
-
-        if 'content' in data:
-            for item in data['content']:
-                start = item.get('offset', 0) / 1000  # ms to seconds
-                text = item.get('text', '').strip()
-
-                if text:
-                    mins = int(start // 60)
-                    secs = int(start % 60)
-                    transcript.append({
-                        'start': start,
-                        'duration': item.get('duration', 0) / 1000,
-                        'text': text,
-                        'timestamp': f"{mins:02d}:{secs:02d}"
-                    })
-                    full_text.append(text)
+        for item in data.get('content', []):
+            start = item.get('offset', 0) / 1000  # ms to seconds
+            text = item.get('text', '').strip()
+            if text:
+                transcript.append({
+                    'start': start,
+                    'duration': item.get('duration', 0) / 1000,
+                    'text': text,
+                    'timestamp': _format_timestamp(start)
+                })
 
         if not transcript:
             return {'success': False, 'error': '자막을 찾을 수 없습니다'}
 
         # 비디오 정보 - Supadata에서 제공하거나 yt-dlp로 가져오기
-        title = data.get('title', '')
-        channel = ''
-        views = ''
-        upload_date = ''
+        video_info = _default_video_info(video_id)
+        video_info['title'] = data.get('title', '')
 
         # 제목이 없으면 yt-dlp로 영상 정보만 가져오기
-        if not title:
+        if not video_info['title']:
             try:
-                import subprocess
-                import sys
-                cmd = [sys.executable, '-m', 'yt_dlp', '--skip-download', '-j', f'https://www.youtube.com/watch?v={video_id}']
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-                if result.returncode == 0 and result.stdout:
-                    import json as json_module
-                    for line in reversed(result.stdout.strip().split('\n')):
-                        if line.strip().startswith('{'):
-                            try:
-                                info = json_module.loads(line)
-                                title = info.get('title', '')
-                                channel = info.get('channel', info.get('uploader', ''))
-                                views = f"{info.get('view_count', 0):,}회" if info.get('view_count') else ''
-                                upload_date = info.get('upload_date', '')[:10] if info.get('upload_date') else ''
-                                break
-                            except:
-                                pass
+                video_info = await fetch_video_info(video_id, timeout=SUPADATA_TIMEOUT) or video_info
             except Exception as e:
                 print(f"yt-dlp video info error: {e}")
 
-        video_info = {
-            'id': video_id,
-            'title': title,
-            'channel': channel,
-            'thumbnail': f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg',
-            'date': upload_date,
-            'views': views
-        }
-
-        return {
-            'success': True,
-            'videoInfo': video_info,
-            'transcript': transcript,
-            'fullText': ' '.join(full_text)
-        }
+        return _transcript_result(video_info, transcript)
 
     except Exception as e:
         return {'success': False, 'error': f'Supadata API 오류: {str(e)}'}
 
 
-def get_transcript_with_proxy(video_id: str, languages: List[str] = ['ko', 'en']) -> dict:
-    """프록시 서비스를 통해 자막 추출 (Bright Data, ScraperAPI 등)
+async def get_transcript_with_brightdata(video_id: str, languages: List[str] = ['ko', 'en']) -> dict:
+    """Bright Data 프록시를 통해 자막 추출 (환경변수 BRIGHTDATA_PROXY)"""
+    brightdata_proxy = os.environ.get('BRIGHTDATA_PROXY')
+    if not brightdata_proxy:
+        return {'success': False, 'error': 'BRIGHTDATA_PROXY 환경변수가 설정되지 않았습니다'}
 
-    환경변수:
-    - BRIGHTDATA_PROXY: Bright Data 프록시 URL
-    - SCRAPERAPI_KEY: ScraperAPI 키
-    """
-    import requests
-    import re
+    try:
+        async with httpx.AsyncClient(proxy=brightdata_proxy, timeout=BRIGHTDATA_TIMEOUT) as client:
+            result = await _transcript_from_watch_page(client, video_id, languages)
+        return result or {'success': False, 'error': 'Bright Data 프록시로 자막을 가져오지 못했습니다'}
+    except Exception as e:
+        print(f"Bright Data proxy error: {e}")
+        return {'success': False, 'error': f'Bright Data 프록시 오류: {str(e)}'}
 
-    # Bright Data 프록시
-    brightdata_proxy = os.environ.get('BRIGHTDATA_PROXY')
-    if brightdata_proxy:
-        try:
-            url = f'https://www.youtube.com/watch?v={video_id}'
-            proxies = {'http': brightdata_proxy, 'https': brightdata_proxy}
-
-            resp = requests.get(url, proxies=proxies, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }, timeout=30)
-
-            if resp.status_code == 200 and 'captionTracks' in resp.text:
-                # 자막 URL 추출
-                match = re.search(r'ytInitialPlayerResponse\s*=\s*(\{.+?\});', resp.text)
-                if match:
-                    import json
-                    player_response = json.loads(match.group(1))
-                    captions = player_response.get('captions', {}).get('playerCaptionsTracklistRenderer', {}).get('captionTracks', [])
-
-                    if captions:
-                        # 언어 선택
-                        selected = None
-                        for lang in languages:
-                            for cap in captions:
-                                if cap.get('languageCode') == lang:
-                                    selected = cap
-                                    break
-                            if selected:
-                                break
-                        if not selected:
-                            selected = captions[0]
-
-                        # 자막 다운로드
-                        cap_resp = requests.get(selected['baseUrl'], proxies=proxies, headers={
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                        }, timeout=30)
-
-                        if cap_resp.status_code == 200:
-                            # XML 파싱
-                            transcript = []
-                            text_matches = re.findall(r'<text start="([^"]+)"[^>]*>([^<]*)</text>', cap_resp.text)
-                            for start, text in text_matches:
-                                text = text.replace('&amp;', '&').replace('&#39;', "'").replace('&quot;', '"').replace('&lt;', '<').replace('&gt;', '>')
-                                if text.strip():
-                                    start_sec = float(start)
-                                    mins = int(start_sec // 60)
-                                    secs = int(start_sec % 60)
-                                    transcript.append({
-                                        'start': start_sec,
-                                        'duration': 0,
-                                        'text': text.strip(),
-                                        'timestamp': f"{mins:02d}:{secs:02d}"
-                                    })
-
-                            if transcript:
-                                # 비디오 정보
-                                video_info = {
-                                    'id': video_id,
-                                    'title': player_response.get('videoDetails', {}).get('title', ''),
-                                    'channel': player_response.get('videoDetails', {}).get('author', ''),
-                                    'thumbnail': f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg',
-                                    'date': '',
-                                    'views': f"{int(player_response.get('videoDetails', {}).get('viewCount', 0)):,}회"
-                                }
-
-                                return {
-                                    'success': True,
-                                    'videoInfo': video_info,
-                                    'transcript': transcript,
-                                    'fullText': ' '.join([t['text'] for t in transcript])
-                                }
-        except Exception as e:
-            print(f"Bright Data proxy error: {e}")
-
-    # ScraperAPI
+
+async def get_transcript_with_scraperapi(video_id: str, languages: List[str] = ['ko', 'en']) -> dict:
+    """ScraperAPI 를 통해 자막 추출 (환경변수 SCRAPERAPI_KEY)"""
     scraperapi_key = os.environ.get('SCRAPERAPI_KEY')
-    if scraperapi_key:
-        try:
-            url = f'http://api.scraperapi.com?api_key={scraperapi_key}&url=https://www.youtube.com/watch?v={video_id}'
-            resp = requests.get(url, timeout=60)
-
-            if resp.status_code == 200 and 'captionTracks' in resp.text:
-                # 위와 동일한 파싱 로직
-                match = re.search(r'ytInitialPlayerResponse\s*=\s*(\{.+?\});', resp.text)
-                if match:
-                    import json
-                    player_response = json.loads(match.group(1))
-                    captions = player_response.get('captions', {}).get('playerCaptionsTracklistRenderer', {}).get('captionTracks', [])
-
-                    if captions:
-                        selected = captions[0]
-                        for lang in languages:
-                            for cap in captions:
-                                if cap.get('languageCode') == lang:
-                                    selected = cap
-                                    break
-
-                        cap_url = f'http://api.scraperapi.com?api_key={scraperapi_key}&url={selected["baseUrl"]}'
-                        cap_resp = requests.get(cap_url, timeout=60)
-
-                        if cap_resp.status_code == 200:
-                            transcript = []
-                            text_matches = re.findall(r'<text start="([^"]+)"[^>]*>([^<]*)</text>', cap_resp.text)
-                            for start, text in text_matches:
-                                text = text.replace('&amp;', '&').replace('&#39;', "'").replace('&quot;', '"')
-                                if text.strip():
-                                    start_sec = float(start)
-                                    mins = int(start_sec // 60)
-                                    secs = int(start_sec % 60)
-                                    transcript.append({
-                                        'start': start_sec,
-                                        'duration': 0,
-                                        'text': text.strip(),
-                                        'timestamp': f"{mins:02d}:{secs:02d}"
-                                    })
-
-                            if transcript:
-                                video_info = {
-                                    'id': video_id,
-                                    'title': player_response.get('videoDetails', {}).get('title', ''),
-                                    'channel': player_response.get('videoDetails', {}).get('author', ''),
-                                    'thumbnail': f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg',
-                                    'date': '',
-                                    'views': ''
-                                }
-
-                                return {
-                                    'success': True,
-                                    'videoInfo': video_info,
-                                    'transcript': transcript,
-                                    'fullText': ' '.join([t['text'] for t in transcript])
-                                }
-        except Exception as e:
-            print(f"ScraperAPI error: {e}")
-
-    return {'success': False, 'error': '프록시 서비스가 설정되지 않았거나 실패했습니다'}
-
-
-def get_transcript_with_ytdlp(video_id: str, languages: List[str] = ['ko', 'en'], proxy: str = None) -> dict:
+    if not scraperapi_key:
+        return {'success': False, 'error': 'SCRAPERAPI_KEY 환경변수가 설정되지 않았습니다'}
+
+    try:
+        async with httpx.AsyncClient(timeout=SCRAPERAPI_TIMEOUT) as client:
+            result = await _transcript_from_watch_page(
+                client, video_id, languages,
+                wrap_url=lambda url: f'http://api.scraperapi.com?api_key={scraperapi_key}&url={url}',
+            )
+        return result or {'success': False, 'error': 'ScraperAPI 로 자막을 가져오지 못했습니다'}
+    except Exception as e:
+        print(f"ScraperAPI error: {e}")
+        return {'success': False, 'error': f'ScraperAPI 오류: {str(e)}'}
+
+
+def _parse_subtitles(sub_content: str, is_vtt: bool) -> List[dict]:
+    """VTT/SRT 자막 파싱 (연속된 같은 텍스트 제거)"""
+    transcript = []
+
+    if is_vtt:
+        # VTT 형식 파싱
+        # 패턴: 00:00:00.000 --> 00:00:00.000
+        pattern = r'(\d{2}:\d{2}:\d{2}[.,]\d{3})\s*-->\s*\d{2}:\d{2}:\d{2}[.,]\d{3}[^\n]*\n((?:(?!\d{2}:\d{2}:\d{2}).*\n?)*)'
+    else:
+        # SRT 형식 파싱
+        pattern = r'(\d{2}:\d{2}:\d{2}[.,]\d{3})\s*-->\s*\d{2}:\d{2}:\d{2}[.,]\d{3}\n((?:(?!\d+\n\d{2}:\d{2}:\d{2}).*\n?)*)'
+
+    for timestamp, text in re.findall(pattern, sub_content):
+        # 타임스탬프 파싱
+        parts = timestamp.replace(',', '.').split(':')
+        hrs = int(parts[0])
+        mins = int(parts[1])
+        secs = float(parts[2])
+        start = hrs * 3600 + mins * 60 + secs
+
+        # 텍스트 정리
+        text = re.sub(r'<[^>]+>', '', text)  # HTML 태그 제거
+        if is_vtt:
+            text = re.sub(r'\{[^}]+\}', '', text)  # 스타일 태그 제거
+        text = text.strip()
+
+        if text and not text.startswith('WEBVTT'):
+            transcript.append({
+                'start': start,
+                'duration': 0,
+                'text': text,
+                'timestamp': f"{mins:02d}:{int(secs):02d}" if hrs == 0 else f"{hrs:02d}:{mins:02d}:{int(secs):02d}"
+            })
+
+    # 중복 제거 (연속된 같은 텍스트)
+    deduplicated = []
+    prev_text = ''
+    for item in transcript:
+        if item['text'] != prev_text:
+            deduplicated.append(item)
+            prev_text = item['text']
+    return deduplicated
+
+
+async def get_transcript_with_ytdlp(video_id: str, languages: List[str] = ['ko', 'en'], proxy: str = None) -> dict:
     """yt-dlp를 사용하여 자막 추출 (직접 파일 다운로드 방식)
 
     Args:
@@ -316,90 +393,44 @@ def get_transcript_with_ytdlp(video_id: str, languages: List[str] = ['ko', 'en']
         languages: 자막 언어 우선순위
         proxy: 프록시 URL (예: 'socks5://127.0.0.1:1080' 또는 'http://proxy:8080')
     """
-    import re
-    import sys
-    import glob
-
     # 환경변수에서 프록시 설정 확인
     if not proxy:
         proxy = os.environ.get('YOUTUBE_PROXY') or os.environ.get('HTTP_PROXY') or os.environ.get('BRIGHTDATA_PROXY')
 
+    output_dir = tempfile.mkdtemp(prefix='yt_')
     try:
-        # 임시 디렉토리 생성
-        output_dir = tempfile.mkdtemp(prefix='yt_')
         output_template = os.path.join(output_dir, '%(id)s')
 
-        # 1. 먼저 영상 정보만 가져오기
-        cmd = [sys.executable, '-m', 'yt_dlp', '--skip-download', '-j']
-        if proxy:
-            cmd.extend(['--proxy', proxy])
-        cmd.append(f'https://www.youtube.com/watch?v={video_id}')
-
-        info_result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
-
-        video_info = {
-            'id': video_id,
-            'title': '',
-            'channel': '',
-            'thumbnail': f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg',
-            'date': '',
-            'views': '',
-        }
-
-        if info_result.returncode == 0 and info_result.stdout:
-            stdout_lines = info_result.stdout.strip().split('\n')
-            for line in reversed(stdout_lines):
-                if line.strip().startswith('{'):
-                    try:
-                        info = json.loads(line)
-                        video_info = {
-                            'id': video_id,
-                            'title': info.get('title', ''),
-                            'channel': info.get('channel', info.get('uploader', '')),
-                            'thumbnail': info.get('thumbnail', f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg'),
-                            'date': info.get('upload_date', '')[:10] if info.get('upload_date') else '',
-                            'views': f"{info.get('view_count', 0):,}회" if info.get('view_count') else '',
-                        }
-                    except:
-                        pass
-                    break
-
-        # 2. 자막 파일 직접 다운로드 (yt-dlp가 처리)
-        lang_opts = ','.join(languages)
-        sub_cmd = [
-            sys.executable, '-m', 'yt_dlp',
+        # 1. 영상 정보와 2. 자막 파일 다운로드를 동시에 실행
+        sub_args = [
             '--skip-download',
             '--write-sub',
             '--write-auto-sub',
-            '--sub-lang', lang_opts,
+            '--sub-lang', ','.join(languages),
             '--sub-format', 'vtt/srt/best',
             '--convert-subs', 'vtt',
         ]
         if proxy:
-            sub_cmd.extend(['--proxy', proxy])
-        sub_cmd.extend(['-o', output_template, f'https://www.youtube.com/watch?v={video_id}'])
-
-        sub_result = subprocess.run(
-            sub_cmd,
-            capture_output=True,
-            text=True,
-            timeout=120,
-            cwd=output_dir
-        )
+            sub_args.extend(['--proxy', proxy])
+        sub_args.extend(['-o', output_template, f'https://www.youtube.com/watch?v={video_id}'])
+
+        info_task = asyncio.ensure_future(fetch_video_info(video_id, proxy))
+        try:
+            await run_ytdlp(sub_args, YTDLP_SUBTITLE_TIMEOUT, cwd=output_dir)
+        except BaseException:
+            info_task.cancel()
+            raise
+
+        try:
+            video_info = await info_task or _default_video_info(video_id)
+        except Exception:
+            video_info = _default_video_info(video_id)
 
         # 3. 다운로드된 자막 파일 찾기
         sub_files = glob.glob(os.path.join(output_dir, '*.vtt')) + \
                     glob.glob(os.path.join(output_dir, '*.srt'))
 
         if not sub_files:
-            # 디렉토리 정리
-            import shutil
-            shutil.rmtree(output_dir, ignore_errors=True)
             return {'success': False, 'error': '자막 파일을 다운로드할 수 없습니다. 이 영상에 자막이 없거나 YouTube가 차단했을 수 있습니다.'}
 
         # 가장 최근 파일 사용
@@ -408,201 +439,147 @@ def get_transcript_with_ytdlp(video_id: str, languages: List[str] = ['ko', 'en']
         with open(sub_file, 'r', encoding='utf-8') as f:
             sub_content = f.read()
 
-        # 디렉토리 정리
-        import shutil
-        shutil.rmtree(output_dir, ignore_errors=True)
-
         # 4. VTT/SRT 파싱
-        transcript = []
-
-        if 'WEBVTT' in sub_content or sub_file.endswith('.vtt'):
-            # VTT 형식 파싱
-            # 패턴: 00:00:00.000 --> 00:00:00.000
-            pattern = r'(\d{2}:\d{2}:\d{2}[.,]\d{3})\s*-->\s*\d{2}:\d{2}:\d{2}[.,]\d{3}[^\n]*\n((?:(?!\d{2}:\d{2}:\d{2}).*\n?)*)'
-            matches = re.findall(pattern, sub_content)
-
-            for timestamp, text in matches:
-                # 타임스탬프 파싱
-                timestamp = timestamp.replace(',', '.')
-                parts = timestamp.split(':')
-                hrs = int(parts[0])
-                mins = int(parts[1])
-                secs = float(parts[2])
-                start = hrs * 3600 + mins * 60 + secs
-
-                # 텍스트 정리
-                text = re.sub(r'<[^>]+>', '', text)  # HTML 태그 제거
-                text = re.sub(r'\{[^}]+\}', '', text)  # 스타일 태그 제거
-                text = text.strip()
-
-                if text and not text.startswith('WEBVTT'):
-                    transcript.append({
-                        'start': start,
-                        'duration': 0,
-                        'text': text,
-                        'timestamp': f"{mins:02d}:{int(secs):02d}" if hrs == 0 else f"{hrs:02d}:{mins:02d}:{int(secs):02d}"
-                    })
-        else:
-            # SRT 형식 파싱
-            pattern = r'(\d{2}:\d{2}:\d{2}[.,]\d{3})\s*-->\s*\d{2}:\d{2}:\d{2}[.,]\d{3}\n((?:(?!\d+\n\d{2}:\d{2}:\d{2}).*\n?)*)'
-            matches = re.findall(pattern, sub_content)
-
-            for timestamp, text in matches:
-                timestamp = timestamp.replace(',', '.')
-                parts = timestamp.split(':')
-                hrs = int(parts[0])
-                mins = int(parts[1])
-                secs = float(parts[2])
-                start = hrs * 3600 + mins * 60 + secs
-
-                text = re.sub(r'<[^>]+>', '', text)
-                text = text.strip()
-
-                if text:
-                    transcript.append({
-                        'start': start,
-                        'duration': 0,
-                        'text': text,
-                        'timestamp': f"{mins:02d}:{int(secs):02d}" if hrs == 0 else f"{hrs:02d}:{mins:02d}:{int(secs):02d}"
-                    })
-
-        # 중복 제거 (연속된 같은 텍스트)
-        deduplicated = []
-        prev_text = ''
-        for item in transcript:
-            if item['text'] != prev_text:
-                deduplicated.append(item)
-                prev_text = item['text']
-        transcript = deduplicated
+        transcript = _parse_subtitles(sub_content, 'WEBVTT' in sub_content or sub_file.endswith('.vtt'))
 
         if not transcript:
             return {'success': False, 'error': '자막 파싱 실패'}
 
-        return {
-            'success': True,
-            'videoInfo': video_info,
-            'transcript': transcript,
-            'fullText': ' '.join([t['text'] for t in transcript])
-        }
+        return _transcript_result(video_info, transcript)
 
-    except subprocess.TimeoutExpired:
-        return {'success': False, 'error': 'yt-dlp 타임아웃 (120초 초과)'}
+    except asyncio.TimeoutError:
+        return {'success': False, 'error': f'yt-dlp 타임아웃 ({YTDLP_SUBTITLE_TIMEOUT}초 초과)'}
     except FileNotFoundError:
         return {'success': False, 'error': 'yt-dlp가 설치되지 않았습니다'}
     except Exception as e:
         return {'success': False, 'error': str(e)}
+    finally:
+        # 디렉토리 정리
+        shutil.rmtree(output_dir, ignore_errors=True)
 
 
-def generate_summary_with_ai(full_text: str, title: str) -> dict:
-    """AI로 요약 생성 (핵심요약 + 블로그 글 포함)"""
-    import requests
+# ============================================
+# 자막 제공자 경쟁 (hedged race)
+# ============================================
+class ProviderStats:
+    """제공자별 성공률과 성공 시 응답 시간 - 다음 요청의 시도 순서 결정에 사용"""
+
+    def __init__(self):
+        self._stats: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, success: bool, elapsed: float) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(name, {'attempts': 0, 'successes': 0, 'success_seconds': 0.0, 'failure_seconds': 0.0})
+            stats['attempts'] += 1
+            if success:
+                stats['successes'] += 1
+                stats['success_seconds'] += elapsed
+            else:
+                stats['failure_seconds'] += elapsed
+
+    def expected_seconds(self, name: str) -> float:
+        """예상 성공 소요 시간 = 평균 성공 응답 시간 / 성공률 (라플라스 보정)"""
+        with self._lock:
+            stats = self._stats.get(name)
+        prior = PROVIDER_PRIOR_SECONDS.get(name, 30.0)
+        if not stats:
+            return prior / 0.5
+        latency = stats['success_seconds'] / stats['successes'] if stats['successes'] else prior
+        success_rate = (stats['successes'] + 1) / (stats['attempts'] + 2)
+        return latency / success_rate
+
+    def order(self, names: List[str]) -> List[str]:
+        return sorted(names, key=self.expected_seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            items = {name: dict(stats) for name, stats in self._stats.items()}
+        return {
+            name: {
+                'attempts': stats['attempts'],
+                'successes': stats['successes'],
+                'success_rate': round(stats['successes'] / stats['attempts'], 4) if stats['attempts'] else 0.0,
+                'avg_success_seconds': round(stats['success_seconds'] / stats['successes'], 3) if stats['successes'] else None,
+                'avg_failure_seconds': round(stats['failure_seconds'] / (stats['attempts'] - stats['successes']), 3)
+                if stats['attempts'] > stats['successes'] else None,
+                'expected_seconds': round(self.expected_seconds(name), 3),
+            }
+            for name, stats in items.items()
+        }
 
-    # Grok API 먼저 시도
-    grok_api_key = os.environ.get('XAI_API_KEY')
-    if grok_api_key:
-        try:
-            prompt = f'''당신은 유튜브 영상 분석 전문가입니다. 스크립트를 꼼꼼히 읽고 상세한 타임라인과 요약을 작성하세요.
 
-영상 제목: {title}
+provider_stats = ProviderStats()
 
-스크립트 (타임스탬프 포함):
-{full_text[:20000]}
 
-다음 JSON 형식으로 응답하세요 (마크다운 코드블록 없이 순수 JSON만):
+async def race_providers(providers: dict, hedge_delay: float = PROVIDER_HEDGE_DELAY) -> tuple[dict, Optional[str]]:
+    """제공자들을 경쟁시켜 가장 먼저 성공한 자막 반환
 
-{{
-    "threeLine": [
-        "핵심 메시지 1: 영상에서 가장 중요한 주장이나 정보를 구체적으로 (예: 특정 수치, 사례, 인용문 포함)",
-        "핵심 메시지 2: 두 번째로 중요한 내용을 구체적으로",
-        "핵심 메시지 3: 세 번째로 중요한 내용을 구체적으로"
-    ],
-    "keyPoints": [
-        "💡 [주제] 구체적인 인사이트 (예시나 수치 포함)",
-        "💡 [주제] 구체적인 인사이트",
-        "💡 [주제] 구체적인 인사이트",
-        "💡 [주제] 구체적인 인사이트",
-        "💡 [주제] 구체적인 인사이트",
-        "💡 [주제] 구체적인 인사이트",
-        "💡 [주제] 구체적인 인사이트"
-    ],
-    "tableOfContents": [
-        "1. 첫 번째 대주제",
-        "2. 두 번째 대주제",
-        "3. 세 번째 대주제",
-        "4. 네 번째 대주제",
-        "5. 다섯 번째 대주제"
-    ],
-    "timeline": [
-        {{
-            "title": "🎬 인트로: [구체적인 도입부 내용]",
-            "timestamp": "00:00",
-            "content": "이 섹션에서 다루는 내용을 3-5문장으로 상세히 설명. 발화자가 말한 핵심 내용, 예시, 주장을 구체적으로 포함.",
-            "details": [
-                "• 첫 번째 세부 포인트: 구체적인 내용이나 예시",
-                "• 두 번째 세부 포인트: 언급된 수치나 사례",
-                "• 세 번째 세부 포인트: 핵심 인용이나 주장",
-                "• 네 번째 세부 포인트: 추가 정보"
-            ]
-        }},
-        {{
-            "title": "📌 [두 번째 섹션 제목]",
-            "timestamp": "MM:SS",
-            "content": "상세 설명...",
-            "details": ["• 세부1", "• 세부2", "• 세부3", "• 세부4"]
-        }}
-    ],
-    "blogPost": "상세 블로그 글 (2500자 이상)"
-}}
+    기록상 가장 빠를 것으로 예상되는 제공자부터 시작하고, hedge_delay 안에 응답이 없거나
+    실패하면 다음 제공자를 추가로 시작. 첫 번째 유효한 자막이 나오면 나머지는 취소.
+    취소된 시도는 통계에 기록하지 않음.
 
-⚠️ 타임라인 작성 규칙 (매우 중요!!!):
-1. 최소 8-12개 섹션으로 나누세요 (영상 길이에 비례)
-2. timestamp는 스크립트의 실제 타임스탬프를 참고하여 정확히 기입
-3. title은 이모지 + 구체적인 제목 (예: "🔥 AI 에이전트가 바꿀 업무 자동화의 미래")
-4. content는 3-5문장으로 해당 구간의 핵심 내용을 상세히 설명
-5. details는 4-6개의 구체적인 포인트 (예시, 수치, 인용문 포함)
-6. 각 섹션이 무슨 내용인지 읽는 사람이 영상을 안 봐도 이해할 수 있게 작성
+    Args:
+        providers: {이름: 코루틴을 만드는 함수}
 
-📝 전체 작성 규칙:
-- 모든 내용은 한국어로 작성
-- 추상적인 표현 금지, 구체적인 정보만 작성
-- "~에 대해 설명합니다" 같은 메타 설명 금지
-- 실제 영상에서 언급된 내용만 작성
-- blogPost는 2500자 이상, 독자가 영상을 안 봐도 될 정도로 상세히'''
+    Returns:
+        (결과, 성공한 제공자 이름 또는 None)
+    """
+    queue = provider_stats.order(list(providers))
+    running: dict[asyncio.Task, tuple[str, float]] = {}
+    last_failure = {'success': False, 'error': '사용 가능한 자막 제공자가 없습니다'}
+
+    def launch_next() -> None:
+        name = queue.pop(0)
+        running[asyncio.ensure_future(providers[name]())] = (name, time.perf_counter())
 
-            response = requests.post(
-                'https://api.x.ai/v1/chat/completions',
-                headers={
-                    'Authorization': f'Bearer {grok_api_key}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': 'grok-3-mini-fast-beta',
-                    'messages': [{'role': 'user', 'content': prompt}],
-                    'temperature': 0.4,
-                    'max_tokens': 8000,
-                },
-                timeout=120
+    try:
+        if queue:
+            launch_next()
+        while running:
+            done, _ = await asyncio.wait(
+                running,
+                timeout=hedge_delay if queue else None,
+                return_when=asyncio.FIRST_COMPLETED,
             )
+            if not done:
+                # 응답이 늦음: 다음 제공자를 함께 시작
+                launch_next()
+                continue
 
-            if response.ok:
-                result = response.json()
-                text = result['choices'][0]['message']['content']
+            for task in done:
+                name, started = running.pop(task)
+                elapsed = time.perf_counter() - started
+                try:
+                    result = task.result()
+                except Exception as e:
+                    result = {'success': False, 'error': f'{name} 오류: {str(e)}'}
 
-                # JSON 추출
-                import re
-                json_str = text.strip()
-                if json_str.startswith('```'):
-                    json_str = re.sub(r'```(?:json)?\n?', '', json_str).strip()
+                if result.get('success') and result.get('transcript'):
+                    provider_stats.record(name, True, elapsed)
+                    return result, name
 
-                return json.loads(json_str)
-        except Exception as e:
-            print(f"Grok API error: {e}")
+                provider_stats.record(name, False, elapsed)
+                last_failure = result
 
-    # Gemini API 시도
-    google_api_key = os.environ.get('GOOGLE_API_KEY')
-    if google_api_key:
-        try:
-            prompt = f'''당신은 유튜브 영상 분석 전문가입니다. 스크립트를 꼼꼼히 읽고 상세한 타임라인과 요약을 작성하세요.
+            # 실패한 자리는 기다리지 않고 바로 다음 제공자로 채움
+            if queue:
+                launch_next()
+
+        return last_failure, None
+
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+
+# ============================================
+# AI 요약
+# ============================================
+def _summary_prompt(full_text: str, title: str) -> str:
+    return f'''당신은 유튜브 영상 분석 전문가입니다. 스크립트를 꼼꼼히 읽고 상세한 타임라인과 요약을 작성하세요.
 
 영상 제목: {title}
 
@@ -670,37 +647,72 @@ def generate_summary_with_ai(full_text: str, title: str) -> dict:
 - 실제 영상에서 언급된 내용만 작성
 - blogPost는 2500자 이상, 독자가 영상을 안 봐도 될 정도로 상세히'''
 
-            url = f'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-exp:generateContent?key={google_api_key}'
-            response = requests.post(url, json={
-                'contents': [{'parts': [{'text': prompt}]}],
-                'generationConfig': {
-                    'temperature': 0.4,
-                    'maxOutputTokens': 8000,
-                }
-            }, timeout=120)
-
-            if response.ok:
-                result = response.json()
-                text = result['candidates'][0]['content']['parts'][0]['text']
-
-                # JSON 추출
-                import re
-                json_str = text.strip()
-                if json_str.startswith('```'):
-                    json_str = re.sub(r'```(?:json)?\n?', '', json_str).strip()
-
-                return json.loads(json_str)
-        except Exception as e:
-            print(f"Gemini API error: {e}")
+
+def _parse_summary_json(text: str) -> dict:
+    # JSON 추출
+    json_str = text.strip()
+    if json_str.startswith('```'):
+        json_str = re.sub(r'```(?:json)?\n?', '', json_str).strip()
+    return json.loads(json_str)
+
+
+async def generate_summary_with_ai(full_text: str, title: str) -> dict:
+    """AI로 요약 생성 (핵심요약 + 블로그 글 포함)"""
+    prompt = _summary_prompt(full_text, title)
+
+    async with httpx.AsyncClient(timeout=SUMMARY_TIMEOUT) as client:
+        # Grok API 먼저 시도
+        grok_api_key = os.environ.get('XAI_API_KEY')
+        if grok_api_key:
+            try:
+                response = await client.post(
+                    'https://api.x.ai/v1/chat/completions',
+                    headers={
+                        'Authorization': f'Bearer {grok_api_key}',
+                        'Content-Type': 'application/json'
+                    },
+                    json={
+                        'model': 'grok-3-mini-fast-beta',
+                        'messages': [{'role': 'user', 'content': prompt}],
+                        'temperature': 0.4,
+                        'max_tokens': 8000,
+                    },
+                )
+
+                if response.is_success:
+                    result = response.json()
+                    return _parse_summary_json(result['choices'][0]['message']['content'])
+            except Exception as e:
+                print(f"Grok API error: {e}")
+
+        # Gemini API 시도
+        google_api_key = os.environ.get('GOOGLE_API_KEY')
+        if google_api_key:
+            try:
+                url = f'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-exp:generateContent?key={google_api_key}'
+                response = await client.post(url, json={
+                    'contents': [{'parts': [{'text': prompt}]}],
+                    'generationConfig': {
+                        'temperature': 0.4,
+                        'maxOutputTokens': 8000,
+                    }
+                })
+
+                if response.is_success:
+                    result = response.json()
+                    return _parse_summary_json(result['candidates'][0]['content']['parts'][0]['text'])
+            except Exception as e:
+                print(f"Gemini API error: {e}")
 
     return None
 
 
+# ============================================
+# Endpoints
+# ============================================
 @router.post("/transcript", response_model=YouTubeResponse)
 async def get_youtube_transcript(request: YouTubeRequest):
     """유튜브 영상의 자막 추출 및 요약"""
-    import re
-
     # URL에서 비디오 ID 추출
     patterns = [
         r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)([^&\n?#]+)',
@@ -720,27 +732,20 @@ async def get_youtube_transcript(request: YouTubeRequest):
     if not video_id:
         return YouTubeResponse(success=False, error='유효한 유튜브 링크가 아닙니다')
 
-    # 자막 추출 시도 (우선순위: Supadata → 프록시 → yt-dlp)
-    result = None
-
-    # 1. Supadata API 사용 (가장 안정적, 유료)
+    # 자막 추출: 설정된 제공자를 경쟁시켜 가장 먼저 성공한 결과 사용
+    providers = {}
     if request.use_supadata or os.environ.get('SUPADATA_API_KEY'):
-        result = get_transcript_with_supadata(video_id, request.languages)
-        if result['success']:
-            print(f"✓ Got transcript from Supadata API")
-
-    # 2. 프록시 서비스 시도 (Bright Data, ScraperAPI)
-    if not result or not result['success']:
-        if os.environ.get('BRIGHTDATA_PROXY') or os.environ.get('SCRAPERAPI_KEY'):
-            result = get_transcript_with_proxy(video_id, request.languages)
-            if result['success']:
-                print(f"✓ Got transcript via proxy service")
-
-    # 3. yt-dlp 시도 (로컬 환경 또는 VPN 사용 시)
-    if not result or not result['success']:
-        result = get_transcript_with_ytdlp(video_id, request.languages, request.proxy)
-        if result['success']:
-            print(f"✓ Got transcript from yt-dlp")
+        providers['supadata'] = lambda: get_transcript_with_supadata(video_id, request.languages)
+    if os.environ.get('BRIGHTDATA_PROXY'):
+        providers['brightdata'] = lambda: get_transcript_with_brightdata(video_id, request.languages)
+    if os.environ.get('SCRAPERAPI_KEY'):
+        providers['scraperapi'] = lambda: get_transcript_with_scraperapi(video_id, request.languages)
+    # yt-dlp (로컬 환경 또는 VPN 사용 시)
+    providers['ytdlp'] = lambda: get_transcript_with_ytdlp(video_id, request.languages, request.proxy)
+
+    result, provider = await race_providers(providers)
+    if provider:
+        print(f"✓ Got transcript from {provider}")
 
     if not result['success']:
         error_msg = result.get('error', '알 수 없는 오류')
@@ -759,13 +764,23 @@ async def get_youtube_transcript(request: YouTubeRequest):
 
     # AI 요약 생성
     if request.generate_summary:
-        summary = generate_summary_with_ai(result['fullText'], result['videoInfo']['title'])
+        summary = await generate_summary_with_ai(result['fullText'], result['videoInfo']['title'])
         if summary:
             response.summary = Summary(**summary)
 
     return response
 
 
+@router.get("/providers/stats")
+async def transcript_provider_stats():
+    """자막 제공자별 성공률과 응답 시간 (시도 순서 결정에 사용)"""
+    return {
+        'order': provider_stats.order(list(PROVIDER_PRIOR_SECONDS)),
+        'hedge_delay': PROVIDER_HEDGE_DELAY,
+        'providers': provider_stats.snapshot(),
+    }
+
+
 @router.get("/test")
 async def test_youtube():
     """YouTube 스킬 테스트"""
@@ -0,0 +1,38 @@
+from tools.email_body import normalize_body
+
+
+def test_leading_signature_delimiter_keeps_body():
+    assert normalize_body("--\nhello", "") == "--\nhello"
+
+
+def test_signature_after_content_is_cut():
+    assert normalize_body("hello\n--\nKim\n010-1234-5678", "") == "hello"
+
+
+def test_forwarded_message_is_kept():
+    body = (
+        "FYI see below.\n\n"
+        "---------- Forwarded message ---------\n"
+        "From: A <a@example.com>\nDate: Mon\nSubject: Contract\nTo: me\n\n"
+        "Please sign the contract."
+    )
+    assert normalize_body(body, None).endswith("Please sign the contract.")
+
+
+def test_leading_blank_line_does_not_cut_top_header():
+    assert normalize_body("\nFrom: Bob\nTo: me\n\nbody", None) == "From: Bob\nTo: me\n\nbody"
+
+
+def test_mid_sentence_from_line_is_kept():
+    body = "Update:\nFrom: the warehouse, it ships Monday.\nThanks"
+    assert normalize_body(body, None) == body
+
+
+def test_quoted_reply_header_block_is_cut():
+    body = "Sure.\n\nFrom: Bob <b@example.com>\nSent: Monday\nTo: me\nSubject: hi\n\nold"
+    assert normalize_body(body, None) == "Sure."
+
+
+def test_unsubscribe_mention_in_body_is_kept():
+    body = "Please unsubscribe me from the list.\nUnsubscribe here"
+    assert normalize_body(body, None) == "Please unsubscribe me from the list."
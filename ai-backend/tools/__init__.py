@@ -1,18 +1,20 @@
 from .registry import register_tool, get_tool, get_all_tools, get_tools_by_names, list_tools_info
 
 # Import tools to register them
-from .web_search import web_search_tool
-from .calculator import calculator_tool
+from .web_search import web_search_tool, web_search_many
+from .calculator import calculator_tool, calculator_batch
 
 # AI Docs tools - Document management and analysis
 from .ai_docs import (
     ai_docs_create,
     ai_docs_search,
     ai_docs_get,
+    ai_docs_get_many,
     ai_docs_analyze,
     ai_docs_update,
     ai_docs_list,
     ai_docs_delete,
+    ai_docs_semantic_search,
 )
 
 # AI Sheet tools - Spreadsheet management and analysis
@@ -25,6 +27,7 @@ from .ai_sheet import (
     ai_sheet_query,
     ai_sheet_add_column,
     ai_sheet_list,
+    ai_sheet_import,
 )
 
 # Email tools - Email management and AI analysis
@@ -37,6 +40,7 @@ from .email import (
     email_search,
     email_mark_read,
     email_summarize_inbox,
+    email_triage_batch,
 )
 
 __all__ = [
@@ -48,15 +52,19 @@ __all__ = [
     "list_tools_info",
     # Web tools
     "web_search_tool",
+    "web_search_many",
     "calculator_tool",
+    "calculator_batch",
     # AI Docs tools
     "ai_docs_create",
     "ai_docs_search",
     "ai_docs_get",
+    "ai_docs_get_many",
     "ai_docs_analyze",
     "ai_docs_update",
     "ai_docs_list",
     "ai_docs_delete",
+    "ai_docs_semantic_search",
     # AI Sheet tools
     "ai_sheet_create",
     "ai_sheet_get",
@@ -66,6 +74,7 @@ __all__ = [
     "ai_sheet_query",
     "ai_sheet_add_column",
     "ai_sheet_list",
+    "ai_sheet_import",
     # Email tools
     "email_get",
     "email_list",
@@ -75,4 +84,5 @@ __all__ = [
     "email_search",
     "email_mark_read",
     "email_summarize_inbox",
+    "email_triage_batch",
 ]
@@ -7,10 +7,16 @@ from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from typing import Literal, Optional
 import json
+from datetime import datetime, timezone
 
 from config import get_settings
 from .registry import register_tool
 from utils.supabase import get_supabase_client
+from utils.hashing import content_hash
+from utils.pagination import apply_keyset, page_result
+from utils.metrics import hit_counter
+from .doc_index import indexer, search_chunks, split_document
+from .doc_summarizer import needs_summary, summarize_content, summarizer
 
 settings = get_settings()
 
@@ -21,6 +27,211 @@ llm = ChatOpenAI(
     api_key=settings.openai_api_key,
 )
 
+# Columns selectable through ai_docs_get_many
+DOC_FIELDS = (
+    "id", "project_id", "title", "summary", "content", "doc_type", "tags", "status", "metadata",
+    "source_url", "source_type", "summary_status", "created_at", "updated_at",
+)
+DEFAULT_GET_MANY_FIELDS = [f for f in DOC_FIELDS if f != "metadata"]
+# Background worker bookkeeping set by ai_docs_update, not reported as updated fields
+_STATUS_FIELDS = ("summary_status", "summary_attempts", "index_status", "index_attempts")
+MAX_GET_MANY = 50
+# Seconds ai_docs_get/get_many/list results are reused (web app edits bypass invalidation)
+READ_CACHE_TTL = 60
+
+analysis_cache_counter = hit_counter("ai_docs_analyze")
+
+# Documents longer than this are analyzed with the chunked map-reduce path
+SINGLE_PASS_MAX_CHARS = 8000
+# Chunk size for the map step and parallel LLM calls allowed
+MAP_CHUNK_MAX_CHARS = 6000
+MAP_MAX_CONCURRENCY = 4
+# Merge rounds before the reduce step falls back to truncating the notes
+MAX_REDUCE_ROUNDS = 3
+# Bump when ANALYSIS_PROMPTS / MAP_PROMPTS change so cached chunk results are not reused
+ANALYSIS_PROMPT_VERSION = "v1"
+
+ANALYSIS_PROMPTS = {
+    "summary": """다음 문서를 3-5문장으로 핵심 내용을 요약해주세요.
+
+문서 제목: {title}
+문서 내용:
+{content}
+
+요약:""",
+    "key_points": """다음 문서에서 핵심 포인트를 5-7개 추출해주세요. 불릿 포인트로 정리해주세요.
+
+문서 제목: {title}
+문서 내용:
+{content}
+
+핵심 포인트:""",
+    "action_items": """다음 문서에서 필요한 액션 아이템(할 일)을 추출해주세요. 우선순위와 함께 정리해주세요.
+
+문서 제목: {title}
+문서 내용:
+{content}
+
+액션 아이템:""",
+    "sentiment": """다음 문서의 전반적인 톤과 감정을 분석해주세요. (긍정/부정/중립, 긴급성, 중요도 등)
+
+문서 제목: {title}
+문서 내용:
+{content}
+
+분석:""",
+    "full": """다음 문서를 종합적으로 분석해주세요:
+1. 핵심 요약 (3-5문장)
+2. 주요 포인트 (5-7개)
+3. 액션 아이템 (있다면)
+4. 톤/감정 분석
+5. 추가 인사이트
+
+문서 제목: {title}
+문서 유형: {doc_type}
+문서 내용:
+{content}
+
+분석 결과:""",
+}
+
+# Map step: what to extract from each section for a given analysis_type
+MAP_PROMPTS = {
+    "summary": "이 구간의 핵심 내용을 3-5문장으로 요약해주세요.",
+    "key_points": "이 구간의 핵심 포인트를 불릿 포인트로 추출해주세요.",
+    "action_items": "이 구간에 언급된 액션 아이템(할 일, 담당자, 기한)을 모두 추출해주세요. 없으면 '없음'이라고 답하세요.",
+    "sentiment": "이 구간의 톤과 감정(긍정/부정/중립, 긴급성, 중요도)을 근거와 함께 간단히 정리해주세요.",
+    "full": "이 구간의 (1) 핵심 요약 (2) 주요 포인트 (3) 액션 아이템 (4) 톤/감정을 간단한 메모로 정리해주세요.",
+}
+
+map_prompt = ChatPromptTemplate.from_template("""다음은 긴 문서의 일부 구간입니다.
+
+문서 제목: {title}
+구간: {section}
+
+{instruction}
+
+구간 내용:
+{content}""")
+
+
+def _map_reduce_analysis(doc: dict, analysis_type: str) -> dict:
+    """
+    Analyze a long document chunk by chunk, then reduce the partial results.
+
+    Chunks follow the document structure (see split_document). Each chunk's
+    map result is cached in document_chunk_analyses by chunk hash, so only
+    changed chunks are sent to the LLM; missing chunks run concurrently up
+    to MAP_MAX_CONCURRENCY.
+    """
+    client = get_supabase_client()
+    chunks = split_document(doc["content"], max_chars=MAP_CHUNK_MAX_CHARS)
+    instruction = MAP_PROMPTS.get(analysis_type, MAP_PROMPTS["summary"])
+
+    hashes = [
+        content_hash(doc["title"], chunk["heading"], chunk["content"], analysis_type, ANALYSIS_PROMPT_VERSION)
+        for chunk in chunks
+    ]
+
+    cached: dict[str, str] = {}
+    try:
+        rows = (
+            client.table("document_chunk_analyses")
+            .select("chunk_hash, result")
+            .in_("chunk_hash", list(set(hashes)))
+            .execute()
+        ).data or []
+        cached = {r["chunk_hash"]: r["result"] for r in rows}
+        if cached:
+            # Keeps last_used_at meaningful for evicting unused entries
+            client.table("document_chunk_analyses").update(
+                {"last_used_at": datetime.now(timezone.utc).isoformat()}
+            ).in_("chunk_hash", list(cached)).execute()
+    except Exception:
+        pass  # Cache is optional
+
+    missing = [i for i, h in enumerate(hashes) if h not in cached]
+    if missing:
+        outputs = (map_prompt | llm).batch(
+            [
+                {
+                    "title": doc["title"],
+                    "section": chunks[i]["heading"] or f"{i + 1}/{len(chunks)}",
+                    "instruction": instruction,
+                    "content": chunks[i]["content"],
+                }
+                for i in missing
+            ],
+            config={"max_concurrency": MAP_MAX_CONCURRENCY},
+        )
+        new_rows = {}
+        for i, output in zip(missing, outputs):
+            cached[hashes[i]] = output.content
+            new_rows[hashes[i]] = {
+                "chunk_hash": hashes[i],
+                "analysis_type": analysis_type,
+                "prompt_version": ANALYSIS_PROMPT_VERSION,
+                "result": output.content,
+                "model_used": "gpt-4o",
+            }
+        try:
+            client.table("document_chunk_analyses").upsert(
+                list(new_rows.values()), on_conflict="chunk_hash"
+            ).execute()
+        except Exception:
+            pass  # Ignore save errors
+
+    partials = [
+        f"### {chunk['heading'] or f'구간 {i + 1}'}\n{cached[h]}"
+        for i, (chunk, h) in enumerate(zip(chunks, hashes))
+    ]
+
+    # Reduce: merge partial results in groups until they fit a single prompt. A partial
+    # that is too large on its own is condensed alone (and capped before sending)
+    for _ in range(MAX_REDUCE_ROUNDS):
+        if len("\n\n".join(partials)) <= SINGLE_PASS_MAX_CHARS:
+            break
+        groups, group, size = [], [], 0
+        for partial in partials:
+            partial = partial[:SINGLE_PASS_MAX_CHARS]
+            if group and size + len(partial) > SINGLE_PASS_MAX_CHARS:
+                groups.append(group)
+                group, size = [], 0
+            group.append(partial)
+            size += len(partial)
+        groups.append(group)
+
+        merged = (map_prompt | llm).batch(
+            [
+                {
+                    "title": doc["title"],
+                    "section": f"구간 메모 {g + 1}/{len(groups)}",
+                    "instruction": instruction,
+                    "content": "\n\n".join(group),
+                }
+                for g, group in enumerate(groups)
+            ],
+            config={"max_concurrency": MAP_MAX_CONCURRENCY},
+        )
+        partials = [m.content for m in merged]
+
+    # Last resort if the rounds did not shrink the notes enough
+    notes = "\n\n".join(partials)[:SINGLE_PASS_MAX_CHARS]
+
+    prompt = ChatPromptTemplate.from_template(ANALYSIS_PROMPTS.get(analysis_type, ANALYSIS_PROMPTS["summary"]))
+    analysis = (prompt | llm).invoke({
+        "title": doc["title"],
+        "content": "(긴 문서를 구간별로 분석한 메모입니다)\n\n" + notes,
+        "doc_type": doc["doc_type"],
+    })
+
+    return {
+        "analysis": analysis.content,
+        "chunks": len(chunks),
+        "chunks_analyzed": len(missing),
+    }
+
+
 
 @tool
 def ai_docs_create(
@@ -32,9 +243,11 @@ def ai_docs_create(
     tags: Optional[list[str]] = None,
     source_url: Optional[str] = None,
     source_type: Optional[str] = None,
+    summarize_now: bool = False,
 ) -> str:
     """
     Create a new document in the project.
+    If no summary is given, one is generated in the background after the document is saved.
 
     Args:
         project_id: Project ID to create document in
@@ -45,6 +258,7 @@ def ai_docs_create(
         tags: Optional list of tags
         source_url: Optional source URL (e.g., YouTube URL)
         source_type: Optional source type (youtube, web, document, etc.)
+        summarize_now: Generate the summary before returning (slower; default: background)
 
     Returns:
         Created document info or error message
@@ -52,18 +266,14 @@ def ai_docs_create(
     try:
         client = get_supabase_client()
 
-        # Auto-generate summary if not provided
-        if not summary and len(content) > 200:
-            try:
-                summary_prompt = ChatPromptTemplate.from_messages([
-                    ("system", "주어진 문서의 핵심 내용을 2-3문장으로 요약해주세요. 요약만 출력하세요."),
-                    ("human", "{content}")
-                ])
-                chain = summary_prompt | llm
-                result = chain.invoke({"content": content[:3000]})
-                summary = result.content[:500]
-            except Exception:
-                summary = content[:200] + "..."
+        # Auto-generate summary if not provided: inline when requested,
+        # otherwise deferred to the background summarizer
+        summary_status = "done"
+        if not summary and needs_summary(content):
+            if summarize_now:
+                summary = summarize_content(content)
+            else:
+                summary_status = "pending"
 
         # Create document
         doc_data = {
@@ -71,6 +281,11 @@ def ai_docs_create(
             "title": title,
             "content": content,
             "summary": summary,
+            "summary_status": summary_status,
+            "summary_attempts": 0,
+            # Chunks for semantic search are embedded by the background indexer
+            "index_status": "pending",
+            "index_attempts": 0,
             "doc_type": doc_type,
             "tags": tags or [],
             "source_url": source_url,
@@ -84,6 +299,11 @@ def ai_docs_create(
 
         if result.data:
             doc = result.data[0]
+
+            if summary_status == "pending":
+                summarizer.notify()
+            indexer.notify()
+
             return json.dumps({
                 "success": True,
                 "document": {
@@ -91,6 +311,7 @@ def ai_docs_create(
                     "title": doc["title"],
                     "doc_type": doc["doc_type"],
                     "summary": doc.get("summary"),
+                    "summary_status": doc.get("summary_status"),
                     "created_at": doc["created_at"],
                 },
                 "message": f"문서 '{title}'가 성공적으로 생성되었습니다."
@@ -111,6 +332,8 @@ def ai_docs_search(
 ) -> str:
     """
     Search documents in a project by keyword.
+    Results are ranked by relevance and include a highlighted snippet.
+    Korean words match with or without particles (e.g., "회의록" and "회의록을").
 
     Args:
         project_id: Project ID to search in
@@ -119,27 +342,18 @@ def ai_docs_search(
         limit: Maximum number of results (default: 10)
 
     Returns:
-        List of matching documents
+        List of matching documents with rank and snippet
     """
     try:
         client = get_supabase_client()
 
-        # Build query
-        db_query = (
-            client.table("project_documents")
-            .select("id, title, summary, doc_type, tags, status, created_at")
-            .eq("project_id", project_id)
-            .eq("status", "published")
-        )
-
-        if doc_type:
-            db_query = db_query.eq("doc_type", doc_type)
-
-        # Text search using ilike for simple matching
-        db_query = db_query.or_(f"title.ilike.%{query}%,content.ilike.%{query}%")
-        db_query = db_query.order("created_at", desc=True).limit(limit)
-
-        result = db_query.execute()
+        # Full-text search over the search_vector index (see search_project_documents RPC)
+        result = client.rpc("search_project_documents", {
+            "p_project_id": project_id,
+            "p_query": query,
+            "p_doc_type": doc_type,
+            "p_limit": limit,
+        }).execute()
 
         if not result.data:
             return json.dumps({
@@ -195,13 +409,88 @@ def ai_docs_get(doc_id: str) -> str:
 
 
 @tool
-def ai_docs_analyze(doc_id: str, analysis_type: Literal["summary", "key_points", "action_items", "sentiment", "full"] = "summary") -> str:
+def ai_docs_get_many(
+    doc_ids: list[str],
+    fields: Optional[list[str]] = None,
+    max_content_bytes: Optional[int] = None,
+) -> str:
+    """
+    Get several documents by ID in one call.
+    Use fields to fetch only what you need (e.g., ["title", "summary"]) and
+    max_content_bytes to cap the size of each document's content.
+
+    Args:
+        doc_ids: Document IDs (max 50)
+        fields: Fields to return (default: all except metadata).
+            Available: title, summary, content, doc_type, tags, status, metadata,
+            source_url, source_type, summary_status, project_id, created_at, updated_at
+        max_content_bytes: Optional per-document content limit in UTF-8 bytes
+
+    Returns:
+        Documents in the requested order, plus ids that were not found
+    """
+    try:
+        if not doc_ids:
+            return json.dumps({"success": False, "error": "문서 ID가 필요합니다."}, ensure_ascii=False)
+        if len(doc_ids) > MAX_GET_MANY:
+            return json.dumps({"success": False, "error": f"한 번에 최대 {MAX_GET_MANY}개까지 조회할 수 있습니다."}, ensure_ascii=False)
+
+        requested = fields or DEFAULT_GET_MANY_FIELDS
+        unknown = [f for f in requested if f not in DOC_FIELDS]
+        if unknown:
+            return json.dumps({"success": False, "error": f"알 수 없는 필드: {', '.join(unknown)}"}, ensure_ascii=False)
+
+        select_fields = ["id"] + [f for f in requested if f != "id"]
+
+        client = get_supabase_client()
+        result = (
+            client.table("project_documents")
+            .select(", ".join(select_fields))
+            .in_("id", doc_ids)
+            .execute()
+        )
+
+        by_id = {doc["id"]: doc for doc in (result.data or [])}
+        documents = []
+        for doc_id in doc_ids:
+            doc = by_id.get(doc_id)
+            if not doc:
+                continue
+            if max_content_bytes is not None and doc.get("content") is not None:
+                encoded = doc["content"].encode("utf-8")
+                if len(encoded) > max_content_bytes:
+                    doc["content"] = encoded[:max_content_bytes].decode("utf-8", errors="ignore")
+                    doc["content_truncated"] = True
+                    doc["content_bytes"] = len(encoded)
+            documents.append(doc)
+
+        return json.dumps({
+            "success": True,
+            "documents": documents,
+            "count": len(documents),
+            "missing": [doc_id for doc_id in doc_ids if doc_id not in by_id],
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({"success": False, "error": f"문서 조회 오류: {str(e)}"}, ensure_ascii=False)
+
+
+@tool
+def ai_docs_analyze(
+    doc_id: str,
+    analysis_type: Literal["summary", "key_points", "action_items", "sentiment", "full"] = "summary",
+    force_refresh: bool = False,
+) -> str:
     """
     Analyze a document using AI.
+    Long documents are analyzed section by section and the results combined,
+    so the whole document is covered. A stored result is returned (cached: true)
+    when the document has not changed since the last identical analysis.
 
     Args:
         doc_id: Document ID to analyze
         analysis_type: Type of analysis (summary, key_points, action_items, sentiment, full)
+        force_refresh: Ignore stored results and re-run the analysis
 
     Returns:
         AI analysis results
@@ -222,68 +511,72 @@ def ai_docs_analyze(doc_id: str, analysis_type: Literal["summary", "key_points",
             return json.dumps({"success": False, "error": "문서를 찾을 수 없습니다."}, ensure_ascii=False)
 
         doc = result.data
-        content = doc["content"][:8000]  # Limit content for analysis
-
-        # Build analysis prompt based on type
-        prompts = {
-            "summary": """다음 문서를 3-5문장으로 핵심 내용을 요약해주세요.
-
-문서 제목: {title}
-문서 내용:
-{content}
-
-요약:""",
-            "key_points": """다음 문서에서 핵심 포인트를 5-7개 추출해주세요. 불릿 포인트로 정리해주세요.
-
-문서 제목: {title}
-문서 내용:
-{content}
-
-핵심 포인트:""",
-            "action_items": """다음 문서에서 필요한 액션 아이템(할 일)을 추출해주세요. 우선순위와 함께 정리해주세요.
-
-문서 제목: {title}
-문서 내용:
-{content}
-
-액션 아이템:""",
-            "sentiment": """다음 문서의 전반적인 톤과 감정을 분석해주세요. (긍정/부정/중립, 긴급성, 중요도 등)
-
-문서 제목: {title}
-문서 내용:
-{content}
-
-분석:""",
-            "full": """다음 문서를 종합적으로 분석해주세요:
-1. 핵심 요약 (3-5문장)
-2. 주요 포인트 (5-7개)
-3. 액션 아이템 (있다면)
-4. 톤/감정 분석
-5. 추가 인사이트
-
-문서 제목: {title}
-문서 유형: {doc_type}
-문서 내용:
-{content}
-
-분석 결과:""",
-        }
-
-        prompt = ChatPromptTemplate.from_template(prompts.get(analysis_type, prompts["summary"]))
-        chain = prompt | llm
-
-        analysis = chain.invoke({
-            "title": doc["title"],
-            "content": content,
-            "doc_type": doc["doc_type"],
-        })
+        doc_hash = content_hash(doc["title"], doc["content"], doc["doc_type"])
+
+        if not force_refresh:
+            cached = (
+                client.table("document_analyses")
+                .select("analysis, metadata, created_at")
+                .eq("document_id", doc_id)
+                .eq("content_hash", doc_hash)
+                .eq("analysis_type", analysis_type)
+                .eq("prompt_version", ANALYSIS_PROMPT_VERSION)
+                .limit(1)
+                .execute()
+            )
+            if cached.data:
+                analysis_cache_counter.hit()
+                return json.dumps({
+                    "success": True,
+                    "document_id": doc_id,
+                    "document_title": doc["title"],
+                    "analysis_type": analysis_type,
+                    "analysis": cached.data[0]["analysis"],
+                    **(cached.data[0].get("metadata") or {}),
+                    "cached": True,
+                    "analyzed_at": cached.data[0]["created_at"],
+                }, ensure_ascii=False)
+
+        analysis_cache_counter.miss()
+
+        if len(doc["content"]) > SINGLE_PASS_MAX_CHARS:
+            mapped = _map_reduce_analysis(doc, analysis_type)
+            analysis_text = mapped["analysis"]
+            metadata = {"chunks": mapped["chunks"], "chunks_analyzed": mapped["chunks_analyzed"]}
+        else:
+            prompt = ChatPromptTemplate.from_template(ANALYSIS_PROMPTS.get(analysis_type, ANALYSIS_PROMPTS["summary"]))
+            chain = prompt | llm
+
+            analysis = chain.invoke({
+                "title": doc["title"],
+                "content": doc["content"],
+                "doc_type": doc["doc_type"],
+            })
+            analysis_text = analysis.content
+            metadata = {}
+
+        # Save analysis result
+        try:
+            client.table("document_analyses").upsert({
+                "document_id": doc_id,
+                "content_hash": doc_hash,
+                "analysis_type": analysis_type,
+                "prompt_version": ANALYSIS_PROMPT_VERSION,
+                "analysis": analysis_text,
+                "metadata": metadata,
+                "model_used": "gpt-4o",
+            }, on_conflict="document_id,content_hash,analysis_type,prompt_version").execute()
+        except Exception:
+            pass  # Ignore save errors
 
         return json.dumps({
             "success": True,
             "document_id": doc_id,
             "document_title": doc["title"],
             "analysis_type": analysis_type,
-            "analysis": analysis.content,
+            "analysis": analysis_text,
+            **metadata,
+            "cached": False,
         }, ensure_ascii=False)
 
     except Exception as e:
@@ -324,6 +617,13 @@ def ai_docs_update(
             update_data["content"] = content
         if summary is not None:
             update_data["summary"] = summary
+        elif content is not None and needs_summary(content):
+            # Existing summary is stale; let the background summarizer refresh it
+            update_data["summary_status"] = "pending"
+            update_data["summary_attempts"] = 0
+        if title is not None or content is not None:
+            update_data["index_status"] = "pending"
+            update_data["index_attempts"] = 0
         if tags is not None:
             update_data["tags"] = tags
         if status is not None:
@@ -340,10 +640,22 @@ def ai_docs_update(
         )
 
         if result.data:
+            if update_data.get("summary_status") == "pending":
+                summarizer.notify()
+
+            if content is not None or title is not None:
+                # Analyses of the previous version can never be hit again
+                try:
+                    client.table("document_analyses").delete().eq("document_id", doc_id).execute()
+                except Exception:
+                    pass  # Ignore cleanup errors
+
+                indexer.notify()
+
             return json.dumps({
                 "success": True,
                 "message": "문서가 업데이트되었습니다.",
-                "updated_fields": list(update_data.keys()),
+                "updated_fields": [k for k in update_data if k not in _STATUS_FIELDS],
             }, ensure_ascii=False)
 
         return json.dumps({"success": False, "error": "업데이트 실패"}, ensure_ascii=False)
@@ -358,17 +670,17 @@ def ai_docs_list(
     doc_type: Optional[str] = None,
     status: Optional[str] = None,
     limit: int = 20,
-    offset: int = 0,
+    cursor: Optional[str] = None,
 ) -> str:
     """
-    List documents in a project.
+    List documents in a project (newest first).
 
     Args:
         project_id: Project ID
         doc_type: Filter by document type (optional)
         status: Filter by status (optional)
         limit: Number of results (default: 20)
-        offset: Pagination offset (default: 0)
+        cursor: Cursor from a previous call's next_cursor to fetch the next page
 
     Returns:
         List of documents
@@ -387,15 +699,17 @@ def ai_docs_list(
         if status:
             query = query.eq("status", status)
 
-        query = query.order("created_at", desc=True).range(offset, offset + limit - 1)
+        query = apply_keyset(query, "created_at", cursor, limit)
         result = query.execute()
 
+        documents, next_cursor = page_result(result.data or [], "created_at", limit)
+
         return json.dumps({
             "success": True,
-            "documents": result.data or [],
-            "count": len(result.data or []),
-            "offset": offset,
+            "documents": documents,
+            "count": len(documents),
             "limit": limit,
+            "next_cursor": next_cursor,
         }, ensure_ascii=False)
 
     except Exception as e:
@@ -436,11 +750,61 @@ def ai_docs_delete(doc_id: str) -> str:
         return json.dumps({"success": False, "error": f"삭제 오류: {str(e)}"}, ensure_ascii=False)
 
 
+@tool
+def ai_docs_semantic_search(
+    project_id: str,
+    query: str,
+    limit: int = 8,
+) -> str:
+    """
+    Find the most relevant passages across a project's documents by meaning.
+    Combines vector similarity and keyword matching, and returns document
+    chunks (not whole documents) so only the relevant text is loaded.
+
+    Args:
+        project_id: Project ID to search in
+        query: Natural language question or topic
+        limit: Maximum number of chunks to return (default: 8)
+
+    Returns:
+        Matching chunks with document id/title, section heading and score
+    """
+    try:
+        chunks = search_chunks(project_id, query, limit=limit)
+
+        return json.dumps({
+            "success": True,
+            "query": query,
+            "chunks": [
+                {
+                    "document_id": c["document_id"],
+                    "document_title": c["document_title"],
+                    "chunk_index": c["chunk_index"],
+                    "heading": c.get("heading"),
+                    "content": c["content"],
+                    "similarity": round(c["similarity"], 4) if c.get("similarity") is not None else None,
+                    "score": c["score"],
+                }
+                for c in chunks
+            ],
+            "count": len(chunks),
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({"success": False, "error": f"시맨틱 검색 오류: {str(e)}"}, ensure_ascii=False)
+
+
 # Register all tools
-register_tool(ai_docs_create)
+register_tool(ai_docs_create, invalidates=lambda a: ["docs:list"])
 register_tool(ai_docs_search)
-register_tool(ai_docs_get)
+register_tool(ai_docs_get, cache_ttl=READ_CACHE_TTL, cache_tags=lambda a: [f"doc:{a['doc_id']}"])
+register_tool(
+    ai_docs_get_many,
+    cache_ttl=READ_CACHE_TTL,
+    cache_tags=lambda a: [f"doc:{doc_id}" for doc_id in a["doc_ids"]],
+)
 register_tool(ai_docs_analyze)
-register_tool(ai_docs_update)
-register_tool(ai_docs_list)
-register_tool(ai_docs_delete)
+register_tool(ai_docs_update, invalidates=lambda a: [f"doc:{a['doc_id']}", "docs:list"])
+register_tool(ai_docs_list, cache_ttl=READ_CACHE_TTL, cache_tags=lambda a: ["docs:list"])
+register_tool(ai_docs_delete, invalidates=lambda a: [f"doc:{a['doc_id']}", "docs:list"])
+register_tool(ai_docs_semantic_search)
@@ -7,12 +7,17 @@ from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from typing import Literal, Optional, Any
 import json
+import os
 import statistics
 from datetime import datetime
+from urllib.parse import urlparse
 
 from config import get_settings
 from .registry import register_tool
 from utils.supabase import get_supabase_client
+from utils.pagination import apply_keyset, page_result
+from utils.hashing import content_hash
+from .sheet_import import download_to_tempfile, import_sheet_file
 
 settings = get_settings()
 
@@ -23,6 +28,11 @@ llm = ChatOpenAI(
     api_key=settings.openai_api_key,
 )
 
+# Bump when the analysis prompts change so cached sheet_analyses are not reused
+ANALYSIS_PROMPT_VERSION = "v1"
+# Seconds ai_sheet_get/list results are reused (web app edits bypass invalidation)
+READ_CACHE_TTL = 60
+
 
 def _extract_column_values(rows: list[dict], column_id: str) -> list[Any]:
     """Extract values from a specific column"""
@@ -254,14 +264,17 @@ def ai_sheet_analyze(
     sheet_id: str,
     analysis_type: Literal["summary", "statistics", "trends", "anomalies", "correlation"] = "summary",
     column_ids: Optional[list[str]] = None,
+    force_refresh: bool = False,
 ) -> str:
     """
     Analyze spreadsheet data using AI.
+    A stored analysis is returned (cached: true) when the analyzed data has not changed.
 
     Args:
         sheet_id: Sheet ID to analyze
         analysis_type: Type of analysis (summary, statistics, trends, anomalies, correlation)
         column_ids: Optional specific columns to analyze (default: all)
+        force_refresh: Ignore stored analyses and re-run the AI analysis
 
     Returns:
         AI analysis results
@@ -289,6 +302,40 @@ def ai_sheet_analyze(
         if column_ids:
             columns = [c for c in columns if c["id"] in column_ids]
 
+        # Cache key over exactly what the analysis sees
+        analysis_hash = content_hash(
+            sheet["name"],
+            [{k: c.get(k) for k in ("id", "name", "type")} for c in columns],
+            [[row.get(c["id"]) for c in columns] for row in rows],
+            analysis_type,
+            sorted(column_ids or []),
+            ANALYSIS_PROMPT_VERSION,
+        )
+
+        if not force_refresh:
+            cached = (
+                client.table("sheet_analyses")
+                .select("results, created_at")
+                .eq("sheet_id", sheet_id)
+                .eq("analysis_type", analysis_type)
+                .eq("content_hash", analysis_hash)
+                .order("created_at", desc=True)
+                .limit(1)
+                .execute()
+            )
+            if cached.data:
+                results = cached.data[0]["results"]
+                return json.dumps({
+                    "success": True,
+                    "sheet_name": sheet["name"],
+                    "analysis_type": analysis_type,
+                    "row_count": len(rows),
+                    "statistics": results.get("statistics"),
+                    "analysis": results.get("analysis"),
+                    "cached": True,
+                    "analyzed_at": cached.data[0]["created_at"],
+                }, ensure_ascii=False, default=str)
+
         # Basic statistics for numeric columns
         stats_by_column = {}
         for col in columns:
@@ -421,6 +468,8 @@ def ai_sheet_analyze(
                     "statistics": stats_by_column,
                 },
                 "model_used": "gpt-4o",
+                "content_hash": analysis_hash,
+                "prompt_version": ANALYSIS_PROMPT_VERSION,
             }).execute()
         except Exception:
             pass  # Ignore save errors
@@ -432,6 +481,7 @@ def ai_sheet_analyze(
             "row_count": len(rows),
             "statistics": stats_by_column,
             "analysis": analysis.content,
+            "cached": False,
         }, ensure_ascii=False, default=str)
 
     except Exception as e:
@@ -573,57 +623,111 @@ def ai_sheet_add_column(
 
 
 @tool
-def ai_sheet_list(team_id: str, include_archived: bool = False) -> str:
+def ai_sheet_list(
+    team_id: str,
+    include_archived: bool = False,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> str:
     """
     List all spreadsheets for a team.
 
     Args:
         team_id: Team ID
         include_archived: Include archived sheets
+        limit: Number of results per page (default: 50)
+        cursor: Cursor from a previous call's next_cursor to fetch the next page
 
     Returns:
-        List of sheets
+        List of sheets with row/column counts
     """
     try:
         client = get_supabase_client()
 
         query = (
             client.table("sheets")
-            .select("id, name, description, created_at, updated_at, is_archived")
+            .select("id, name, description, created_at, updated_at, is_archived, row_count, column_count")
             .eq("team_id", team_id)
         )
 
         if not include_archived:
             query = query.eq("is_archived", False)
 
-        query = query.order("updated_at", desc=True)
+        query = apply_keyset(query, "updated_at", cursor, limit)
         result = query.execute()
 
-        # Add row/column counts
-        sheets = []
-        for sheet in (result.data or []):
-            sheet_detail = client.table("sheets").select("columns, rows").eq("id", sheet["id"]).single().execute()
-            if sheet_detail.data:
-                sheet["column_count"] = len(sheet_detail.data.get("columns", []))
-                sheet["row_count"] = len(sheet_detail.data.get("rows", []))
-            sheets.append(sheet)
+        sheets, next_cursor = page_result(result.data or [], "updated_at", limit)
 
         return json.dumps({
             "success": True,
             "sheets": sheets,
             "count": len(sheets),
+            "next_cursor": next_cursor,
         }, ensure_ascii=False)
 
     except Exception as e:
         return json.dumps({"success": False, "error": f"목록 조회 오류: {str(e)}"}, ensure_ascii=False)
 
 
+@tool
+def ai_sheet_import(
+    team_id: str,
+    file_url: str,
+    name: Optional[str] = None,
+    description: Optional[str] = None,
+    project_id: Optional[str] = None,
+) -> str:
+    """
+    Import a CSV or XLSX file into a new spreadsheet.
+    Column types are inferred from the data and rows are written in batches,
+    so large files can be imported without passing rows through tool arguments.
+
+    Args:
+        team_id: Team ID
+        file_url: Public http(s) URL of the CSV/XLSX file, up to 50MB (e.g., Supabase Storage public or signed URL)
+        name: Sheet name (default: file name)
+        description: Optional description
+        project_id: Optional project ID to link
+
+    Returns:
+        Created sheet info with imported row count
+    """
+    path = None
+    try:
+        filename = os.path.basename(urlparse(file_url).path) or "import.csv"
+
+        path = download_to_tempfile(file_url, os.path.splitext(filename)[1])
+
+        sheet = None
+        done = None
+        for event in import_sheet_file(path, filename, team_id, name, description, project_id):
+            if event["type"] == "sheet_created":
+                sheet = event["sheet"]
+            elif event["type"] == "done":
+                done = event
+
+        return json.dumps({
+            "success": True,
+            "sheet": sheet,
+            "rows_imported": done["rows_imported"] if done else 0,
+            "message": f"시트 '{sheet['name']}'에 {done['rows_imported'] if done else 0}개 행을 가져왔습니다."
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({"success": False, "error": f"가져오기 오류: {str(e)}"}, ensure_ascii=False)
+
+    finally:
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
 # Register all tools
-register_tool(ai_sheet_create)
-register_tool(ai_sheet_get)
-register_tool(ai_sheet_add_rows)
-register_tool(ai_sheet_update_cell)
+register_tool(ai_sheet_create, invalidates=lambda a: ["sheets:list"])
+register_tool(ai_sheet_get, cache_ttl=READ_CACHE_TTL, cache_tags=lambda a: [f"sheet:{a['sheet_id']}"])
+register_tool(ai_sheet_add_rows, invalidates=lambda a: [f"sheet:{a['sheet_id']}", "sheets:list"])
+register_tool(ai_sheet_update_cell, invalidates=lambda a: [f"sheet:{a['sheet_id']}", "sheets:list"])
 register_tool(ai_sheet_analyze)
 register_tool(ai_sheet_query)
-register_tool(ai_sheet_add_column)
-register_tool(ai_sheet_list)
+register_tool(ai_sheet_add_column, invalidates=lambda a: [f"sheet:{a['sheet_id']}", "sheets:list"])
+register_tool(ai_sheet_list, cache_ttl=READ_CACHE_TTL, cache_tags=lambda a: ["sheets:list"])
+register_tool(ai_sheet_import, invalidates=lambda a: ["sheets:list"])
@@ -1,7 +1,50 @@
+from functools import lru_cache
+from typing import Optional
+import ast
+import json
 import math
+import time
+
+import numpy as np
 from langchain_core.tools import tool
 
 from .registry import register_tool
+from utils.supabase import get_supabase_client
+
+# Batch mode limits
+MAX_ELEMENTS = 100_000
+MAX_EXPRESSION_CHARS = 500
+MAX_AST_NODES = 200
+# Element operations per call (operations in the expression x elements per variable)
+MAX_ELEMENT_OPS = 10_000_000
+
+# Vectorized equivalents of the calculator_tool functions.
+# Every function is elementwise or a reduction, so no intermediate array is larger than the inputs
+_BATCH_FUNCTIONS = {
+    "abs": np.abs,
+    "round": lambda a, decimals=0: np.round(a, int(decimals)),
+    "min": np.minimum,
+    "max": np.maximum,
+    "pow": np.power,
+    "sqrt": np.sqrt,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "log": np.log,
+    "log10": np.log10,
+    "exp": np.exp,
+    "where": np.where,
+    "sum": np.sum,
+    "mean": np.mean,
+}
+_BATCH_CONSTANTS = {"pi": math.pi, "e": math.e}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.UAdd, ast.USub,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+)
+_OPERATION_NODES = (ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call)
 
 
 @tool
@@ -43,5 +86,165 @@ def calculator_tool(expression: str) -> str:
         return f"Calculation error: {str(e)}"
 
 
+@lru_cache(maxsize=256)
+def _compile_batch(expression: str) -> tuple:
+    """
+    Validate an expression against the arithmetic whitelist and compile it once.
+
+    Returns:
+        (code object, variable names used by the expression, number of array operations)
+    """
+    if len(expression) > MAX_EXPRESSION_CHARS:
+        raise ValueError(f"수식이 너무 깁니다 (최대 {MAX_EXPRESSION_CHARS}자)")
+
+    tree = ast.parse(expression, mode="eval")
+    nodes = list(ast.walk(tree))
+    if len(nodes) > MAX_AST_NODES:
+        raise ValueError("수식이 너무 복잡합니다")
+
+    variables = []
+    for node in nodes:
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"허용되지 않는 구문입니다: {type(node).__name__}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise ValueError("숫자 상수만 사용할 수 있습니다")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in _BATCH_FUNCTIONS or node.keywords:
+                raise ValueError("허용되지 않는 함수 호출입니다")
+        elif isinstance(node, ast.Name) and node.id not in _BATCH_FUNCTIONS and node.id not in _BATCH_CONSTANTS:
+            if node.id not in variables:
+                variables.append(node.id)
+
+    # Float constants keep arithmetic in fixed-size floats (no unbounded int ** int)
+    for node in nodes:
+        if isinstance(node, ast.Constant):
+            node.value = float(node.value)
+
+    operations = sum(isinstance(node, _OPERATION_NODES) for node in nodes)
+    return compile(tree, "<calculator_batch>", "eval"), tuple(variables), operations
+
+
+def _to_array(name: str, values: list) -> np.ndarray:
+    """Convert raw values (numbers, numeric strings, blanks) into a float array"""
+    converted = []
+    for i, value in enumerate(values):
+        if value is None or (isinstance(value, str) and not value.strip()):
+            converted.append(math.nan)
+        elif isinstance(value, bool):
+            converted.append(float(value))
+        elif isinstance(value, (int, float)):
+            converted.append(value)
+        else:
+            try:
+                converted.append(float(str(value).replace(",", "").strip()))
+            except ValueError:
+                raise ValueError(f"{name}[{i}] 값이 숫자가 아닙니다: {value!r}")
+    return np.asarray(converted, dtype=float)
+
+
+def _sheet_columns(sheet_id: str, names: tuple) -> dict[str, list]:
+    """Column values of a sheet for the given column names or ids"""
+    client = get_supabase_client()
+    sheet = (
+        client.table("sheets")
+        .select("columns, rows")
+        .eq("id", sheet_id)
+        .single()
+        .execute()
+    ).data
+    if not sheet:
+        raise ValueError("시트를 찾을 수 없습니다.")
+
+    by_name = {}
+    for col in sheet.get("columns", []):
+        by_name[col["id"]] = col["id"]
+        by_name[col["name"]] = col["id"]
+
+    rows = sheet.get("rows", [])
+    return {
+        name: [row.get(by_name[name]) for row in rows]
+        for name in names
+        if name in by_name
+    }
+
+
+def _evaluate_batch(code, variables: tuple, arrays: dict[str, np.ndarray]) -> np.ndarray:
+    namespace = {"__builtins__": {}, **_BATCH_FUNCTIONS, **_BATCH_CONSTANTS}
+    namespace.update({name: arrays[name] for name in variables})
+    with np.errstate(all="ignore"):
+        return np.asarray(eval(code, namespace), dtype=float)
+
+
+@tool
+def calculator_batch(
+    expression: str,
+    values: Optional[list] = None,
+    variables: Optional[dict[str, list]] = None,
+    sheet_id: Optional[str] = None,
+) -> str:
+    """
+    Evaluate one expression over many values at once (e.g. a formula for every row of a sheet).
+    Use this instead of calling calculator_tool in a loop.
+
+    Args:
+        expression: Arithmetic expression, e.g. "(price - cost) / price * 100" or "round(x * 1.1, 2)".
+            Functions: abs, round, min, max, pow, sqrt, sin, cos, tan, log, log10, exp,
+            where(cond, a, b), sum, mean. Constants: pi, e
+        values: List of numbers bound to the variable `x`
+        variables: Named lists of numbers, e.g. {"price": [...], "cost": [...]}
+        sheet_id: Sheet whose columns (by name or column id) are used as variables
+
+    Returns:
+        One result per element (null where the result is not a finite number)
+    """
+    try:
+        started = time.perf_counter()
+        code, names, operations = _compile_batch(expression)
+
+        raw: dict[str, list] = {}
+        if sheet_id:
+            raw.update(_sheet_columns(sheet_id, names))
+        if variables:
+            raw.update(variables)
+        if values is not None:
+            raw["x"] = values
+
+        missing = [name for name in names if name not in raw]
+        if missing:
+            return json.dumps({"success": False, "error": f"값이 없는 변수: {', '.join(missing)}"}, ensure_ascii=False)
+
+        if sum(len(raw[name]) for name in names) > MAX_ELEMENTS:
+            return json.dumps({"success": False, "error": f"입력 값이 너무 많습니다 (최대 {MAX_ELEMENTS}개)"}, ensure_ascii=False)
+        if len({len(raw[name]) for name in names}) > 1:
+            return json.dumps({"success": False, "error": "변수 길이가 서로 다릅니다"}, ensure_ascii=False)
+
+        # Intermediates never outgrow the inputs, so the work is bounded before anything is evaluated
+        # (a thread timeout would only stop waiting while the evaluation kept running)
+        length = max((len(raw[name]) for name in names), default=1)
+        if operations * length > MAX_ELEMENT_OPS:
+            return json.dumps({"success": False, "error": "계산량이 너무 많습니다 (수식을 줄이거나 값을 나눠 주세요)"}, ensure_ascii=False)
+
+        arrays = {name: _to_array(name, raw[name]) for name in names}
+        result = _evaluate_batch(code, names, arrays)
+        if result.size > length:
+            return json.dumps({"success": False, "error": "결과 크기가 입력보다 큽니다"}, ensure_ascii=False)
+
+        results = [float(v) if np.isfinite(v) else None for v in np.atleast_1d(result)]
+        if not arrays:
+            results = results[:1]
+
+        return json.dumps({
+            "success": True,
+            "expression": expression,
+            "results": results,
+            "count": len(results),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({"success": False, "error": f"계산 오류: {str(e)}"}, ensure_ascii=False)
+
+
 # Register the tool
 register_tool(calculator_tool)
+register_tool(calculator_batch)
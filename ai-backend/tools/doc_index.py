@@ -0,0 +1,374 @@
+"""
+Document Index - 문서 청크 분할 및 임베딩 인덱스
+project_document_chunks 테이블 연동 (변경된 청크만 재임베딩)
+index_status = 'pending' 인 문서는 백그라운드 인덱서가 배치로 임베딩 (실패 시 백오프 후 재시도)
+"""
+from typing import Optional
+import asyncio
+import re
+import time
+
+from langchain_openai import OpenAIEmbeddings
+
+from config import get_settings
+from utils.supabase import get_async_client, get_supabase_client
+from utils.hashing import content_hash
+
+settings = get_settings()
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+# Texts per embeddings API request during ingest
+EMBEDDING_BATCH_SIZE = 100
+# Target chunk size in characters
+CHUNK_MAX_CHARS = 1500
+# Documents claimed per indexer pass, attempts before a document stays failed,
+# and seconds between polls when nobody calls notify()
+INDEX_BATCH_SIZE = 20
+INDEX_MAX_ATTEMPTS = 5
+INDEX_POLL_INTERVAL = 5.0
+
+embeddings = OpenAIEmbeddings(
+    model=EMBEDDING_MODEL,
+    api_key=settings.openai_api_key,
+    chunk_size=EMBEDDING_BATCH_SIZE,
+)
+
+_HEADING_RE = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$")
+_SENTENCE_RE = re.compile(r"(?<=[.!?。])\s+|\n")
+
+
+def _split_long_paragraph(paragraph: str, max_chars: int) -> list[str]:
+    """Split an oversized paragraph on sentence boundaries, hard-cutting as a last resort"""
+    pieces = []
+    current = ""
+    for sentence in _SENTENCE_RE.split(paragraph):
+        if not sentence:
+            continue
+        while len(sentence) > max_chars:
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_document(content: str, max_chars: int = CHUNK_MAX_CHARS) -> list[dict]:
+    """
+    Split document content on structure (markdown headings, then paragraphs).
+
+    Paragraphs under the same heading are packed into chunks of up to
+    max_chars; a heading always starts a new chunk.
+
+    Returns:
+        [{"heading": str | None, "content": str}, ...]
+    """
+    chunks: list[dict] = []
+    heading: Optional[str] = None
+    buffer: list[str] = []
+    size = 0
+
+    def flush():
+        nonlocal buffer, size
+        if buffer:
+            chunks.append({"heading": heading, "content": "\n\n".join(buffer)})
+        buffer = []
+        size = 0
+
+    for block in re.split(r"\n\s*\n", content or ""):
+        block = block.strip()
+        if not block:
+            continue
+
+        lines = block.split("\n")
+        match = _HEADING_RE.match(lines[0])
+        if match:
+            flush()
+            heading = match.group(1)
+            block = "\n".join(lines[1:]).strip()
+            if not block:
+                continue
+
+        paragraphs = [block] if len(block) <= max_chars else _split_long_paragraph(block, max_chars)
+        for paragraph in paragraphs:
+            if size and size + len(paragraph) > max_chars:
+                flush()
+            buffer.append(paragraph)
+            size += len(paragraph) + 2
+
+    flush()
+    return chunks
+
+
+def _chunk_text(doc: dict, chunk: dict) -> str:
+    """Text sent to the embedding model (title and heading give the chunk context)"""
+    prefix = doc.get("title") or ""
+    if chunk["heading"]:
+        prefix = f"{prefix} > {chunk['heading']}" if prefix else chunk["heading"]
+    return f"{prefix}\n{chunk['content']}" if prefix else chunk["content"]
+
+
+def index_documents(doc_ids: list[str]) -> dict:
+    """
+    (Re)build chunk embeddings for the given documents.
+
+    Chunks are keyed by (document_id, content_hash): unchanged chunks keep
+    their stored embedding, new chunks are embedded in batches of
+    EMBEDDING_BATCH_SIZE across all documents, and chunks that no longer
+    exist are deleted.
+
+    Returns:
+        {"documents": n, "chunks": n, "embedded": n, "reused": n, "deleted": n}
+    """
+    client = get_supabase_client()
+    stats = {"documents": 0, "chunks": 0, "embedded": 0, "reused": 0, "deleted": 0}
+    if not doc_ids:
+        return stats
+
+    docs = (
+        client.table("project_documents")
+        .select("id, project_id, title, content")
+        .in_("id", doc_ids)
+        .execute()
+    ).data or []
+
+    existing = (
+        client.table("project_document_chunks")
+        .select("id, document_id, content_hash, chunk_index")
+        .in_("document_id", [d["id"] for d in docs])
+        .execute()
+    ).data or []
+    existing_by_key = {(c["document_id"], c["content_hash"]): c for c in existing}
+
+    to_embed: list[dict] = []
+    to_reindex: list[dict] = []
+    keep_ids: set[str] = set()
+
+    for doc in docs:
+        seen: set[str] = set()
+        for index, chunk in enumerate(split_document(doc.get("content") or "")):
+            text = _chunk_text(doc, chunk)
+            chunk_hash = content_hash(text, EMBEDDING_MODEL)
+            if chunk_hash in seen:
+                continue
+            seen.add(chunk_hash)
+
+            row = {
+                "document_id": doc["id"],
+                "project_id": doc["project_id"],
+                "chunk_index": index,
+                "heading": chunk["heading"],
+                "content": chunk["content"],
+                "content_hash": chunk_hash,
+            }
+
+            stored = existing_by_key.get((doc["id"], chunk_hash))
+            if stored:
+                keep_ids.add(stored["id"])
+                if stored["chunk_index"] != index:
+                    to_reindex.append({"id": stored["id"], "chunk_index": index})
+                stats["reused"] += 1
+            else:
+                to_embed.append({**row, "_text": text})
+
+        stats["documents"] += 1
+        stats["chunks"] += len(seen)
+
+    # Batched embedding of new/changed chunks only
+    for start in range(0, len(to_embed), EMBEDDING_BATCH_SIZE):
+        batch = to_embed[start:start + EMBEDDING_BATCH_SIZE]
+        vectors = embeddings.embed_documents([row.pop("_text") for row in batch])
+        for row, vector in zip(batch, vectors):
+            row["embedding"] = vector
+            row["embedding_model"] = EMBEDDING_MODEL
+        client.table("project_document_chunks").upsert(
+            batch, on_conflict="document_id,content_hash"
+        ).execute()
+        stats["embedded"] += len(batch)
+
+    for row in to_reindex:
+        client.table("project_document_chunks").update(
+            {"chunk_index": row["chunk_index"]}
+        ).eq("id", row["id"]).execute()
+
+    stale_ids = [c["id"] for c in existing if c["id"] not in keep_ids]
+    if stale_ids:
+        client.table("project_document_chunks").delete().in_("id", stale_ids).execute()
+        stats["deleted"] = len(stale_ids)
+
+    return stats
+
+
+def index_project_documents(project_id: str, batch_size: int = 50) -> dict:
+    """
+    Index every document of a project (backfill).
+
+    Drafts are indexed like on create/update; search only returns chunks
+    of published documents.
+    """
+    client = get_supabase_client()
+    totals = {"documents": 0, "chunks": 0, "embedded": 0, "reused": 0, "deleted": 0}
+
+    offset = 0
+    while True:
+        page = (
+            client.table("project_documents")
+            .select("id")
+            .eq("project_id", project_id)
+            .order("id")
+            .range(offset, offset + batch_size - 1)
+            .execute()
+        ).data or []
+        if not page:
+            break
+
+        stats = index_documents([d["id"] for d in page])
+        for key in totals:
+            totals[key] += stats[key]
+        offset += batch_size
+
+    return totals
+
+
+class DocumentIndexer:
+    """
+    Background worker that builds chunk embeddings for pending documents.
+
+    Runs on the FastAPI event loop (started from main.lifespan). Each pass
+    claims up to INDEX_BATCH_SIZE documents via the
+    claim_pending_document_index RPC and indexes them together in a worker
+    thread; if the batch fails, documents are retried one by one so a
+    single bad document does not fail the others. Failed documents are
+    reclaimed with exponential backoff until INDEX_MAX_ATTEMPTS.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._stats = {
+            "batches": 0,
+            "documents": 0,
+            "failed": 0,
+            "embedded": 0,
+            "reused": 0,
+            "last_batch_seconds": 0.0,
+        }
+
+    def start(self) -> None:
+        if self._task:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def notify(self) -> None:
+        """Wake the worker early; safe to call from tool threads"""
+        if self._loop and self._wake:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def stats(self) -> dict:
+        return {**self._stats, "running": self._task is not None}
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await self.process_batch()
+            except Exception as e:
+                print(f"[DocumentIndexer] batch error: {e}")
+                processed = 0
+
+            # Keep draining while there is a backlog
+            if processed >= INDEX_BATCH_SIZE:
+                continue
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=INDEX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def process_batch(self) -> int:
+        client = get_async_client()
+        claimed = await client.rpc("claim_pending_document_index", {
+            "p_limit": INDEX_BATCH_SIZE,
+            "p_max_attempts": INDEX_MAX_ATTEMPTS,
+        }).execute()
+        doc_ids = [row["id"] for row in claimed.data or []]
+        if not doc_ids:
+            return 0
+
+        started = time.perf_counter()
+        done: list[str] = []
+        failed: list[str] = []
+        try:
+            stats = await asyncio.to_thread(index_documents, doc_ids)
+            done = doc_ids
+        except Exception as e:
+            print(f"[DocumentIndexer] batch of {len(doc_ids)} failed, retrying one by one: {e}")
+            stats = {"embedded": 0, "reused": 0}
+            for doc_id in doc_ids:
+                try:
+                    doc_stats = await asyncio.to_thread(index_documents, [doc_id])
+                    stats["embedded"] += doc_stats["embedded"]
+                    stats["reused"] += doc_stats["reused"]
+                    done.append(doc_id)
+                except Exception as doc_error:
+                    print(f"[DocumentIndexer] document {doc_id} failed: {doc_error}")
+                    failed.append(doc_id)
+
+        # Only documents still processing: an edit during indexing re-queued the document
+        outcomes = (
+            ({"index_status": "done", "index_attempts": 0}, done),
+            ({"index_status": "failed"}, failed),
+        )
+        for update, ids in outcomes:
+            if ids:
+                await (
+                    client.table("project_documents")
+                    .update(update)
+                    .in_("id", ids)
+                    .eq("index_status", "processing")
+                    .execute()
+                )
+
+        self._stats["batches"] += 1
+        self._stats["documents"] += len(done)
+        self._stats["failed"] += len(failed)
+        self._stats["embedded"] += stats["embedded"]
+        self._stats["reused"] += stats["reused"]
+        self._stats["last_batch_seconds"] = round(time.perf_counter() - started, 3)
+        return len(doc_ids)
+
+
+indexer = DocumentIndexer()
+
+
+def search_chunks(project_id: str, query: str, limit: int = 8, vector_weight: float = 0.7) -> list[dict]:
+    """Hybrid (vector + keyword) chunk retrieval via match_project_document_chunks"""
+    client = get_supabase_client()
+    query_embedding = embeddings.embed_query(query)
+
+    result = client.rpc("match_project_document_chunks", {
+        "p_project_id": project_id,
+        "p_query_embedding": query_embedding,
+        "p_query": query,
+        "p_match_count": limit,
+        "p_vector_weight": vector_weight,
+    }).execute()
+
+    return result.data or []
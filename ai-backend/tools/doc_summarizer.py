@@ -0,0 +1,180 @@
+"""
+Document Summarizer - 문서 자동 요약 백그라운드 워커
+summary_status = 'pending' 인 project_documents 를 배치로 요약 (실패한 문서는 백오프 후 재시도)
+"""
+from langchain_openai import ChatOpenAI
+from langchain_core.prompts import ChatPromptTemplate
+import asyncio
+import time
+
+from config import get_settings
+from utils.supabase import get_async_client
+from .registry import invalidate_cache
+
+settings = get_settings()
+
+# Documents claimed per batch and parallel LLM calls per batch
+BATCH_SIZE = 20
+# Attempts before a failed document is left without a summary
+MAX_ATTEMPTS = 5
+MAX_CONCURRENCY = 5
+# Seconds between polls when nobody calls notify()
+POLL_INTERVAL = 5.0
+# Content shorter than this is not summarized
+MIN_CONTENT_CHARS = 200
+
+llm = ChatOpenAI(
+    model="gpt-4o",
+    temperature=0.3,
+    api_key=settings.openai_api_key,
+)
+
+summary_prompt = ChatPromptTemplate.from_messages([
+    ("system", "주어진 문서의 핵심 내용을 2-3문장으로 요약해주세요. 요약만 출력하세요."),
+    ("human", "{content}")
+])
+
+
+def needs_summary(content: str) -> bool:
+    return len(content) > MIN_CONTENT_CHARS
+
+
+def summarize_content(content: str) -> str:
+    """Summarize a single document synchronously (opt-in path of ai_docs_create)"""
+    try:
+        result = (summary_prompt | llm).invoke({"content": content[:3000]})
+        return result.content[:500]
+    except Exception:
+        return content[:200] + "..."
+
+
+class DocumentSummarizer:
+    """
+    Background worker that fills in summaries for pending documents.
+
+    Runs on the FastAPI event loop (started from main.lifespan). Each pass
+    claims up to BATCH_SIZE pending documents via the
+    claim_pending_document_summaries RPC, summarizes them with one
+    llm.abatch call and writes the results back. Failed documents are
+    reclaimed with exponential backoff until MAX_ATTEMPTS.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._stats = {
+            "batches": 0,
+            "documents": 0,
+            "failed": 0,
+            "write_failed": 0,
+            "last_batch_size": 0,
+            "last_batch_seconds": 0.0,
+            "busy_seconds": 0.0,
+        }
+
+    def start(self) -> None:
+        if self._task:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def notify(self) -> None:
+        """Wake the worker early; safe to call from tool threads"""
+        if self._loop and self._wake:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def stats(self) -> dict:
+        busy = self._stats["busy_seconds"]
+        return {
+            **self._stats,
+            "running": self._task is not None,
+            "docs_per_second": round(self._stats["documents"] / busy, 3) if busy else 0.0,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await self.process_batch()
+            except Exception as e:
+                print(f"[DocumentSummarizer] batch error: {e}")
+                processed = 0
+
+            # Keep draining while there is a backlog
+            if processed >= BATCH_SIZE:
+                continue
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def process_batch(self) -> int:
+        client = get_async_client()
+        claimed = await client.rpc("claim_pending_document_summaries", {
+            "p_limit": BATCH_SIZE,
+            "p_max_attempts": MAX_ATTEMPTS,
+        }).execute()
+        docs = claimed.data or []
+        if not docs:
+            return 0
+
+        started = time.perf_counter()
+        results = await (summary_prompt | llm).abatch(
+            [{"content": doc["content"][:3000]} for doc in docs],
+            config={"max_concurrency": MAX_CONCURRENCY},
+            return_exceptions=True,
+        )
+
+        updates = [
+            {"summary_status": "failed"} if isinstance(result, Exception)
+            else {"summary": result.content[:500], "summary_status": "done", "summary_attempts": 0}
+            for result in results
+        ]
+        # Only documents still processing: an edit during summarization re-queued the
+        # document as pending, and a summary of the old content must not overwrite that
+        writes = await asyncio.gather(*(
+            client.table("project_documents")
+            .update(update)
+            .eq("id", doc["id"])
+            .eq("summary_status", "processing")
+            .execute()
+            for doc, update in zip(docs, updates)
+        ), return_exceptions=True)
+        invalidate_cache("docs:list", *(f"doc:{doc['id']}" for doc in docs))
+
+        # Documents whose write-back failed stay processing and are reclaimed after the stale timeout
+        write_failed = 0
+        for doc, write in zip(docs, writes):
+            if isinstance(write, Exception):
+                print(f"[DocumentSummarizer] write-back failed for {doc['id']}: {write}")
+                write_failed += 1
+        failed = sum(
+            isinstance(result, Exception) and not isinstance(write, Exception)
+            for result, write in zip(results, writes)
+        )
+        elapsed = time.perf_counter() - started
+
+        self._stats["batches"] += 1
+        self._stats["documents"] += len(docs) - failed - write_failed
+        self._stats["failed"] += failed
+        self._stats["write_failed"] += write_failed
+        self._stats["last_batch_size"] = len(docs)
+        self._stats["last_batch_seconds"] = round(elapsed, 3)
+        self._stats["busy_seconds"] += elapsed
+        return len(docs)
+
+
+summarizer = DocumentSummarizer()
@@ -11,6 +11,19 @@ import json
 from config import get_settings
 from .registry import register_tool
 from utils.supabase import get_supabase_client
+from utils.hashing import content_hash
+from utils.metrics import hit_counter
+from .email_rollup import (
+    REDUCE_GROUP,
+    build_daily_rollups,
+    group_by_day,
+    iter_window_emails,
+    reduce_summaries,
+    window_start,
+)
+from .email_triage import triage_emails
+from .email_body import clean_body, get_clean_body
+from .email_thread import fetch_thread, thread_digest
 
 settings = get_settings()
 
@@ -30,6 +43,17 @@ llm_fallback = ChatOpenAI(
 )
 
 
+# Bump when a prompt changes so stored results are regenerated
+ANALYSIS_PROMPT_VERSION = "v1"
+TRANSLATION_PROMPT_VERSION = "v1"
+
+# Seconds email_get/email_list results are reused; short because mail sync inserts outside the tools
+READ_CACHE_TTL = 30
+
+analysis_cache_counter = hit_counter("email_analyze")
+translation_cache_counter = hit_counter("email_translate")
+
+
 def _get_llm():
     """Get appropriate LLM (Grok preferred, fallback to OpenAI)"""
     if settings.xai_api_key:
@@ -37,6 +61,37 @@ def _get_llm():
     return llm_fallback
 
 
+def _get_stored_result(client, email_id: str, body_hash: str, result_type: str, result_key: str, prompt_version: str) -> Optional[dict]:
+    """Look up a stored analysis/translation for this exact email content"""
+    result = (
+        client.table("email_ai_results")
+        .select("result, created_at")
+        .eq("email_id", email_id)
+        .eq("body_hash", body_hash)
+        .eq("result_type", result_type)
+        .eq("result_key", result_key)
+        .eq("prompt_version", prompt_version)
+        .limit(1)
+        .execute()
+    )
+    return result.data[0] if result.data else None
+
+
+def _store_result(client, email_id: str, body_hash: str, result_type: str, result_key: str, prompt_version: str, text: str) -> None:
+    try:
+        client.table("email_ai_results").upsert({
+            "email_id": email_id,
+            "body_hash": body_hash,
+            "result_type": result_type,
+            "result_key": result_key,
+            "prompt_version": prompt_version,
+            "result": text,
+            "model_used": _get_llm().model_name,
+        }, on_conflict="email_id,body_hash,result_type,result_key,prompt_version").execute()
+    except Exception:
+        pass  # Ignore save errors
+
+
 @tool
 def email_get(email_id: str) -> str:
     """
@@ -47,6 +102,8 @@ def email_get(email_id: str) -> str:
 
     Returns:
         Email details including subject, body, sender, etc.
+        `body` is the cleaned text (no HTML, quoted replies or signature);
+        body_text/body_html are the raw message.
     """
     try:
         client = get_supabase_client()
@@ -73,6 +130,7 @@ def email_get(email_id: str) -> str:
                 "to_addresses": email["to_addresses"],
                 "body_text": email["body_text"],
                 "body_html": email["body_html"],
+                "body": clean_body(email),
                 "received_at": email["received_at"],
                 "is_read": email["is_read"],
                 "is_starred": email["is_starred"],
@@ -141,9 +199,12 @@ def email_list(
 def email_analyze(
     email_id: str,
     analysis_type: Literal["full", "summary", "urgency", "action_items", "sender", "reply_needed"] = "full",
+    force_refresh: bool = False,
 ) -> str:
     """
     Analyze an email using AI.
+    A stored result is returned (cached: true) when the same email content
+    was already analyzed with the same analysis type.
 
     Args:
         email_id: Email ID to analyze
@@ -154,6 +215,7 @@ def email_analyze(
             - action_items: 필요한 액션 추출
             - sender: 발신자 분석
             - reply_needed: 답장 필요 여부
+        force_refresh: Ignore stored results and re-run the analysis
 
     Returns:
         AI analysis results
@@ -174,7 +236,24 @@ def email_analyze(
             return json.dumps({"success": False, "error": "이메일을 찾을 수 없습니다."}, ensure_ascii=False)
 
         email = result.data
-        body = email.get("body_text") or email.get("body_html", "")[:5000]
+        body = get_clean_body(client, email)
+        body_hash = content_hash(email.get("subject"), email.get("from_name"), email.get("from_address"), body)
+
+        if not force_refresh:
+            stored = _get_stored_result(client, email_id, body_hash, "analysis", analysis_type, ANALYSIS_PROMPT_VERSION)
+            if stored:
+                analysis_cache_counter.hit()
+                return json.dumps({
+                    "success": True,
+                    "email_id": email_id,
+                    "subject": email.get("subject"),
+                    "analysis_type": analysis_type,
+                    "analysis": stored["result"],
+                    "cached": True,
+                    "analyzed_at": stored["created_at"],
+                }, ensure_ascii=False)
+
+        analysis_cache_counter.miss()
 
         prompts = {
             "full": """이메일을 종합적으로 분석해주세요:
@@ -288,12 +367,15 @@ def email_analyze(
         except Exception:
             pass  # Ignore update errors
 
+        _store_result(client, email_id, body_hash, "analysis", analysis_type, ANALYSIS_PROMPT_VERSION, analysis.content)
+
         return json.dumps({
             "success": True,
             "email_id": email_id,
             "subject": email.get("subject"),
             "analysis_type": analysis_type,
             "analysis": analysis.content,
+            "cached": False,
         }, ensure_ascii=False)
 
     except Exception as e:
@@ -304,13 +386,17 @@ def email_analyze(
 def email_translate(
     email_id: str,
     target_language: str = "ko",
+    force_refresh: bool = False,
 ) -> str:
     """
     Translate an email to target language.
+    A stored translation is returned (cached: true) when the same email
+    content was already translated into the same language.
 
     Args:
         email_id: Email ID to translate
         target_language: Target language code (ko, en, ja, zh, etc.)
+        force_refresh: Ignore stored translations and translate again
 
     Returns:
         Translated email content
@@ -320,7 +406,7 @@ def email_translate(
 
         result = (
             client.table("email_messages")
-            .select("subject, body_text, body_html")
+            .select("id, subject, body_text, body_html, body_clean, body_clean_version")
             .eq("id", email_id)
             .single()
             .execute()
@@ -330,7 +416,23 @@ def email_translate(
             return json.dumps({"success": False, "error": "이메일을 찾을 수 없습니다."}, ensure_ascii=False)
 
         email = result.data
-        body = email.get("body_text") or email.get("body_html", "")
+        body = get_clean_body(client, email)
+        body_hash = content_hash(email.get("subject"), body)
+
+        if not force_refresh:
+            stored = _get_stored_result(client, email_id, body_hash, "translation", target_language, TRANSLATION_PROMPT_VERSION)
+            if stored:
+                translation_cache_counter.hit()
+                return json.dumps({
+                    "success": True,
+                    "email_id": email_id,
+                    "original_subject": email.get("subject"),
+                    "target_language": target_language,
+                    "translation": stored["result"],
+                    "cached": True,
+                }, ensure_ascii=False)
+
+        translation_cache_counter.miss()
 
         language_names = {
             "ko": "한국어",
@@ -362,12 +464,15 @@ def email_translate(
             "target_language": target_name,
         })
 
+        _store_result(client, email_id, body_hash, "translation", target_language, TRANSLATION_PROMPT_VERSION, translation.content)
+
         return json.dumps({
             "success": True,
             "email_id": email_id,
             "original_subject": email.get("subject"),
             "target_language": target_language,
             "translation": translation.content,
+            "cached": False,
         }, ensure_ascii=False)
 
     except Exception as e:
@@ -383,6 +488,8 @@ def email_draft_reply(
 ) -> str:
     """
     Generate a reply draft for an email.
+    Earlier messages of the same thread are included as context, so there is
+    no need to look them up with email_search/email_get first.
 
     Args:
         email_id: Email ID to reply to
@@ -414,7 +521,8 @@ def email_draft_reply(
             return json.dumps({"success": False, "error": "이메일을 찾을 수 없습니다."}, ensure_ascii=False)
 
         email = result.data
-        body = email.get("body_text") or email.get("body_html", "")[:3000]
+        body = get_clean_body(client, email)
+        history, thread_messages = thread_digest(client, fetch_thread(client, email))
 
         reply_instructions = {
             "formal": "공식적이고 비즈니스적인 톤으로 답장을 작성해주세요.",
@@ -426,7 +534,7 @@ def email_draft_reply(
         }
 
         prompt = ChatPromptTemplate.from_template("""원본 이메일에 대한 답장을 작성해주세요.
-
+{thread_context}
 **원본 이메일**
 발신자: {from_name} <{from_address}>
 제목: {subject}
@@ -448,10 +556,11 @@ def email_draft_reply(
             "from_name": email.get("from_name", ""),
             "from_address": email.get("from_address", ""),
             "subject": email.get("subject", ""),
-            "body": body,
+            "body": body[:6000],
             "reply_instruction": reply_instructions.get(reply_type, reply_instructions["formal"]),
             "language": "한국어" if language == "ko" else language,
             "key_points_instruction": key_points_text,
+            "thread_context": f"\n**이전 대화 (오래된 순)**\n{history}\n" if history else "",
         })
 
         # Save as draft
@@ -477,6 +586,7 @@ def email_draft_reply(
             "success": True,
             "email_id": email_id,
             "reply_type": reply_type,
+            "thread_messages": thread_messages,
             "draft": reply.content,
             "to": email.get("from_address"),
             "subject": f"Re: {email.get('subject', '')}",
@@ -489,41 +599,47 @@ def email_draft_reply(
 @tool
 def email_search(
     account_id: str,
-    query: str,
+    query: Optional[str] = None,
     folder: Optional[str] = None,
+    from_address: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    has_attachments: Optional[bool] = None,
+    unread_only: bool = False,
     limit: int = 20,
 ) -> str:
     """
-    Search emails by keyword.
+    Search emails by keyword and filters, ranked by relevance.
 
     Args:
         account_id: Email account ID
-        query: Search keyword
+        query: Search keywords (subject, sender, body). Omit to filter only
         folder: Optional folder filter
+        from_address: Sender address prefix such as "kim", "kim@acme" or a full address (case-insensitive)
+        date_from: Only emails received on/after this date (ISO 8601)
+        date_to: Only emails received before this date (ISO 8601)
+        has_attachments: Only emails with (True) or without (False) attachments
+        unread_only: Only unread emails
         limit: Max results
 
     Returns:
-        Matching emails
+        Matching emails (most relevant first)
     """
     try:
         client = get_supabase_client()
 
-        # Build search query
-        db_query = (
-            client.table("email_messages")
-            .select("id, subject, from_address, from_name, snippet, received_at, folder")
-            .eq("account_id", account_id)
-            .eq("is_trash", False)
-        )
-
-        if folder:
-            db_query = db_query.eq("folder", folder)
-
-        # Search in subject and body
-        db_query = db_query.or_(f"subject.ilike.%{query}%,body_text.ilike.%{query}%,from_address.ilike.%{query}%")
-        db_query = db_query.order("received_at", desc=True).limit(limit)
-
-        result = db_query.execute()
+        # search_vector is kept current by a trigger on email_messages
+        result = client.rpc("search_email_messages", {
+            "p_account_id": account_id,
+            "p_query": query,
+            "p_folder": folder,
+            "p_from": from_address,
+            "p_date_from": date_from,
+            "p_date_to": date_to,
+            "p_has_attachments": has_attachments,
+            "p_unread_only": unread_only,
+            "p_limit": limit,
+        }).execute()
 
         return json.dumps({
             "success": True,
@@ -574,6 +690,9 @@ def email_mark_read(email_id: str, is_read: bool = True) -> str:
 def email_summarize_inbox(account_id: str, days: int = 7) -> str:
     """
     Generate AI summary of recent inbox activity.
+    Every email in the period is covered: mail is summarized per day in
+    batches and the daily summaries are combined. Days without new mail
+    reuse their stored daily summary.
 
     Args:
         account_id: Email account ID
@@ -584,40 +703,55 @@ def email_summarize_inbox(account_id: str, days: int = 7) -> str:
     """
     try:
         client = get_supabase_client()
-        from datetime import datetime, timedelta
+        from datetime import datetime, timezone
 
-        # Get recent emails
-        since_date = (datetime.now() - timedelta(days=days)).isoformat()
+        now = datetime.now(timezone.utc)
+        since = window_start(days, now)
 
-        result = (
-            client.table("email_messages")
-            .select("subject, from_name, from_address, snippet, received_at, is_read, ai_priority")
-            .eq("account_id", account_id)
-            .eq("folder", "INBOX")
-            .gte("received_at", since_date)
-            .order("received_at", desc=True)
-            .limit(50)
-            .execute()
-        )
-
-        emails = result.data or []
+        emails_by_day = group_by_day(iter_window_emails(client, account_id, "INBOX", since, now))
+        total = sum(len(emails) for emails in emails_by_day.values())
 
-        if not emails:
+        if not total:
             return json.dumps({
                 "success": True,
                 "summary": f"최근 {days}일간 수신된 이메일이 없습니다.",
                 "count": 0,
             }, ensure_ascii=False)
 
-        # Prepare summary data
-        email_list = []
-        for e in emails:
-            email_list.append(f"- [{e.get('ai_priority', 'normal')}] {e.get('from_name', e['from_address'])}: {e.get('subject', '(제목 없음)')}")
+        account = (
+            client.table("email_accounts")
+            .select("user_id")
+            .eq("id", account_id)
+            .limit(1)
+            .execute()
+        )
+        user_id = account.data[0]["user_id"] if account.data else None
+
+        llm_instance = _get_llm()
+        rollups = build_daily_rollups(client, account_id, user_id, emails_by_day, llm_instance)
+
+        unread_count = sum(r["unread_count"] for r in rollups)
+        urgent_count = sum(r["urgent_count"] for r in rollups)
+        categories: dict[str, int] = {}
+        for r in rollups:
+            for category, count in r["categories_breakdown"].items():
+                categories[category] = categories.get(category, 0) + count
+
+        # Very long windows: combine days into groups first so the final prompt stays small
+        daily = [f"### {r['day']} ({r['total_emails']}개)\n{r['summary_text']}" for r in rollups]
+        if len(daily) > REDUCE_GROUP:
+            daily = [
+                reduce_summaries(daily[i:i + REDUCE_GROUP], f"{rollups[i]['day']} 주간", llm_instance)
+                for i in range(0, len(daily), REDUCE_GROUP)
+            ]
 
         prompt = ChatPromptTemplate.from_template("""최근 {days}일간 받은 이메일을 요약해주세요.
 
-총 {count}개 이메일:
-{email_list}
+총 {count}개 이메일 (안읽음 {unread_count}개, 긴급 {urgent_count}개)
+카테고리: {categories}
+
+기간별 요약:
+{daily_summaries}
 
 다음 형식으로 요약해주세요:
 
@@ -637,35 +771,42 @@ def email_summarize_inbox(account_id: str, days: int = 7) -> str:
 ### 추천 사항
 (이메일 관리에 대한 조언)""")
 
-        chain = prompt | _get_llm()
+        chain = prompt | llm_instance
 
         summary = chain.invoke({
             "days": days,
-            "count": len(emails),
-            "email_list": "\n".join(email_list[:30]),
+            "count": total,
+            "unread_count": unread_count,
+            "urgent_count": urgent_count,
+            "categories": ", ".join(f"{k} {v}" for k, v in sorted(categories.items(), key=lambda x: -x[1])),
+            "daily_summaries": "\n\n".join(daily),
         })
 
         # Save summary
-        try:
-            client.table("email_summaries").insert({
-                "user_id": account_id,  # Will need proper user_id
-                "account_id": account_id,
-                "summary_type": "custom",
-                "period_start": since_date,
-                "period_end": datetime.now().isoformat(),
-                "total_emails": len(emails),
-                "unread_count": len([e for e in emails if not e.get("is_read")]),
-                "urgent_count": len([e for e in emails if e.get("ai_priority") == "urgent"]),
-                "summary_text": summary.content,
-            }).execute()
-        except Exception:
-            pass
+        if user_id:
+            try:
+                client.table("email_summaries").insert({
+                    "user_id": user_id,
+                    "account_id": account_id,
+                    "summary_type": "custom",
+                    "period_start": since.isoformat(),
+                    "period_end": now.isoformat(),
+                    "total_emails": total,
+                    "unread_count": unread_count,
+                    "urgent_count": urgent_count,
+                    "categories_breakdown": categories,
+                    "summary_text": summary.content,
+                }).execute()
+            except Exception:
+                pass
 
         return json.dumps({
             "success": True,
             "days": days,
-            "total_emails": len(emails),
-            "unread_count": len([e for e in emails if not e.get("is_read")]),
+            "total_emails": total,
+            "unread_count": unread_count,
+            "days_summarized": len([r for r in rollups if not r["reused"]]),
+            "days_reused": len([r for r in rollups if r["reused"]]),
             "summary": summary.content,
         }, ensure_ascii=False)
 
@@ -673,12 +814,62 @@ def email_summarize_inbox(account_id: str, days: int = 7) -> str:
         return json.dumps({"success": False, "error": f"요약 오류: {str(e)}"}, ensure_ascii=False)
 
 
+@tool
+def email_triage_batch(
+    account_id: str,
+    folder: str = "INBOX",
+    days: int = 7,
+    max_emails: int = 500,
+) -> str:
+    """
+    Triage all unanalyzed emails in a folder at once.
+    Sets priority, category, reply-needed and a one-line summary for every
+    email received in the last `days` days that has not been analyzed yet,
+    classifying many emails per AI call.
+
+    Args:
+        account_id: Email account ID
+        folder: Folder name (default: INBOX)
+        days: Number of days to look back (default: 7)
+        max_emails: Maximum number of emails to triage in this call
+
+    Returns:
+        Triage counts and throughput metrics
+    """
+    try:
+        client = get_supabase_client()
+        from datetime import datetime, timedelta, timezone
+
+        now = datetime.now(timezone.utc)
+        stats = triage_emails(
+            client,
+            _get_llm(),
+            account_id,
+            folder,
+            since=now - timedelta(days=days),
+            until=now,
+            max_emails=max_emails,
+        )
+
+        return json.dumps({
+            "success": True,
+            "account_id": account_id,
+            "folder": folder,
+            "days": days,
+            **stats,
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({"success": False, "error": f"일괄 분류 오류: {str(e)}"}, ensure_ascii=False)
+
+
 # Register all tools
-register_tool(email_get)
-register_tool(email_list)
-register_tool(email_analyze)
+register_tool(email_get, cache_ttl=READ_CACHE_TTL, cache_tags=lambda a: [f"email:{a['email_id']}", "emails"])
+register_tool(email_list, cache_ttl=READ_CACHE_TTL, cache_tags=lambda a: ["emails:list", "emails"])
+register_tool(email_analyze, invalidates=lambda a: [f"email:{a['email_id']}", "emails:list"])
 register_tool(email_translate)
 register_tool(email_draft_reply)
 register_tool(email_search)
-register_tool(email_mark_read)
+register_tool(email_mark_read, invalidates=lambda a: [f"email:{a['email_id']}", "emails:list"])
 register_tool(email_summarize_inbox)
+register_tool(email_triage_batch, invalidates=lambda a: ["emails"])
@@ -0,0 +1,201 @@
+"""
+Email Body - 이메일 본문 정규화
+HTML 을 간결한 텍스트로 변환하고 인용된 이전 메일, 서명, 반복 문구를 제거
+결과는 email_messages.body_clean 에 메시지별로 저장되어 재사용
+"""
+from html.parser import HTMLParser
+import re
+
+# Bump when the normalization rules change so stored bodies are rebuilt
+BODY_NORMALIZER_VERSION = "v3"
+
+_SKIP_TAGS = {"script", "style", "head", "title", "noscript", "template", "svg"}
+_BLOCK_TAGS = {
+    "p", "div", "br", "tr", "li", "ul", "ol", "table", "section", "article",
+    "header", "footer", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "hr",
+}
+
+# Lines that start a quoted reply chain; everything from here on is dropped
+_QUOTE_HEADER_RES = [
+    re.compile(r"^On .{5,200} wrote:\s*$", re.IGNORECASE),
+    re.compile(r"^-{2,}\s*(Original Message|원본 메시지)\s*-{2,}", re.IGNORECASE),
+    re.compile(r"^\d{4}년 \d{1,2}월 \d{1,2}일.{0,80}(님이 작성|작성:|wrote:)", re.IGNORECASE),
+]
+# A forwarded message is content; its header block is kept
+_FORWARD_MARKER_RE = re.compile(r"^-{2,}\s*(Forwarded message|전달된 메시지)\s*-{2,}", re.IGNORECASE)
+# A From: line only starts a quoted message when other header fields follow it
+_FROM_HEADER_RE = re.compile(r"^(From|보낸 사람)\s*:.+$", re.IGNORECASE)
+_HEADER_FIELD_RE = re.compile(r"^(Sent|Date|To|Cc|Subject|보낸 날짜|날짜|받는 사람|참조|제목)\s*:", re.IGNORECASE)
+_HEADER_BLOCK_LINES = 4
+# Lines that start a signature block
+_SIGNATURE_RES = [
+    re.compile(r"^--\s*$"),
+    re.compile(r"^(Sent from my|Get Outlook for)\b", re.IGNORECASE),
+    re.compile(r"^(iPhone|iPad|Galaxy|Android|모바일)에서 보냄"),
+]
+# Footer boilerplate dropped wherever it appears
+_BOILERPLATE_RES = [
+    re.compile(r"^(unsubscribe|구독\s?취소|수신\s?거부)\b.{0,40}$", re.IGNORECASE),
+    re.compile(r"(click|tap) here to unsubscribe|(no longer|do not|don't) (wish|want) to receive (these|this|our|further)", re.IGNORECASE),
+    re.compile(r"수신\s?(거부|을 원하지 않으)\S*\s?(하시려면|원하시면|시면)"),
+    re.compile(r"(this (e-?mail|message).{0,60}(confidential|intended only))", re.IGNORECASE),
+    re.compile(r"view (this email|it) in (your|a) browser", re.IGNORECASE),
+    re.compile(r"본 메일은 발신 전용|본 메일은 .{0,30}(기밀|비밀)"),
+]
+
+
+class _TextExtractor(HTMLParser):
+    """Collect visible text, turning block elements into line breaks"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+            if tag == "li":
+                self.parts.append("- ")
+        elif tag in ("td", "th"):
+            self.parts.append(" ")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in ("br", "hr"):
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS and tag != "li":
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """Convert HTML to plain text (scripts, styles and images dropped)"""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return "".join(parser.parts)
+
+
+def _is_header_block(lines: list[str], start: int) -> bool:
+    """From: followed by further header fields (Sent/To/Subject...) within a few lines"""
+    following = [line for line in lines[start + 1:start + 1 + _HEADER_BLOCK_LINES] if line]
+    return any(_HEADER_FIELD_RE.match(line) for line in following)
+
+
+def _cut_quoted_and_signature(lines: list[str]) -> list[str]:
+    first = next((i for i, line in enumerate(lines) if line), len(lines))
+    previous = ""
+    for i in range(first, len(lines)):
+        line = lines[i]
+        if not line:
+            continue
+        # Nothing is cut before some content has been kept: a header at the very top is the
+        # message's own forwarded header, and a leading "--" is not a signature delimiter
+        if i > first:
+            if any(r.match(line) for r in _QUOTE_HEADER_RES):
+                return lines[:i]
+            if (
+                _FROM_HEADER_RE.match(line)
+                and not _FORWARD_MARKER_RE.match(previous)
+                and _is_header_block(lines, i)
+            ):
+                return lines[:i]
+            if any(r.match(line) for r in _SIGNATURE_RES):
+                return lines[:i]
+        previous = line
+    return lines
+
+
+def normalize_body(body_text: str | None, body_html: str | None) -> str:
+    """
+    Compact, prompt-ready email body.
+
+    Uses body_text when present, otherwise the text of body_html. Quoted
+    reply chains (">" lines, "On ... wrote:" / Original Message markers and
+    From/Sent/To header blocks), signatures, footer boilerplate and repeated lines are removed and whitespace is
+    collapsed.
+    """
+    text = body_text if body_text and body_text.strip() else html_to_text(body_html or "")
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\xa0", " ")
+
+    lines = [re.sub("[ \t\u200b\u200c\ufeff]+", " ", line).strip() for line in text.split("\n")]
+    lines = [line for line in lines if not line.startswith(">")]
+    lines = _cut_quoted_and_signature(lines)
+
+    result: list[str] = []
+    seen: set[str] = set()
+    for line in lines:
+        if not line:
+            if result and result[-1]:
+                result.append("")
+            continue
+        if any(r.search(line) for r in _BOILERPLATE_RES):
+            continue
+        # Repeated long lines are layout duplicates (headers/footers rendered twice)
+        key = line.lower()
+        if len(line) > 20 and key in seen:
+            continue
+        seen.add(key)
+        result.append(line)
+
+    return "\n".join(result).strip()
+
+
+def _is_current(email: dict) -> bool:
+    return email.get("body_clean") is not None and email.get("body_clean_version") == BODY_NORMALIZER_VERSION
+
+
+def clean_body(email: dict) -> str:
+    """Stored body_clean when current, otherwise a freshly normalized body (nothing is written)"""
+    if _is_current(email):
+        return email["body_clean"]
+    return normalize_body(email.get("body_text"), email.get("body_html"))
+
+
+def get_clean_body(client, email: dict) -> str:
+    """
+    Normalized body for an email row, cached in email_messages.body_clean.
+
+    The row must include id, body_text, body_html, body_clean and
+    body_clean_version; a stale or missing body_clean is rebuilt and stored.
+    """
+    if _is_current(email):
+        return email["body_clean"]
+
+    clean = normalize_body(email.get("body_text"), email.get("body_html"))
+    try:
+        client.table("email_messages").update({
+            "body_clean": clean,
+            "body_clean_version": BODY_NORMALIZER_VERSION,
+        }).eq("id", email["id"]).execute()
+    except Exception:
+        pass  # Ignore cache write errors
+    return clean
+
+
+def get_clean_bodies(client, emails: list[dict]) -> list[str]:
+    """get_clean_body for several rows; rebuilt bodies are stored in one set_email_body_clean call"""
+    bodies = [clean_body(email) for email in emails]
+    rebuilt = [
+        {"id": email["id"], "body_clean": body}
+        for email, body in zip(emails, bodies)
+        if not _is_current(email)
+    ]
+    if rebuilt:
+        try:
+            client.rpc("set_email_body_clean", {
+                "p_rows": rebuilt,
+                "p_version": BODY_NORMALIZER_VERSION,
+            }).execute()
+        except Exception:
+            pass  # Ignore cache write errors
+    return bodies
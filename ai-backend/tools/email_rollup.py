@@ -0,0 +1,202 @@
+"""
+Email Rollup - 받은 편지함 계층 요약
+기간 내 모든 이메일을 페이지 단위로 읽어 일별 요약(email_summaries 'daily')을 만들고,
+메일이 바뀌지 않은 날의 요약은 재사용
+"""
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Iterator
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from utils.hashing import content_hash
+from utils.pagination import apply_keyset, page_result
+
+# Emails per map (batch summary) call
+BATCH_SIZE = 40
+# Rows per email_messages page
+PAGE_SIZE = 500
+# Parallel LLM calls
+MAX_CONCURRENCY = 5
+# Summaries combined per reduce call
+REDUCE_GROUP = 7
+# Bump when the prompts change so stored rollups are regenerated
+ROLLUP_PROMPT_VERSION = "v1"
+
+ROLLUP_COLUMNS = "id, subject, from_name, from_address, received_at, is_read, ai_priority, ai_category"
+
+batch_prompt = ChatPromptTemplate.from_template("""다음은 {period}에 받은 이메일 {count}개입니다.
+
+{email_list}
+
+중요한 이메일, 주요 주제, 답장이나 조치가 필요한 항목을 중심으로 5-8줄로 요약해주세요.
+발신자와 제목을 구체적으로 언급하세요.""")
+
+reduce_prompt = ChatPromptTemplate.from_template("""다음은 {period}에 받은 이메일의 부분 요약들입니다.
+
+{summaries}
+
+중복은 합치되 중요한 이메일과 조치 필요 항목은 빠짐없이 유지하여 하나의 요약(8-12줄)으로 정리해주세요.""")
+
+
+def email_line(email: dict) -> str:
+    sender = email.get("from_name") or email.get("from_address")
+    return f"- [{email.get('ai_priority') or 'normal'}] {sender}: {email.get('subject') or '(제목 없음)'}"
+
+
+def window_start(days: int, now: datetime) -> datetime:
+    """Start of the UTC day `days` days ago (rollups always cover whole days)"""
+    start = now - timedelta(days=days)
+    return start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def iter_window_emails(client, account_id: str, folder: str, start: datetime, end: datetime) -> Iterator[list[dict]]:
+    """Page through every message of the window in received_at order"""
+    cursor = None
+    while True:
+        query = (
+            client.table("email_messages")
+            .select(ROLLUP_COLUMNS)
+            .eq("account_id", account_id)
+            .eq("folder", folder)
+            .gte("received_at", start.isoformat())
+            .lt("received_at", end.isoformat())
+        )
+        rows = apply_keyset(query, "received_at", cursor, PAGE_SIZE, desc=False).execute().data or []
+        rows, cursor = page_result(rows, "received_at", PAGE_SIZE)
+        if rows:
+            yield rows
+        if not cursor:
+            break
+
+
+def _day_stats(emails: list[dict]) -> dict:
+    return {
+        "total_emails": len(emails),
+        "unread_count": len([e for e in emails if not e.get("is_read")]),
+        "urgent_count": len([e for e in emails if e.get("ai_priority") == "urgent"]),
+        "categories_breakdown": dict(Counter(e.get("ai_category") or "uncategorized" for e in emails)),
+    }
+
+
+def _source_hash(emails: list[dict]) -> str:
+    """Changes whenever a day gains/loses mail or a priority shown in the summary changes"""
+    keys = sorted((e["id"], e.get("ai_priority")) for e in emails)
+    return content_hash(keys, ROLLUP_PROMPT_VERSION)
+
+
+def reduce_summaries(summaries: list[str], period: str, llm) -> str:
+    """Combine summaries REDUCE_GROUP at a time until one remains"""
+    chain = reduce_prompt | llm
+    while len(summaries) > 1:
+        groups = [summaries[i:i + REDUCE_GROUP] for i in range(0, len(summaries), REDUCE_GROUP)]
+        results = chain.batch(
+            [{"period": period, "summaries": "\n\n---\n\n".join(group)} for group in groups],
+            config={"max_concurrency": MAX_CONCURRENCY},
+        )
+        summaries = [r.content for r in results]
+    return summaries[0] if summaries else ""
+
+
+def build_daily_rollups(client, account_id: str, user_id: str | None, emails_by_day: dict[str, list[dict]], llm) -> list[dict]:
+    """
+    Return one rollup per day that has mail, oldest first.
+
+    Days whose stored rollup has the same source hash are reused as-is; the
+    remaining days are split into BATCH_SIZE batches that are summarized
+    concurrently and reduced per day. New rollups replace stale ones in
+    email_summaries.
+
+    Returns:
+        [{"day", "summary_text", "reused", "total_emails", "unread_count", "urgent_count", "categories_breakdown"}, ...]
+    """
+    if not emails_by_day:
+        return []
+
+    first_day = min(emails_by_day)
+    stored = (
+        client.table("email_summaries")
+        .select("id, period_start, source_hash, summary_text")
+        .eq("account_id", account_id)
+        .eq("summary_type", "daily")
+        .not_.is_("source_hash", "null")
+        .gte("period_start", f"{first_day}T00:00:00+00:00")
+        .execute()
+    ).data or []
+    stored_by_day = {row["period_start"][:10]: row for row in stored}
+
+    rollups: dict[str, dict] = {}
+    map_inputs: list[dict] = []
+    map_days: list[str] = []
+
+    for day, emails in sorted(emails_by_day.items()):
+        source_hash = _source_hash(emails)
+        rollup = {"day": day, "source_hash": source_hash, **_day_stats(emails)}
+        previous = stored_by_day.get(day)
+
+        if previous and previous["source_hash"] == source_hash:
+            rollup.update({"summary_text": previous["summary_text"], "reused": True})
+        else:
+            rollup.update({"summary_text": None, "reused": False, "stale_id": previous["id"] if previous else None})
+            for i in range(0, len(emails), BATCH_SIZE):
+                batch = emails[i:i + BATCH_SIZE]
+                map_inputs.append({
+                    "period": day,
+                    "count": len(batch),
+                    "email_list": "\n".join(email_line(e) for e in batch),
+                })
+                map_days.append(day)
+        rollups[day] = rollup
+
+    # Map: every batch of every changed day in one concurrent pass
+    partials: dict[str, list[str]] = defaultdict(list)
+    if map_inputs:
+        results = (batch_prompt | llm).batch(map_inputs, config={"max_concurrency": MAX_CONCURRENCY})
+        for day, result in zip(map_days, results):
+            partials[day].append(result.content)
+
+    # Reduce: days that needed more than one batch
+    for day, texts in partials.items():
+        rollups[day]["summary_text"] = texts[0] if len(texts) == 1 else reduce_summaries(texts, day, llm)
+
+    fresh = [r for r in rollups.values() if not r["reused"]]
+    if fresh and user_id:
+        try:
+            stale_ids = [r["stale_id"] for r in fresh if r["stale_id"]]
+            if stale_ids:
+                client.table("email_summaries").delete().in_("id", stale_ids).execute()
+            client.table("email_summaries").insert([
+                {
+                    "user_id": user_id,
+                    "account_id": account_id,
+                    "summary_type": "daily",
+                    "period_start": f"{r['day']}T00:00:00+00:00",
+                    "period_end": f"{date.fromisoformat(r['day']) + timedelta(days=1)}T00:00:00+00:00",
+                    "total_emails": r["total_emails"],
+                    "unread_count": r["unread_count"],
+                    "urgent_count": r["urgent_count"],
+                    "categories_breakdown": r["categories_breakdown"],
+                    "summary_text": r["summary_text"],
+                    "source_hash": r["source_hash"],
+                }
+                for r in fresh
+            ]).execute()
+        except Exception:
+            pass  # Ignore save errors
+
+    result = []
+    for r in rollups.values():
+        r.pop("stale_id", None)
+        r.pop("source_hash", None)
+        result.append(r)
+    return result
+
+
+def group_by_day(pages: Iterator[list[dict]]) -> dict[str, list[dict]]:
+    """Group paged messages by UTC day (received_at is returned in UTC)"""
+    by_day: dict[str, list[dict]] = defaultdict(list)
+    for page in pages:
+        for email in page:
+            by_day[email["received_at"][:10]].append(email)
+    return dict(by_day)
+
@@ -0,0 +1,87 @@
+"""
+Email Thread - 스레드 컨텍스트 조립
+email_messages.thread_id (20261029_email_threads.sql 트리거가 지정) 로 스레드 전체를 한 번에 조회하고
+토큰 예산 안에서 이전 메시지 다이제스트를 생성
+"""
+from functools import lru_cache
+
+import tiktoken
+
+from .email_body import get_clean_bodies
+
+# Earlier messages fetched per thread
+THREAD_MAX_MESSAGES = 30
+# Token budget for the whole digest and for any single earlier message
+DIGEST_TOKEN_BUDGET = 3000
+MESSAGE_TOKEN_LIMIT = 800
+
+THREAD_COLUMNS = "id, from_name, from_address, subject, received_at, body_text, body_html, body_clean, body_clean_version"
+
+
+@lru_cache(maxsize=1)
+def _get_encoding() -> tiktoken.Encoding:
+    # Loaded on first use: a cold tiktoken cache downloads the BPE file
+    return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str) -> int:
+    return len(_get_encoding().encode(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    encoding = _get_encoding()
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens]) + " ..."
+
+
+def fetch_thread(client, email: dict) -> list[dict]:
+    """Earlier messages of the email's thread, newest first, in one query"""
+    if not email.get("thread_id"):
+        return []
+
+    query = (
+        client.table("email_messages")
+        .select(THREAD_COLUMNS)
+        .eq("account_id", email["account_id"])
+        .eq("thread_id", email["thread_id"])
+        .neq("id", email["id"])
+    )
+    if email.get("received_at"):
+        query = query.lte("received_at", email["received_at"])
+
+    result = query.order("received_at", desc=True).limit(THREAD_MAX_MESSAGES).execute()
+    return result.data or []
+
+
+def thread_digest(client, messages: list[dict], budget: int = DIGEST_TOKEN_BUDGET) -> tuple[str, int]:
+    """
+    Chronological digest of earlier messages within a token budget.
+
+    The most recent messages are kept first; each is capped at
+    MESSAGE_TOKEN_LIMIT tokens and older messages that no longer fit are
+    replaced by a one-line note.
+
+    Returns:
+        (digest text, number of messages included)
+    """
+    entries: list[str] = []
+    remaining = budget
+
+    for message, clean in zip(messages, get_clean_bodies(client, messages)):
+        sender = message.get("from_name") or message.get("from_address")
+        header = f"[{(message.get('received_at') or '')[:16].replace('T', ' ')}] {sender}:"
+        body = truncate_tokens(clean, min(MESSAGE_TOKEN_LIMIT, remaining))
+        entry = f"{header}\n{body}"
+        cost = count_tokens(entry)
+        if cost > remaining:
+            break
+        entries.append(entry)
+        remaining -= cost
+
+    omitted = len(messages) - len(entries)
+    if omitted:
+        entries.append(f"(이전 메시지 {omitted}개 생략)")
+
+    return "\n\n".join(reversed(entries)), len(messages) - omitted
@@ -0,0 +1,162 @@
+"""
+Email Triage - 이메일 일괄 분류
+미분류(ai_analyzed_at IS NULL) 이메일을 페이지 단위로 읽어 LLM 한 번에 여러 통씩 분류하고
+페이지당 한 번의 bulk_update_email_triage RPC 로 기록
+"""
+from datetime import datetime
+import json
+import re
+import time
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from utils.pagination import apply_keyset, page_result
+
+# Untriaged emails read per page (one DB write per page)
+PAGE_SIZE = 100
+# Emails classified per LLM call
+EMAILS_PER_CALL = 20
+# Parallel LLM calls per page
+MAX_CONCURRENCY = 5
+# Characters of each email body sent to the model
+BODY_PREVIEW_CHARS = 300
+
+PRIORITIES = ("urgent", "high", "normal", "low")
+# Same set as the frontend analyzer (lib/email/email-ai-agent.ts)
+CATEGORIES = ("meeting", "invoice", "newsletter", "personal", "work", "inquiry", "notification", "spam")
+
+TRIAGE_COLUMNS = "id, subject, from_name, from_address, snippet, body_clean, received_at"
+
+triage_prompt = ChatPromptTemplate.from_template("""당신은 이메일 분류 전문가입니다. 다음 이메일 {count}통을 각각 분류해주세요.
+
+{emails}
+
+각 이메일에 대해 다음 형식의 JSON 배열로만 응답하세요 (마크다운 없이 순수 JSON만):
+[
+  {{"n": 이메일 번호, "priority": "urgent|high|normal|low", "category": "meeting|invoice|newsletter|personal|work|inquiry|notification|spam", "reply_needed": true|false, "summary": "한 문장 요약"}}
+]""")
+
+
+def _format_email(n: int, email: dict) -> str:
+    sender = email.get("from_name") or email.get("from_address")
+    # Normalized body when already built (see email_body), otherwise the sync snippet
+    preview = (email.get("body_clean") or email.get("snippet") or "")[:BODY_PREVIEW_CHARS].replace("\n", " ")
+    return f"[{n}] 발신자: {sender} <{email.get('from_address')}>\n제목: {email.get('subject') or '(제목 없음)'}\n내용: {preview}"
+
+
+def _parse_results(text: str) -> list[dict]:
+    """Extract the JSON array from a model response (code fences tolerated)"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = re.sub(r"```(?:json)?\n?", "", text).strip()
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end == -1:
+        return []
+    parsed = json.loads(text[start:end + 1])
+    return [item for item in parsed if isinstance(item, dict)]
+
+
+def _to_update(email: dict, item: dict) -> dict:
+    priority = str(item.get("priority", "")).lower()
+    category = str(item.get("category", "")).lower()
+    return {
+        "id": email["id"],
+        "ai_priority": priority if priority in PRIORITIES else "normal",
+        "ai_category": category if category in CATEGORIES else "work",
+        "ai_action_required": bool(item.get("reply_needed")),
+        "ai_summary": str(item.get("summary") or "")[:500],
+    }
+
+
+def triage_emails(
+    client,
+    llm,
+    account_id: str,
+    folder: str,
+    since: datetime,
+    until: datetime,
+    max_emails: int,
+) -> dict:
+    """
+    Classify every untriaged email of the window, newest first.
+
+    Each page of PAGE_SIZE emails is split into EMAILS_PER_CALL groups that
+    are classified concurrently; the page's results are written with one
+    bulk_update_email_triage call. Emails the model skipped stay untriaged.
+
+    Returns:
+        Throughput stats: {"triaged", "failed", "pages", "llm_calls", "elapsed_seconds", ...}
+    """
+    chain = triage_prompt | llm
+    stats = {"triaged": 0, "failed": 0, "pages": 0, "llm_calls": 0, "llm_seconds": 0.0, "write_seconds": 0.0}
+    started = time.perf_counter()
+
+    cursor = None
+    seen = 0
+    while seen < max_emails:
+        page_size = min(PAGE_SIZE, max_emails - seen)
+        query = (
+            client.table("email_messages")
+            .select(TRIAGE_COLUMNS)
+            .eq("account_id", account_id)
+            .eq("folder", folder)
+            .eq("is_trash", False)
+            .is_("ai_analyzed_at", "null")
+            .gte("received_at", since.isoformat())
+            .lt("received_at", until.isoformat())
+        )
+        rows = apply_keyset(query, "received_at", cursor, page_size).execute().data or []
+        emails, cursor = page_result(rows, "received_at", page_size)
+        if not emails:
+            break
+        seen += len(emails)
+        stats["pages"] += 1
+
+        groups = [emails[i:i + EMAILS_PER_CALL] for i in range(0, len(emails), EMAILS_PER_CALL)]
+        llm_started = time.perf_counter()
+        results = chain.batch(
+            [
+                {"count": len(group), "emails": "\n\n".join(_format_email(n, e) for n, e in enumerate(group, 1))}
+                for group in groups
+            ],
+            config={"max_concurrency": MAX_CONCURRENCY},
+            return_exceptions=True,
+        )
+        stats["llm_seconds"] += time.perf_counter() - llm_started
+        stats["llm_calls"] += len(groups)
+
+        updates = []
+        for group, result in zip(groups, results):
+            try:
+                items = [] if isinstance(result, Exception) else _parse_results(result.content)
+            except ValueError:
+                items = []
+            by_number = {}
+            for item in items:
+                try:
+                    by_number[int(item.get("n"))] = item
+                except (TypeError, ValueError):
+                    continue
+            for n, email in enumerate(group, 1):
+                item = by_number.get(n)
+                if item:
+                    updates.append(_to_update(email, item))
+                else:
+                    stats["failed"] += 1
+
+        if updates:
+            write_started = time.perf_counter()
+            client.rpc("bulk_update_email_triage", {"p_updates": updates}).execute()
+            stats["write_seconds"] += time.perf_counter() - write_started
+            stats["triaged"] += len(updates)
+
+        if not cursor:
+            break
+
+    elapsed = time.perf_counter() - started
+    stats["elapsed_seconds"] = round(elapsed, 3)
+    stats["llm_seconds"] = round(stats["llm_seconds"], 3)
+    stats["write_seconds"] = round(stats["write_seconds"], 3)
+    stats["emails_per_second"] = round(stats["triaged"] / elapsed, 2) if elapsed else 0.0
+    stats["has_more"] = cursor is not None
+    return stats
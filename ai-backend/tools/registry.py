@@ -1,12 +1,114 @@
-from typing import Dict, List
+from typing import Any, Callable, Dict, Iterable, List
+import functools
+import inspect
+import json
+import threading
+
 from langchain_core.tools import BaseTool
 
+from utils.metrics import hit_counter
+from utils.ttl_cache import TTLCache
+
 # Global tool registry
 _tools: Dict[str, BaseTool] = {}
 
+# Memoized results of read tools, validated against entity tag versions
+_result_cache = TTLCache(maxsize=2048)
+_tag_versions: Dict[str, int] = {}
+_tag_lock = threading.Lock()
+
+# Maps a tool's bound arguments to the entity keys (tags) it reads or writes
+TagFunction = Callable[[Dict[str, Any]], Iterable[str]]
+
+
+def _tag_snapshot(tags: Iterable[str]) -> Dict[str, int]:
+    with _tag_lock:
+        return {tag: _tag_versions.get(tag, 0) for tag in tags}
+
+
+def invalidate_cache(*tags: str) -> None:
+    """Invalidate every cached tool result that depends on any of the given tags"""
+    with _tag_lock:
+        for tag in tags:
+            _tag_versions[tag] = _tag_versions.get(tag, 0) + 1
+
+
+def _bind_arguments(func: Callable, args: tuple, kwargs: dict) -> Dict[str, Any]:
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+
+def is_failure_result(result: Any) -> bool:
+    """Tools report failures as {"success": false, ...}; those are never cached"""
+    if not isinstance(result, str) or not result.startswith("{"):
+        return False
+    try:
+        return json.loads(result).get("success") is False
+    except ValueError:
+        return False
+
+
+def _wrap_cached(tool: BaseTool, ttl: float, cache_tags: TagFunction) -> None:
+    func = tool.func
+    counter = hit_counter(f"tool:{tool.name}")
+
+    @functools.wraps(func)
+    def cached(*args, **kwargs):
+        arguments = _bind_arguments(func, args, kwargs)
+        key = (tool.name, json.dumps(arguments, sort_keys=True, default=str, ensure_ascii=False))
+
+        entry = _result_cache.get(key)
+        if entry is not None:
+            result, versions = entry
+            if _tag_snapshot(versions) == versions:
+                counter.hit()
+                return result
+
+        counter.miss()
+        # Snapshot before running so a write that lands mid-call invalidates this result
+        versions = _tag_snapshot(cache_tags(arguments))
+        result = func(*args, **kwargs)
+        if not is_failure_result(result):
+            _result_cache.set(key, (result, versions), ttl=ttl)
+        return result
+
+    tool.func = cached
+
+
+def _wrap_invalidating(tool: BaseTool, invalidates: TagFunction) -> None:
+    func = tool.func
+
+    @functools.wraps(func)
+    def invalidating(*args, **kwargs):
+        arguments = _bind_arguments(func, args, kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            invalidate_cache(*invalidates(arguments))
+
+    tool.func = invalidating
+
+
+def register_tool(
+    tool: BaseTool,
+    cache_ttl: float | None = None,
+    cache_tags: TagFunction | None = None,
+    invalidates: TagFunction | None = None,
+) -> None:
+    """
+    Register a tool in the global registry.
 
-def register_tool(tool: BaseTool) -> None:
-    """Register a tool in the global registry"""
+    Read tools opt into memoization with cache_ttl (seconds) and cache_tags,
+    which returns the entity keys the result depends on (e.g. "doc:<id>").
+    Mutating tools pass invalidates, returning the entity keys they change;
+    cached results tagged with any of them are dropped. Per-tool hit rates
+    are reported as "tool:<name>" in utils.metrics.cache_stats().
+    """
+    if cache_ttl:
+        _wrap_cached(tool, cache_ttl, cache_tags or (lambda arguments: ()))
+    if invalidates:
+        _wrap_invalidating(tool, invalidates)
     _tools[tool.name] = tool
 
 
@@ -1,7 +1,22 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import asyncio
+import functools
+import json
+import time
+import os
+import tempfile
 
-from .registry import list_tools_info, get_tool
+from .registry import invalidate_cache, is_failure_result, list_tools_info, get_tool
+from .sheet_import import MAX_IMPORT_BYTES, import_sheet_file
+from .doc_index import index_project_documents, indexer
+from .doc_summarizer import summarizer
+from .email import email_triage_batch
+from utils.metrics import cache_stats, timing_stats
+from utils.supabase import get_async_client
 
 router = APIRouter()
 
@@ -39,6 +54,236 @@ async def execute_tool(request: ToolExecuteRequest):
         return ToolExecuteResponse(result=str(e), success=False)
 
 
+# Limits for /execute_batch
+MAX_BATCH_CALLS = 100
+MAX_BATCH_CONCURRENCY = 16
+
+# Sync tools in batches run here, not in the loop's default executor: a timed-out call keeps
+# its thread until the tool returns, and must not starve every other to_thread/sync-tool path
+_batch_executor = ThreadPoolExecutor(max_workers=MAX_BATCH_CONCURRENCY, thread_name_prefix="tool-batch")
+
+
+async def _invoke_batch_call(tool, args: dict):
+    if getattr(tool, "coroutine", None) is not None:
+        return await tool.ainvoke(args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_batch_executor, functools.partial(tool.invoke, args))
+
+
+class ToolBatchCall(BaseModel):
+    name: str
+    args: dict = {}
+    timeout: Optional[float] = None  # Overrides ToolBatchRequest.timeout for this call
+
+
+class ToolBatchRequest(BaseModel):
+    calls: list[ToolBatchCall]
+    max_concurrency: int = 8
+    timeout: float = 30.0
+
+
+class ToolBatchResult(BaseModel):
+    index: int
+    name: str
+    result: str
+    success: bool
+    elapsed_ms: float
+
+
+class ToolBatchResponse(BaseModel):
+    results: list[ToolBatchResult]
+    elapsed_ms: float
+
+
+def _start_batch(request: ToolBatchRequest) -> list[asyncio.Task]:
+    """Validate a batch and schedule every call (bounded by a semaphore)"""
+    if len(request.calls) > MAX_BATCH_CALLS:
+        raise HTTPException(status_code=400, detail=f"Too many calls (max {MAX_BATCH_CALLS})")
+
+    semaphore = asyncio.Semaphore(max(1, min(request.max_concurrency, MAX_BATCH_CONCURRENCY)))
+
+    async def run(index: int, call: ToolBatchCall) -> ToolBatchResult:
+        async with semaphore:
+            started = time.perf_counter()
+            tool = get_tool(call.name)
+            if not tool:
+                result, success = f"Tool '{call.name}' not found", False
+            else:
+                try:
+                    # Sync tools keep running in their batch worker thread after a timeout;
+                    # only the result is abandoned
+                    result = str(await asyncio.wait_for(_invoke_batch_call(tool, call.args), call.timeout or request.timeout))
+                    # Tools report their own failures as {"success": false, ...}
+                    success = not is_failure_result(result)
+                except asyncio.TimeoutError:
+                    result, success = f"Timed out after {call.timeout or request.timeout}s", False
+                except Exception as e:
+                    result, success = str(e), False
+
+            return ToolBatchResult(
+                index=index,
+                name=call.name,
+                result=result,
+                success=success,
+                elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+            )
+
+    return [asyncio.create_task(run(i, call)) for i, call in enumerate(request.calls)]
+
+
+@router.post("/execute_batch", response_model=ToolBatchResponse)
+async def execute_tool_batch(request: ToolBatchRequest):
+    """Execute several tools concurrently; results are returned in request order"""
+    started = time.perf_counter()
+    results = await asyncio.gather(*_start_batch(request))
+    return ToolBatchResponse(results=results, elapsed_ms=round((time.perf_counter() - started) * 1000, 2))
+
+
+@router.post("/execute_batch/stream")
+async def execute_tool_batch_stream(request: ToolBatchRequest):
+    """Execute several tools concurrently, streaming each result (NDJSON) as soon as it finishes"""
+    tasks = _start_batch(request)
+
+    async def generate():
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                yield json.dumps(result.model_dump(), ensure_ascii=False) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.post("/ai_sheet/import")
+async def import_sheet(
+    team_id: str = Form(...),
+    file: UploadFile = File(...),
+    name: Optional[str] = Form(None),
+    description: Optional[str] = Form(None),
+    project_id: Optional[str] = Form(None),
+):
+    """Import a CSV/XLSX upload into a new sheet, streaming progress events"""
+    filename = file.filename or "import.csv"
+
+    # Spool the upload to disk in fixed-size blocks so memory stays bounded
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(filename)[1])
+    size = 0
+    with os.fdopen(fd, "wb") as f:
+        while data := await file.read(1024 * 1024):
+            size += len(data)
+            if size > MAX_IMPORT_BYTES:
+                break
+            f.write(data)
+    if size > MAX_IMPORT_BYTES:
+        os.remove(path)
+        raise HTTPException(status_code=413, detail=f"File exceeds {MAX_IMPORT_BYTES // (1024 * 1024)}MB")
+
+    def generate():
+        try:
+            for event in import_sheet_file(path, filename, team_id, name, description, project_id):
+                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'message': str(e)}, ensure_ascii=False)}\n\n"
+        finally:
+            os.remove(path)
+            # Imports here bypass the ai_sheet_import tool wrapper, so drop cached sheet lists explicitly
+            invalidate_cache("sheets:list")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        },
+    )
+
+
+class DocsReindexRequest(BaseModel):
+    project_id: str
+
+
+@router.post("/ai_docs/reindex")
+def reindex_docs(request: DocsReindexRequest):
+    """Build/refresh chunk embeddings for every document in a project"""
+    try:
+        return {"success": True, "stats": index_project_documents(request.project_id)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class EmailTriageRequest(BaseModel):
+    account_id: str
+    folder: str = "INBOX"
+    days: int = 7
+    max_emails: int = 500
+
+
+@router.post("/email/triage")
+def triage_email_batch(request: EmailTriageRequest):
+    """Classify every untriaged email in a folder/time window (see email_triage_batch)"""
+    result = json.loads(email_triage_batch.invoke(request.model_dump()))
+    if not result.get("success"):
+        raise HTTPException(status_code=500, detail=result.get("error"))
+    return result
+
+
+class EmailReindexRequest(BaseModel):
+    account_id: str
+    batch_size: int = 2000
+
+
+@router.post("/email/reindex")
+async def reindex_email_search(request: EmailReindexRequest):
+    """Index emails synced before the search_vector trigger existed, newest first (backfill)"""
+    try:
+        client = get_async_client()
+        total = 0
+        while True:
+            result = await client.rpc("index_email_search", {
+                "p_account_id": request.account_id,
+                "p_limit": request.batch_size,
+            }).execute()
+            indexed = result.data or 0
+            total += indexed
+            if indexed < request.batch_size:
+                break
+        return {"success": True, "indexed": total}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Result cache hit rates"""
+    return {"caches": cache_stats()}
+
+
+@router.get("/db/stats")
+async def get_db_stats():
+    """Per-query database timings (count, errors, retries, avg/p95/max ms)"""
+    return {"queries": timing_stats("db:")}
+
+
+@router.get("/ai_docs/summarizer/stats")
+async def summarizer_stats():
+    """Background document summarizer throughput"""
+    return summarizer.stats()
+
+
+@router.get("/ai_docs/indexer/stats")
+async def indexer_stats():
+    """Background chunk indexer throughput"""
+    return indexer.stats()
+
+
 @router.get("/{tool_name}")
 async def get_tool_info(tool_name: str):
     """Get information about a specific tool"""
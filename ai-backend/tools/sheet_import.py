@@ -0,0 +1,350 @@
+"""
+Sheet Import - CSV/XLSX 스트리밍 가져오기
+파일을 한 번에 메모리에 올리지 않고 행 단위로 읽어 청크 단위로 sheets에 기록
+"""
+from typing import Any, Iterator, Optional
+import csv
+import ipaddress
+import math
+import os
+import re
+import socket
+import tempfile
+import uuid
+from datetime import datetime
+from urllib.parse import urljoin, urlparse
+
+import httpx
+
+from config import get_settings
+from utils.supabase import get_supabase_client
+
+settings = get_settings()
+
+# Rows used to infer column types before the sheet is created
+SAMPLE_ROWS = 200
+# Rows written per append_sheet_rows call. sheets.rows is a single jsonb value, so every
+# append rewrites the whole array server-side (O(n^2) over an import); large chunks keep
+# the number of rewrites low. Imports far beyond ~100k rows need a row table instead.
+CHUNK_ROWS = 5000
+# Largest file accepted for import (uploads and URLs); the download is aborted past this
+MAX_IMPORT_BYTES = 50 * 1024 * 1024
+# Redirects followed when fetching a file URL (each target is validated)
+MAX_REDIRECTS = 5
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_URL_RE = re.compile(r"^https?://\S+$", re.IGNORECASE)
+_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S")
+_BOOL_VALUES = {"true": True, "false": False, "yes": True, "no": False, "y": True, "n": False}
+
+
+def _detect_encoding(path: str) -> str:
+    """Pick utf-8 (BOM tolerated) or cp949 by decoding the head of the file"""
+    with open(path, "rb") as f:
+        head = f.read(64 * 1024)
+    try:
+        head.decode("utf-8-sig")
+        return "utf-8-sig"
+    except UnicodeDecodeError as e:
+        # A multi-byte character may be cut at the block boundary
+        if e.start >= len(head) - 3:
+            return "utf-8-sig"
+    return "cp949"
+
+
+def _iter_csv_rows(path: str) -> Iterator[list[Any]]:
+    """Stream rows from a CSV file"""
+    with open(path, newline="", encoding=_detect_encoding(path), errors="replace") as f:
+        yield from csv.reader(f)
+
+
+def _iter_xlsx_rows(path: str) -> Iterator[list[Any]]:
+    """Stream rows from the first worksheet of an XLSX file"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ValueError("XLSX 가져오기에는 openpyxl 패키지가 필요합니다.") from e
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def iter_file_rows(path: str, filename: str) -> Iterator[list[Any]]:
+    """Stream raw rows (header included) from a CSV or XLSX file"""
+    ext = os.path.splitext(filename or path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        return _iter_xlsx_rows(path)
+    if ext in (".csv", ".txt", ""):
+        return _iter_csv_rows(path)
+    raise ValueError(f"지원하지 않는 파일 형식입니다: {ext} (csv, xlsx 지원)")
+
+
+def _parse_number(value: Any) -> Optional[float | int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    text = str(value).strip().replace(",", "")
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    # "nan"/"inf" parse as floats but are not valid JSON for the jsonb RPC
+    return number if math.isfinite(number) else None
+
+
+def _parse_date(value: Any) -> Optional[str]:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    text = str(value).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        return parsed.isoformat() if "%H" in fmt else parsed.date().isoformat()
+    return None
+
+
+def _infer_type(values: list[Any]) -> str:
+    """Pick the narrowest sheet column type that fits every non-empty sample value"""
+    values = [v for v in values if v is not None and str(v).strip() != ""]
+    if not values:
+        return "text"
+
+    if all(isinstance(v, bool) or str(v).strip().lower() in _BOOL_VALUES for v in values):
+        return "checkbox"
+    if all(_parse_number(v) is not None for v in values):
+        return "number"
+    if all(_parse_date(v) is not None for v in values):
+        return "date"
+    if all(_EMAIL_RE.match(str(v).strip()) for v in values):
+        return "email"
+    if all(_URL_RE.match(str(v).strip()) for v in values):
+        return "url"
+    return "text"
+
+
+def infer_columns(header: list[Any], sample: list[list[Any]]) -> list[dict]:
+    """Build the sheets.columns schema (same shape as ai_sheet_create) from a header and sample rows"""
+    columns = []
+    for i, name in enumerate(header):
+        values = [row[i] if i < len(row) else None for row in sample]
+        columns.append({
+            "id": f"col_{i + 1}",
+            "name": str(name).strip() if name not in (None, "") else f"Column {i + 1}",
+            "type": _infer_type(values),
+            "width": 150,
+        })
+    return columns
+
+
+def _convert_value(value: Any, column_type: str) -> Any:
+    """Convert a raw cell into the JSON value stored for its column type"""
+    if value is None or str(value).strip() == "":
+        return None
+    if column_type == "number":
+        number = _parse_number(value)
+        return number if number is not None else str(value)
+    if column_type == "checkbox":
+        if isinstance(value, bool):
+            return value
+        return _BOOL_VALUES.get(str(value).strip().lower(), False)
+    if column_type == "date":
+        return _parse_date(value) or str(value)
+    return str(value).strip()
+
+
+def _to_row(raw: list[Any], columns: list[dict]) -> dict:
+    row = {"id": str(uuid.uuid4())[:8]}
+    for i, col in enumerate(columns):
+        row[col["id"]] = _convert_value(raw[i] if i < len(raw) else None, col["type"])
+    return row
+
+
+def import_sheet_file(
+    path: str,
+    filename: str,
+    team_id: str,
+    name: Optional[str] = None,
+    description: Optional[str] = None,
+    project_id: Optional[str] = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[dict]:
+    """
+    Import a CSV/XLSX file into a new sheet, yielding progress events.
+
+    Only SAMPLE_ROWS rows (for type inference) plus one chunk are held in
+    memory at a time; each chunk is appended server-side via the
+    append_sheet_rows RPC so the stored rows array is never downloaded.
+
+    Yields:
+        {"type": "sheet_created", "sheet": {...}}
+        {"type": "progress", "rows_imported": n}
+        {"type": "done", "sheet_id": "...", "rows_imported": n, "columns": [...]}
+    """
+    client = get_supabase_client()
+    rows = iter_file_rows(path, filename)
+
+    header = next(rows, None)
+    if not header or not any(h not in (None, "") for h in header):
+        raise ValueError("헤더 행이 없는 파일입니다.")
+
+    sample = []
+    for raw in rows:
+        if not any(v not in (None, "") for v in raw):
+            continue
+        sample.append(raw)
+        if len(sample) >= SAMPLE_ROWS:
+            break
+
+    columns = infer_columns(header, sample)
+
+    result = client.table("sheets").insert({
+        "team_id": team_id,
+        "name": name or os.path.splitext(os.path.basename(filename))[0],
+        "description": description,
+        "columns": columns,
+        "rows": [],
+        "project_id": project_id,
+        "settings": {"frozen_columns": 0, "frozen_rows": 0},
+    }).execute()
+
+    if not result.data:
+        raise ValueError("시트 생성 실패")
+
+    sheet = result.data[0]
+    completed = False
+    try:
+        yield {
+            "type": "sheet_created",
+            "sheet": {"id": sheet["id"], "name": sheet["name"], "columns": columns},
+        }
+
+        imported = 0
+        chunk: list[dict] = []
+
+        def flush() -> int:
+            client.rpc("append_sheet_rows", {"p_sheet_id": sheet["id"], "p_rows": chunk}).execute()
+            return len(chunk)
+
+        for raw in sample:
+            chunk.append(_to_row(raw, columns))
+
+        for raw in rows:
+            if not any(v not in (None, "") for v in raw):
+                continue
+            chunk.append(_to_row(raw, columns))
+            if len(chunk) >= chunk_rows:
+                imported += flush()
+                chunk = []
+                yield {"type": "progress", "rows_imported": imported}
+
+        if chunk:
+            imported += flush()
+            chunk = []
+            yield {"type": "progress", "rows_imported": imported}
+
+        completed = True
+        yield {
+            "type": "done",
+            "sheet_id": sheet["id"],
+            "rows_imported": imported,
+            "columns": columns,
+        }
+    finally:
+        # A failed or abandoned import must not leave a partially filled sheet behind
+        if not completed:
+            try:
+                client.table("sheets").delete().eq("id", sheet["id"]).execute()
+            except Exception:
+                pass  # Ignore cleanup errors
+
+
+def spool_to_tempfile(chunks: Iterator[bytes], suffix: str, max_bytes: int = MAX_IMPORT_BYTES) -> str:
+    """Write a byte stream to a temporary file and return its path (aborts past max_bytes)"""
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for data in chunks:
+                size += len(data)
+                if size > max_bytes:
+                    raise ValueError(f"파일이 너무 큽니다 (최대 {max_bytes // (1024 * 1024)}MB).")
+                f.write(data)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def _resolve_import_url(url: str) -> tuple[str, dict, dict]:
+    """
+    Validate a file URL and pin it to a checked address.
+
+    Only http(s) URLs whose host resolves to public addresses (or the
+    Supabase host) are allowed. The request is then sent to that resolved
+    address, with the original Host header and TLS server name, so the
+    name cannot be re-resolved to an internal address between the check
+    and the connect (DNS rebinding).
+
+    Returns:
+        (request URL, headers, request extensions)
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("http(s) URL 만 가져올 수 있습니다.")
+    host = parsed.hostname
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+
+    try:
+        addresses = [info[4][0].split("%", 1)[0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)]
+    except socket.gaierror as e:
+        raise ValueError(f"호스트를 찾을 수 없습니다: {host}") from e
+    if host != urlparse(settings.supabase_url).hostname:
+        for address in addresses:
+            if not ipaddress.ip_address(address).is_global:
+                raise ValueError(f"내부 주소로는 가져올 수 없습니다: {host}")
+
+    address = addresses[0]
+    netloc = f"[{address}]:{port}" if ":" in address else f"{address}:{port}"
+    headers = {"Host": parsed.netloc.rsplit("@", 1)[-1]}
+    extensions = {"sni_hostname": host} if parsed.scheme == "https" else {}
+    return parsed._replace(netloc=netloc).geturl(), headers, extensions
+
+
+def download_to_tempfile(url: str, suffix: str, max_bytes: int = MAX_IMPORT_BYTES) -> str:
+    """
+    Download a file URL to a temporary file for import.
+
+    Only http(s) URLs on public hosts are fetched (see _resolve_import_url);
+    redirects are followed manually so every hop is checked, and the
+    download is aborted once it exceeds max_bytes.
+    """
+    with httpx.Client(timeout=60, follow_redirects=False) as client:
+        for _ in range(MAX_REDIRECTS + 1):
+            request_url, headers, extensions = _resolve_import_url(url)
+            request = client.build_request("GET", request_url, headers=headers, extensions=extensions)
+            response = client.send(request, stream=True)
+            try:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers["location"])
+                    continue
+                response.raise_for_status()
+                length = response.headers.get("content-length")
+                if length and length.isdigit() and int(length) > max_bytes:
+                    raise ValueError(f"파일이 너무 큽니다 (최대 {max_bytes // (1024 * 1024)}MB).")
+                return spool_to_tempfile(response.iter_bytes(), suffix, max_bytes)
+            finally:
+                response.close()
+    raise ValueError("리다이렉트가 너무 많습니다.")
@@ -1,12 +1,116 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit
+import threading
+
 from langchain_core.tools import tool
 from tavily import TavilyClient
 from duckduckgo_search import DDGS
 
 from config import get_settings
 from .registry import register_tool
+from utils.metrics import hit_counter
+from utils.ttl_cache import TTLCache
 
 settings = get_settings()
 
+# Seconds a query's results are reused
+CACHE_TTL = 600
+# Seconds to wait for Tavily before also starting DuckDuckGo
+PRIMARY_HEDGE_SECONDS = 2.0
+# Queries accepted by web_search_many
+MAX_QUERIES = 8
+
+_cache = TTLCache(maxsize=512, ttl=CACHE_TTL)
+_cache_counter = hit_counter("web_search")
+# Separate pools so fan-out tasks never wait on provider calls queued behind them
+_provider_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="web-search")
+_fanout_executor = ThreadPoolExecutor(max_workers=MAX_QUERIES, thread_name_prefix="web-search-many")
+_ddgs_local = threading.local()
+
+
+@lru_cache
+def _get_tavily() -> TavilyClient:
+    """Shared Tavily client (keeps its HTTP session across calls)"""
+    return TavilyClient(api_key=settings.tavily_api_key)
+
+
+def _get_ddgs() -> DDGS:
+    """One DuckDuckGo session per worker thread (sessions are not thread-safe)"""
+    if not hasattr(_ddgs_local, "client"):
+        _ddgs_local.client = DDGS()
+    return _ddgs_local.client
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""))
+
+
+def _search_tavily(query: str, max_results: int) -> list[dict]:
+    response = _get_tavily().search(query, max_results=max_results)
+    return [
+        {"title": r["title"], "content": r["content"], "url": r["url"]}
+        for r in response.get("results", [])
+    ]
+
+
+def _search_ddgs(query: str, max_results: int) -> list[dict]:
+    return [
+        {"title": r["title"], "content": r["body"], "url": r["href"]}
+        for r in _get_ddgs().text(query, max_results=max_results)
+    ]
+
+
+def _search_hedged(query: str, max_results: int) -> list[dict]:
+    """
+    Tavily first; if it has not answered within PRIMARY_HEDGE_SECONDS (or
+    fails), DuckDuckGo runs in parallel and the first successful answer wins.
+    """
+    if not settings.tavily_api_key:
+        return _search_ddgs(query, max_results)
+
+    primary = _provider_executor.submit(_search_tavily, query, max_results)
+    done, _ = wait([primary], timeout=PRIMARY_HEDGE_SECONDS)
+    if done and not primary.exception():
+        return primary.result()
+
+    pending = {primary, _provider_executor.submit(_search_ddgs, query, max_results)}
+    errors = []
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception():
+                errors.append(future.exception())
+                continue
+            for other in pending:
+                other.cancel()
+            return future.result()
+    raise errors[-1]
+
+
+def search(query: str, max_results: int = 5) -> list[dict]:
+    """Cached web search returning [{"title", "content", "url"}, ...]"""
+    key = (_normalize_query(query), max_results)
+    cached = _cache.get(key)
+    if cached is not None:
+        _cache_counter.hit()
+        return cached
+
+    _cache_counter.miss()
+    results = _search_hedged(query, max_results)
+    _cache.set(key, results)
+    return results
+
+
+def _format_results(results: list[dict]) -> str:
+    formatted = [f"**{r['title']}**\n{r['content']}\nURL: {r['url']}\n" for r in results]
+    return "\n---\n".join(formatted) if formatted else "No results found."
+
 
 @tool
 def web_search_tool(query: str, max_results: int = 5) -> str:
@@ -21,26 +125,56 @@ def web_search_tool(query: str, max_results: int = 5) -> str:
         Search results as formatted text
     """
     try:
-        # Try Tavily first
-        if settings.tavily_api_key:
-            client = TavilyClient(api_key=settings.tavily_api_key)
-            response = client.search(query, max_results=max_results)
+        return _format_results(search(query, max_results))
+
+    except Exception as e:
+        return f"Search error: {str(e)}"
 
-            results = []
-            for r in response.get("results", []):
-                results.append(f"**{r['title']}**\n{r['content']}\nURL: {r['url']}\n")
 
-            return "\n---\n".join(results) if results else "No results found."
+@tool
+def web_search_many(queries: list[str], max_results: int = 5) -> str:
+    """
+    Search the web for several related queries at once.
+    Use this instead of calling web_search_tool repeatedly. Results from all
+    queries are merged and duplicate pages are removed.
+
+    Args:
+        queries: Search queries (up to 8)
+        max_results: Maximum results per query (default: 5)
+
+    Returns:
+        Merged search results as formatted text
+    """
+    try:
+        queries = list(dict.fromkeys(q for q in queries if q.strip()))[:MAX_QUERIES]
+        if not queries:
+            return "No results found."
 
-        # Fallback to DuckDuckGo
-        with DDGS() as ddgs:
-            results = list(ddgs.text(query, max_results=max_results))
+        futures = [_fanout_executor.submit(search, q, max_results) for q in queries]
 
-            formatted = []
+        merged: dict[str, dict] = {}
+        errors = []
+        for query, future in zip(queries, futures):
+            try:
+                results = future.result()
+            except Exception as e:
+                errors.append(f"{query}: {str(e)}")
+                continue
             for r in results:
-                formatted.append(f"**{r['title']}**\n{r['body']}\nURL: {r['href']}\n")
+                url = _normalize_url(r["url"])
+                if url in merged:
+                    merged[url]["queries"].append(query)
+                else:
+                    merged[url] = {**r, "queries": [query]}
 
-            return "\n---\n".join(formatted) if formatted else "No results found."
+        formatted = [
+            f"**{r['title']}**\n{r['content']}\nURL: {r['url']}\nQueries: {', '.join(r['queries'])}\n"
+            for r in merged.values()
+        ]
+        output = "\n---\n".join(formatted) if formatted else "No results found."
+        if errors:
+            output += "\n\nSearch errors:\n" + "\n".join(errors)
+        return output
 
     except Exception as e:
         return f"Search error: {str(e)}"
@@ -48,3 +182,4 @@ def web_search_tool(query: str, max_results: int = 5) -> str:
 
 # Register the tool
 register_tool(web_search_tool)
+register_tool(web_search_many)
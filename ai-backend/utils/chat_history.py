@@ -0,0 +1,349 @@
+"""
+Chat History - agent_chat_history 저장/조회
+save_chat_message 는 행을 write-behind 버퍼에 넣고 즉시 반환하며, 백그라운드 태스크가 크기/시간 기준으로 bulk insert
+버퍼의 행은 로컬 spill 파일에도 기록되어 프로세스가 비정상 종료되어도 재시작 시 다시 저장
+DB 가 거부한 행(제약 조건/데이터 오류)은 배치를 나눠 골라낸 뒤 dead-letter 파일로 옮겨 나머지 저장을 막지 않음
+활성 세션의 최근 메시지는 메모리 링 버퍼에서 조회하고, 이전 기록은 keyset 페이지네이션으로 조회
+"""
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+import asyncio
+import json
+import os
+import time
+import uuid
+
+from postgrest.exceptions import APIError
+
+from config import get_settings
+from utils.metrics import hit_counter, latency_stats
+from utils.pagination import apply_keyset, encode_cursor, page_result
+from utils.supabase import get_async_client
+
+settings = get_settings()
+
+# Rows per bulk insert; a full batch is flushed immediately
+FLUSH_MAX_ROWS = 200
+# Longest a queued row waits before being flushed (seconds)
+FLUSH_INTERVAL = 1.0
+# Upper bound for the retry delay after failed flushes (seconds)
+RETRY_MAX_SECONDS = 30.0
+# Newest messages kept in memory per session, and sessions kept (least recently used evicted)
+RECENT_MESSAGES = 100
+MAX_CACHED_SESSIONS = 1000
+
+
+def _is_row_error(error: Exception) -> bool:
+    """
+    Whether the database rejected the data itself (SQLSTATE class 22 data
+    exception or 23 integrity violation, e.g. an FK to a deleted agent).
+
+    Those fail the same way on every retry, but only for the offending
+    rows. Transport errors, 5xx responses and schema/permission errors
+    affect every row and are retried with backoff instead.
+    """
+    code = getattr(error, "code", None)
+    return isinstance(error, APIError) and isinstance(code, str) and code[:2] in ("22", "23")
+
+
+class ChatHistoryWriter:
+    """
+    Write-behind buffer for agent_chat_history.
+
+    Rows carry client-generated ids and timestamps, so they keep their
+    order however late they land and replaying the spill file after a
+    crash never inserts a row twice (upsert with ignore_duplicates).
+    Every queued row is appended to the spill file before enqueue()
+    returns; the file is truncated (or rewritten with the rows still
+    pending) once per flush, not per batch.
+
+    A batch the database rejects is bisected until the offending rows are
+    isolated; those go to the dead-letter file so they cannot block every
+    other session's history.
+    """
+
+    def __init__(self, spill_path: str, dead_letter_path: str):
+        self.spill_path = spill_path
+        self.dead_letter_path = dead_letter_path
+        self._queue: list[dict] = []
+        self._spill = None
+        self._task: asyncio.Task | None = None
+        self._wake: asyncio.Event | None = None
+        self._flush_stats = latency_stats("chat_history:flush")
+        self._stats = {
+            "enqueued": 0,
+            "flushed": 0,
+            "batches": 0,
+            "failed_flushes": 0,
+            "dead_lettered": 0,
+            "recovered": 0,
+        }
+
+    def start(self) -> None:
+        if self._task:
+            return
+        self._recover()
+        self._spill = open(self.spill_path, "a", encoding="utf-8")
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"[ChatHistoryWriter] final flush failed, {len(self._queue)} rows kept in {self.spill_path}: {e}")
+        self._spill.close()
+        self._spill = None
+
+    def enqueue(self, row: dict) -> None:
+        """Queue a row for insertion; never waits on the database"""
+        if self._spill is None:
+            raise RuntimeError("ChatHistoryWriter is not running")
+        self._spill.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._spill.flush()
+        self._queue.append(row)
+        self._stats["enqueued"] += 1
+        if len(self._queue) >= FLUSH_MAX_ROWS:
+            self._wake.set()
+
+    async def flush(self) -> None:
+        """Insert every queued row, FLUSH_MAX_ROWS at a time"""
+        client = get_async_client()
+        flushed = False
+        try:
+            while self._queue:
+                batch = self._queue[:FLUSH_MAX_ROWS]
+                started = time.perf_counter()
+                try:
+                    rejected = await self._insert(client, batch)
+                except Exception:
+                    self._flush_stats.record((time.perf_counter() - started) * 1000, error=True)
+                    self._stats["failed_flushes"] += 1
+                    raise
+                self._flush_stats.record((time.perf_counter() - started) * 1000)
+
+                if rejected:
+                    self._dead_letter(rejected)
+                # Rows enqueued during the insert were appended after the batch
+                del self._queue[:len(batch)]
+                self._stats["flushed"] += len(batch) - len(rejected)
+                self._stats["batches"] += 1
+                flushed = True
+        finally:
+            if flushed:
+                self._rewrite_spill()
+
+    async def _insert(self, client, rows: list[dict]) -> list[tuple[dict, str]]:
+        """Upsert rows, bisecting around rows the database rejects; returns (row, error) for those"""
+        try:
+            await client.table("agent_chat_history").upsert(rows, ignore_duplicates=True).execute()
+            return []
+        except Exception as e:
+            if not _is_row_error(e):
+                raise
+            if len(rows) == 1:
+                return [(rows[0], str(e))]
+
+        middle = len(rows) // 2
+        return await self._insert(client, rows[:middle]) + await self._insert(client, rows[middle:])
+
+    def _dead_letter(self, rejected: list[tuple[dict, str]]) -> None:
+        directory = os.path.dirname(self.dead_letter_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            for row, error in rejected:
+                f.write(json.dumps({"row": row, "error": error}, ensure_ascii=False) + "\n")
+        self._stats["dead_lettered"] += len(rejected)
+        print(f"[ChatHistoryWriter] {len(rejected)} rejected rows moved to {self.dead_letter_path}")
+
+    async def _run(self) -> None:
+        delay = FLUSH_INTERVAL
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            try:
+                await self.flush()
+                delay = FLUSH_INTERVAL
+            except Exception as e:
+                print(f"[ChatHistoryWriter] flush error: {e}")
+                delay = min(delay * 2, RETRY_MAX_SECONDS)
+
+    def _recover(self) -> None:
+        """Queue rows left in the spill file by a previous process"""
+        directory = os.path.dirname(self.spill_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(self.spill_path):
+            return
+
+        with open(self.spill_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._queue.append(json.loads(line))
+                    self._stats["recovered"] += 1
+                except ValueError:
+                    continue  # Torn last line from a crash mid-write
+
+    def _rewrite_spill(self) -> None:
+        """Drop flushed rows from the spill file (a plain truncate when the queue drained)"""
+        self._spill.close()
+        if self._queue:
+            tmp_path = f"{self.spill_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for row in self._queue:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.spill_path)
+            self._spill = open(self.spill_path, "a", encoding="utf-8")
+        else:
+            self._spill = open(self.spill_path, "w", encoding="utf-8")
+
+    def pending(self, agent_id: str, session_id: str) -> list[dict]:
+        """Queued rows of a session that may not be in the table yet"""
+        return [r for r in self._queue if r["agent_id"] == agent_id and r["session_id"] == session_id]
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "queue_depth": len(self._queue),
+            "running": self._task is not None,
+            "flush_latency": self._flush_stats.snapshot(),
+        }
+
+
+class _SessionBuffer:
+    def __init__(self, rows: list[dict], complete: bool):
+        self.rows: deque[dict] = deque(rows, maxlen=RECENT_MESSAGES)
+        # True while rows hold the session's entire history
+        self.complete = complete
+
+
+class RecentMessages:
+    """LRU of per-session ring buffers with each session's newest messages, oldest first"""
+
+    def __init__(self, max_sessions: int):
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[tuple[str, str], _SessionBuffer] = OrderedDict()
+
+    def get(self, key: tuple[str, str]) -> _SessionBuffer | None:
+        buffer = self._sessions.get(key)
+        if buffer is not None:
+            self._sessions.move_to_end(key)
+        return buffer
+
+    def fill(self, key: tuple[str, str], rows: list[dict], complete: bool) -> _SessionBuffer:
+        buffer = _SessionBuffer(rows, complete)
+        self._sessions[key] = buffer
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return buffer
+
+    def append(self, key: tuple[str, str], row: dict) -> None:
+        """Add a new message to a cached session (uncached sessions are filled on next read)"""
+        buffer = self.get(key)
+        if buffer is None:
+            return
+        if len(buffer.rows) == buffer.rows.maxlen:
+            buffer.complete = False
+        buffer.rows.append(row)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+history_writer = ChatHistoryWriter(settings.chat_history_spill_path, settings.chat_history_dead_letter_path)
+recent_messages = RecentMessages(MAX_CACHED_SESSIONS)
+_history_counter = hit_counter("chat_history")
+
+
+async def save_chat_message(agent_id: str, session_id: str, message: dict) -> dict:
+    """Queue a chat message for saving; returns the row that will be stored"""
+    row = {
+        "id": str(uuid.uuid4()),
+        "agent_id": agent_id,
+        "session_id": session_id,
+        "role": message["role"],
+        "content": message["content"],
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    history_writer.enqueue(row)
+    recent_messages.append((agent_id, session_id), row)
+    return row
+
+
+async def _fetch_page(agent_id: str, session_id: str, limit: int, cursor: str | None) -> tuple[list[dict], str | None]:
+    """One page of a session's history, newest page first; rows oldest first"""
+    client = get_async_client()
+    query = (
+        client.table("agent_chat_history")
+        .select("*")
+        .eq("agent_id", agent_id)
+        .eq("session_id", session_id)
+    )
+    result = await apply_keyset(query, "created_at", cursor, limit).execute()
+    rows = result.data or []
+
+    if cursor is None:
+        # The newest messages may still be waiting in the write-behind buffer
+        stored = {r["id"] for r in rows}
+        pending = [r for r in history_writer.pending(agent_id, session_id) if r["id"] not in stored]
+        rows = pending[::-1] + rows
+
+    rows, next_cursor = page_result(rows, "created_at", limit)
+    return rows[::-1], next_cursor
+
+
+async def get_chat_history_page(
+    agent_id: str,
+    session_id: str,
+    limit: int = 50,
+    cursor: str | None = None,
+) -> dict:
+    """
+    Page through a session's history from the newest messages backwards.
+
+    The first page is served from the session's ring buffer (filled from
+    the table on first read); pass next_cursor to fetch older messages.
+
+    Returns:
+        {"messages": [...oldest first], "next_cursor": str | None}
+    """
+    if cursor is None and limit <= RECENT_MESSAGES:
+        key = (agent_id, session_id)
+        buffer = recent_messages.get(key)
+        if buffer is None:
+            _history_counter.miss()
+            rows, next_cursor = await _fetch_page(agent_id, session_id, RECENT_MESSAGES, None)
+            buffer = recent_messages.fill(key, rows, complete=next_cursor is None)
+        else:
+            _history_counter.hit()
+
+        rows = list(buffer.rows)
+        messages = rows[-limit:]
+        has_more = len(rows) > limit or not buffer.complete
+        return {
+            "messages": messages,
+            "next_cursor": encode_cursor(messages[0], "created_at") if has_more and messages else None,
+        }
+
+    messages, next_cursor = await _fetch_page(agent_id, session_id, limit, cursor)
+    return {"messages": messages, "next_cursor": next_cursor}
+
+
+async def get_chat_history(agent_id: str, session_id: str, limit: int = 50) -> list[dict]:
+    """Get the most recent chat history for an agent session, oldest first"""
+    page = await get_chat_history_page(agent_id, session_id, limit)
+    return page["messages"]
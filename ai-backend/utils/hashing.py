@@ -0,0 +1,12 @@
+"""
+Content hashing helpers for result caches
+"""
+import hashlib
+import json
+from typing import Any
+
+
+def content_hash(*parts: Any) -> str:
+    """Stable sha256 hex digest over JSON-serializable parts"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
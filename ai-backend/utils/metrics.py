@@ -0,0 +1,100 @@
+"""
+In-process counters for cache hit rates and call latencies
+"""
+from collections import deque
+import threading
+
+_counters: dict[str, "HitCounter"] = {}
+_latencies: dict[str, "LatencyStats"] = {}
+_lock = threading.Lock()
+
+
+class HitCounter:
+    """Thread-safe hit/miss counter (tools run in the thread pool)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def snapshot(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def hit_counter(name: str) -> HitCounter:
+    """Get or create the named counter"""
+    with _lock:
+        if name not in _counters:
+            _counters[name] = HitCounter(name)
+        return _counters[name]
+
+
+def cache_stats() -> dict:
+    """Snapshot of every registered counter"""
+    return {name: counter.snapshot() for name, counter in _counters.items()}
+
+
+class LatencyStats:
+    """Thread-safe call timings with a window of recent samples for percentiles"""
+
+    def __init__(self, name: str, window: int = 512):
+        self.name = name
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._recent: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_ms: float, error: bool = False, retries: int = 0) -> None:
+        with self._lock:
+            self.count += 1
+            self.errors += int(error)
+            self.retries += retries
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            self._recent.append(elapsed_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "retries": self.retries,
+                "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+                "p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 2) if recent else 0.0,
+                "max_ms": round(self.max_ms, 2),
+            }
+
+
+def latency_stats(name: str) -> LatencyStats:
+    """Get or create the named latency recorder"""
+    with _lock:
+        if name not in _latencies:
+            _latencies[name] = LatencyStats(name)
+        return _latencies[name]
+
+
+def timing_stats(prefix: str = "") -> dict:
+    """Snapshot of every latency recorder whose name starts with prefix"""
+    return {
+        name: stats.snapshot()
+        for name, stats in list(_latencies.items())
+        if name.startswith(prefix)
+    }
@@ -0,0 +1,62 @@
+"""
+Keyset (cursor) pagination helpers for PostgREST queries
+offset 대신 (정렬 컬럼, id) 기준으로 다음 페이지를 조회
+"""
+import base64
+import json
+from typing import Any
+
+
+def encode_cursor(row: dict, sort_column: str) -> str:
+    """Build an opaque cursor from the last row of a page"""
+    payload = json.dumps([row.get(sort_column), row.get("id")], ensure_ascii=False, default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[Any, str]:
+    """Decode a cursor into (sort value, id)"""
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"잘못된 커서입니다: {cursor}") from e
+    return value, row_id
+
+
+def apply_keyset(query, sort_column: str, cursor: str | None, limit: int, desc: bool = True):
+    """
+    Apply keyset ordering, cursor filter and limit to a PostgREST query.
+
+    Fetches limit + 1 rows so the caller can tell whether another page exists
+    (see page_result). NULL sort values follow PostgreSQL's default ordering:
+    first when descending, last when ascending.
+    """
+    if cursor:
+        value, row_id = decode_cursor(cursor)
+        op = "lt" if desc else "gt"
+        if value is None:
+            # Remaining NULL rows by id; when descending every non-NULL row is still ahead
+            conditions = [f"and({sort_column}.is.null,id.{op}.{row_id})"]
+            if desc:
+                conditions.append(f"{sort_column}.not.is.null")
+        else:
+            conditions = [
+                f'{sort_column}.{op}."{value}"',
+                f'and({sort_column}.eq."{value}",id.{op}.{row_id})',
+            ]
+            if not desc:
+                conditions.append(f"{sort_column}.is.null")
+        query = query.or_(",".join(conditions))
+
+    return (
+        query.order(sort_column, desc=desc)
+        .order("id", desc=desc)
+        .limit(limit + 1)
+    )
+
+
+def page_result(rows: list[dict], sort_column: str, limit: int) -> tuple[list[dict], str | None]:
+    """Trim the extra lookahead row and return (rows, next_cursor)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1], sort_column)
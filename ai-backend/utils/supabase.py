@@ -1,49 +1,220 @@
+"""
+Database access - PostgREST clients on a pooled HTTP/2 keep-alive connection
+
+get_supabase_client() is for sync code (tools run in the thread pool);
+get_async_client() is for code running on the event loop. Both expose the
+same query builder (table(...).select(...).execute(), rpc(...)), time every
+query into utils.metrics and retry requests that failed before PostgREST
+could have acted on them.
+"""
 from functools import lru_cache
-from supabase import create_client, Client
+import asyncio
+import time
+
+import httpx
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
 
 from config import get_settings
+from utils.metrics import hit_counter, latency_stats
+from utils.ttl_cache import TTLCache
 
 settings = get_settings()
 
+# Methods that may be resent after the request could have reached the server
+_IDEMPOTENT_METHODS = {"GET", "HEAD"}
+# Gateway errors worth retrying for idempotent requests
+_RETRY_STATUS = {502, 503, 504}
+# Errors raised before the request was sent; safe to retry for any method
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+_READ_ERRORS = (httpx.ReadError, httpx.ReadTimeout, httpx.RemoteProtocolError)
+# Seconds a deployed agent configuration is reused without an explicit invalidation
+DEPLOYED_AGENT_TTL = 300
+
+_deployed_agents = TTLCache(maxsize=1024, ttl=DEPLOYED_AGENT_TTL)
+_deployed_agent_counter = hit_counter("deployed_agent_config")
+
+
+def _query_label(request: httpx.Request) -> str:
+    """Metric name, e.g. GET email_messages or POST rpc/index_email_search"""
+    return f"{request.method} {request.url.path.split('/rest/v1/', 1)[-1]}"
+
+
+def _should_retry(request: httpx.Request, error: Exception | None = None, response: httpx.Response | None = None) -> bool:
+    if isinstance(error, _NOT_SENT_ERRORS):
+        return True
+    if request.method not in _IDEMPOTENT_METHODS:
+        return False
+    if error is not None:
+        return isinstance(error, _READ_ERRORS)
+    return response.status_code in _RETRY_STATUS
+
+
+def _backoff(attempt: int) -> float:
+    return 0.1 * 2 ** (attempt - 1)
+
+
+class _MeteredTransport(httpx.BaseTransport):
+    """Times each query (including the body download) and retries transient failures"""
+
+    def __init__(self, inner: httpx.BaseTransport):
+        self._inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        stats = latency_stats(f"db:{_query_label(request)}")
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = self._inner.handle_request(request)
+                response.read()
+            except httpx.TransportError as e:
+                if attempt < settings.db_max_retries and _should_retry(request, error=e):
+                    attempt += 1
+                    time.sleep(_backoff(attempt))
+                    continue
+                stats.record((time.perf_counter() - started) * 1000, error=True, retries=attempt)
+                raise
+
+            if attempt < settings.db_max_retries and _should_retry(request, response=response):
+                response.close()
+                attempt += 1
+                time.sleep(_backoff(attempt))
+                continue
+
+            stats.record((time.perf_counter() - started) * 1000, error=response.status_code >= 400, retries=attempt)
+            return response
+
+    def close(self) -> None:
+        self._inner.close()
+
+
+class _AsyncMeteredTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of _MeteredTransport"""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self._inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = latency_stats(f"db:{_query_label(request)}")
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = await self._inner.handle_async_request(request)
+                await response.aread()
+            except httpx.TransportError as e:
+                if attempt < settings.db_max_retries and _should_retry(request, error=e):
+                    attempt += 1
+                    await asyncio.sleep(_backoff(attempt))
+                    continue
+                stats.record((time.perf_counter() - started) * 1000, error=True, retries=attempt)
+                raise
+
+            if attempt < settings.db_max_retries and _should_retry(request, response=response):
+                await response.aclose()
+                attempt += 1
+                await asyncio.sleep(_backoff(attempt))
+                continue
+
+            stats.record((time.perf_counter() - started) * 1000, error=response.status_code >= 400, retries=attempt)
+            return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def _transport_options(verify: bool, proxy: str | None) -> dict:
+    options = {
+        "http2": True,
+        "verify": verify,
+        "limits": httpx.Limits(
+            max_connections=settings.db_pool_size,
+            max_keepalive_connections=settings.db_pool_size,
+        ),
+    }
+    if proxy:
+        options["proxy"] = proxy
+    return options
+
+
+class PooledPostgrestClient(SyncPostgrestClient):
+    """Sync PostgREST client on a sized HTTP/2 keep-alive pool"""
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None) -> httpx.Client:
+        return httpx.Client(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            follow_redirects=True,
+            transport=_MeteredTransport(httpx.HTTPTransport(**_transport_options(verify, proxy))),
+        )
+
+
+class AsyncPooledPostgrestClient(AsyncPostgrestClient):
+    """Async PostgREST client on a sized HTTP/2 keep-alive pool"""
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            follow_redirects=True,
+            transport=_AsyncMeteredTransport(httpx.AsyncHTTPTransport(**_transport_options(verify, proxy))),
+        )
+
+
+def _rest_url() -> str:
+    return f"{settings.supabase_url.rstrip('/')}/rest/v1"
+
+
+def _headers() -> dict:
+    key = settings.supabase_service_role_key or settings.supabase_anon_key
+    return {
+        **DEFAULT_POSTGREST_CLIENT_HEADERS,
+        "apikey": key,
+        "Authorization": f"Bearer {key}",
+    }
+
+
+@lru_cache()
+def get_supabase_client() -> PooledPostgrestClient:
+    """Get the shared sync database client"""
+    return PooledPostgrestClient(_rest_url(), headers=_headers(), timeout=settings.db_timeout)
+
 
 @lru_cache()
-def get_supabase_client() -> Client:
-    """Get Supabase client instance"""
-    return create_client(
-        settings.supabase_url,
-        settings.supabase_service_role_key or settings.supabase_anon_key,
-    )
+def get_async_client() -> AsyncPooledPostgrestClient:
+    """Get the shared async database client (use from async def code)"""
+    return AsyncPooledPostgrestClient(_rest_url(), headers=_headers(), timeout=settings.db_timeout)
+
+
+async def close_clients() -> None:
+    """Close pooled connections (app shutdown)"""
+    if get_async_client.cache_info().currsize:
+        await get_async_client().session.aclose()
+        get_async_client.cache_clear()
+    if get_supabase_client.cache_info().currsize:
+        get_supabase_client().session.close()
+        get_supabase_client.cache_clear()
 
 
 async def get_deployed_agent(agent_id: str) -> dict | None:
-    """Fetch deployed agent configuration from Supabase"""
-    client = get_supabase_client()
-    result = client.table("deployed_agents").select("*").eq("id", agent_id).single().execute()
-    return result.data if result.data else None
-
-
-async def save_chat_message(agent_id: str, session_id: str, message: dict) -> dict:
-    """Save chat message to Supabase"""
-    client = get_supabase_client()
-    result = client.table("agent_chat_history").insert({
-        "agent_id": agent_id,
-        "session_id": session_id,
-        "role": message["role"],
-        "content": message["content"],
-    }).execute()
-    return result.data
-
-
-async def get_chat_history(agent_id: str, session_id: str, limit: int = 50) -> list[dict]:
-    """Get chat history for an agent session"""
-    client = get_supabase_client()
-    result = (
-        client.table("agent_chat_history")
-        .select("*")
-        .eq("agent_id", agent_id)
-        .eq("session_id", session_id)
-        .order("created_at", desc=False)
-        .limit(limit)
-        .execute()
-    )
-    return result.data or []
+    """Fetch deployed agent configuration (cached for DEPLOYED_AGENT_TTL seconds)"""
+    config = _deployed_agents.get(agent_id)
+    if config is not None:
+        _deployed_agent_counter.hit()
+        return config
+
+    _deployed_agent_counter.miss()
+    client = get_async_client()
+    result = await client.table("deployed_agents").select("*").eq("id", agent_id).limit(1).execute()
+    config = result.data[0] if result.data else None
+    if config is not None:
+        _deployed_agents.set(agent_id, config)
+    return config
+
+
+def invalidate_deployed_agent(agent_id: str) -> None:
+    """Drop a cached deployed agent configuration (after it was changed or deleted)"""
+    _deployed_agents.pop(agent_id)
@@ -0,0 +1,238 @@
+-- Project Documents Full-text Search
+-- 한국어 바이그램(2-gram) 기반 tsvector 인덱스 + 랭킹 + 하이라이트 스니펫
+-- ai_docs_search 의 ilike 순차 스캔을 대체
+
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+-- ============================================
+-- N-gram helpers
+-- ============================================
+-- 한글 토큰은 2-gram 으로 분해 (조사/어미가 붙은 형태도 매칭: 회의록을 -> 회의, 의록, 록을)
+-- 그 외 토큰(영문/숫자)은 그대로 사용
+CREATE OR REPLACE FUNCTION korean_ngram_terms(p_text TEXT)
+RETURNS TEXT[]
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+DECLARE
+  token TEXT;
+  terms TEXT[] := '{}';
+  i INTEGER;
+BEGIN
+  FOR token IN
+    SELECT t FROM regexp_split_to_table(lower(coalesce(p_text, '')), '[[:space:][:punct:]]+') AS t
+    WHERE length(t) > 0
+  LOOP
+    IF token ~ '[가-힣]' AND length(token) >= 2 THEN
+      FOR i IN 1 .. length(token) - 1 LOOP
+        terms := terms || substr(token, i, 2);
+      END LOOP;
+    ELSE
+      terms := terms || token;
+    END IF;
+  END LOOP;
+
+  RETURN terms;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION korean_ngram_tsvector(p_text TEXT)
+RETURNS tsvector
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT to_tsvector('simple', array_to_string(korean_ngram_terms(p_text), ' '));
+$$;
+
+-- 검색어 끝의 한 글자 조사(을/를/이/가/...)는 제거 후 2-gram AND 검색
+CREATE OR REPLACE FUNCTION korean_ngram_tsquery(p_query TEXT)
+RETURNS tsquery
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+DECLARE
+  token TEXT;
+  term TEXT;
+  result tsquery;
+BEGIN
+  FOR token IN
+    SELECT t FROM regexp_split_to_table(lower(coalesce(p_query, '')), '[[:space:][:punct:]]+') AS t
+    WHERE length(t) > 0
+  LOOP
+    IF length(token) >= 3 AND right(token, 1) = ANY (ARRAY['을', '를', '이', '가', '은', '는', '에', '의', '도', '와', '과', '로']) THEN
+      token := left(token, length(token) - 1);
+    END IF;
+
+    FOREACH term IN ARRAY korean_ngram_terms(token) LOOP
+      IF result IS NULL THEN
+        result := plainto_tsquery('simple', term);
+      ELSE
+        result := result && plainto_tsquery('simple', term);
+      END IF;
+    END LOOP;
+  END LOOP;
+
+  RETURN coalesce(result, ''::tsquery);
+END;
+$$;
+
+-- ============================================
+-- search_vector column (title: A, content: B)
+-- ============================================
+ALTER TABLE project_documents ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+-- 매우 긴 문서는 앞부분 100k 자만 색인 (tsvector 1MB 제한)
+CREATE OR REPLACE FUNCTION project_documents_search_vector_update()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.search_vector :=
+    setweight(korean_ngram_tsvector(NEW.title), 'A') ||
+    setweight(korean_ngram_tsvector(left(NEW.content, 100000)), 'B');
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS project_documents_search_vector ON project_documents;
+CREATE TRIGGER project_documents_search_vector
+  BEFORE INSERT OR UPDATE OF title, content ON project_documents
+  FOR EACH ROW EXECUTE FUNCTION project_documents_search_vector_update();
+
+-- Backfill
+UPDATE project_documents
+SET search_vector =
+  setweight(korean_ngram_tsvector(title), 'A') ||
+  setweight(korean_ngram_tsvector(left(content, 100000)), 'B')
+WHERE search_vector IS NULL;
+
+-- ============================================
+-- Indexes
+-- ============================================
+-- 기존 'simple' 표현식 인덱스는 한글 조사 변형을 찾지 못하고 사용되지도 않음
+DROP INDEX IF EXISTS idx_project_documents_content_search;
+
+CREATE INDEX IF NOT EXISTS idx_project_documents_search_vector
+  ON project_documents USING gin(project_id, search_vector);
+
+-- ============================================
+-- Snippet with highlighted terms
+-- ============================================
+CREATE OR REPLACE FUNCTION project_document_snippet(
+  p_content TEXT,
+  p_query TEXT,
+  p_width INTEGER DEFAULT 200
+)
+RETURNS TEXT
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+DECLARE
+  lowered TEXT := lower(p_content);
+  term TEXT;
+  terms TEXT[] := '{}';
+  pos INTEGER;
+  best INTEGER := 0;
+  start_pos INTEGER;
+  snippet TEXT;
+BEGIN
+  FOR term IN
+    SELECT t FROM regexp_split_to_table(lower(p_query), '[[:space:]]+') AS t
+    WHERE length(t) > 0
+  LOOP
+    pos := strpos(lowered, term);
+    -- 조사가 붙은 검색어는 끝 글자를 줄여가며 본문에서 찾음 (회의록을 -> 회의록)
+    WHILE pos = 0 AND length(term) > 2 AND term ~ '[가-힣]$' LOOP
+      term := left(term, length(term) - 1);
+      pos := strpos(lowered, term);
+    END LOOP;
+
+    IF pos > 0 THEN
+      terms := terms || term;
+      IF best = 0 OR pos < best THEN
+        best := pos;
+      END IF;
+    END IF;
+  END LOOP;
+
+  IF best = 0 THEN
+    RETURN left(p_content, p_width);
+  END IF;
+
+  start_pos := greatest(1, best - p_width / 3);
+  snippet := substr(p_content, start_pos, p_width);
+
+  FOREACH term IN ARRAY terms LOOP
+    snippet := regexp_replace(
+      snippet,
+      regexp_replace(term, '([.^$*+?()\[\]{}|\\])', '\\\1', 'g'),
+      '**\&**',
+      'gi'
+    );
+  END LOOP;
+
+  IF start_pos > 1 THEN
+    snippet := '...' || snippet;
+  END IF;
+  IF start_pos + p_width <= length(p_content) THEN
+    snippet := snippet || '...';
+  END IF;
+
+  RETURN snippet;
+END;
+$$;
+
+-- ============================================
+-- Search RPC
+-- ============================================
+-- ts_rank_cd normalization 1|32: 문서 길이(log)로 나누고 0~1 로 정규화 (BM25 유사 길이 보정)
+CREATE OR REPLACE FUNCTION search_project_documents(
+  p_project_id UUID,
+  p_query TEXT,
+  p_doc_type TEXT DEFAULT NULL,
+  p_limit INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+  id UUID,
+  title TEXT,
+  summary TEXT,
+  doc_type TEXT,
+  tags TEXT[],
+  status TEXT,
+  created_at TIMESTAMPTZ,
+  rank REAL,
+  snippet TEXT
+)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH q AS (
+    SELECT korean_ngram_tsquery(p_query) AS tsq
+  ),
+  hits AS (
+    SELECT d.id, ts_rank_cd(d.search_vector, q.tsq, 1 | 32) AS rank
+    FROM project_documents d, q
+    WHERE d.project_id = p_project_id
+      AND d.status = 'published'
+      AND (p_doc_type IS NULL OR d.doc_type = p_doc_type)
+      AND d.search_vector @@ q.tsq
+    ORDER BY rank DESC, d.created_at DESC
+    LIMIT p_limit
+  )
+  SELECT
+    d.id,
+    d.title,
+    d.summary,
+    d.doc_type,
+    d.tags,
+    d.status,
+    d.created_at,
+    hits.rank,
+    project_document_snippet(d.content, p_query) AS snippet
+  FROM hits
+  JOIN project_documents d ON d.id = hits.id
+  ORDER BY hits.rank DESC, d.created_at DESC;
+$$;
+
+COMMENT ON COLUMN project_documents.search_vector IS '제목(A)/본문(B) 한국어 2-gram tsvector - 트리거로 자동 갱신';
+COMMENT ON FUNCTION search_project_documents IS '프로젝트 문서 전문 검색 (랭킹 + 하이라이트 스니펫)';
@@ -0,0 +1,12 @@
+-- Sheet analyses cache key
+-- 동일한 데이터/분석 조건에 대해 저장된 분석 결과를 재사용
+
+ALTER TABLE sheet_analyses ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE sheet_analyses ADD COLUMN IF NOT EXISTS prompt_version TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_sheet_analyses_cache_lookup
+  ON sheet_analyses(sheet_id, analysis_type, content_hash, created_at DESC)
+  WHERE content_hash IS NOT NULL;
+
+COMMENT ON COLUMN sheet_analyses.content_hash IS '분석 대상 컬럼/행 + analysis_type + column_ids + prompt_version 해시';
+COMMENT ON COLUMN sheet_analyses.prompt_version IS '분석 프롬프트 버전 - 프롬프트 변경 시 캐시 무효화';
@@ -0,0 +1,27 @@
+-- Sheets append rows RPC
+-- 대용량 가져오기 시 기존 rows 배열을 내려받지 않고 서버에서 청크를 이어붙임
+
+CREATE OR REPLACE FUNCTION append_sheet_rows(
+  p_sheet_id UUID,
+  p_rows JSONB
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  new_count INTEGER;
+BEGIN
+  UPDATE sheets
+  SET rows = rows || p_rows
+  WHERE id = p_sheet_id
+  RETURNING jsonb_array_length(rows) INTO new_count;
+
+  IF new_count IS NULL THEN
+    RAISE EXCEPTION 'sheet % not found', p_sheet_id;
+  END IF;
+
+  RETURN new_count;
+END;
+$$;
+
+COMMENT ON FUNCTION append_sheet_rows IS '시트 rows 배열에 행 청크를 추가하고 전체 행 수를 반환';
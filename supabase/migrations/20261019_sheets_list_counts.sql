@@ -0,0 +1,22 @@
+-- Sheets list counts
+-- 시트 목록 조회 시 rows/columns 전체를 내려받지 않도록 개수를 생성 컬럼으로 유지
+
+-- ============================================
+-- Generated count columns
+-- ============================================
+ALTER TABLE sheets
+  ADD COLUMN IF NOT EXISTS row_count INTEGER
+    GENERATED ALWAYS AS (jsonb_array_length(rows)) STORED;
+
+ALTER TABLE sheets
+  ADD COLUMN IF NOT EXISTS column_count INTEGER
+    GENERATED ALWAYS AS (jsonb_array_length(columns)) STORED;
+
+-- ============================================
+-- Keyset pagination index (team_id, updated_at DESC, id DESC)
+-- ============================================
+CREATE INDEX IF NOT EXISTS idx_sheets_team_updated_keyset
+  ON sheets(team_id, updated_at DESC, id DESC);
+
+COMMENT ON COLUMN sheets.row_count IS 'jsonb_array_length(rows) - 목록 조회용 행 수';
+COMMENT ON COLUMN sheets.column_count IS 'jsonb_array_length(columns) - 목록 조회용 컬럼 수';
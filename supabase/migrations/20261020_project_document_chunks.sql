@@ -0,0 +1,137 @@
+-- Project Document Chunks (Semantic Search)
+-- 문서 본문을 청크 단위로 임베딩하여 하이브리드(벡터 + 키워드) 검색 제공
+-- 청크는 content_hash 기준으로 재사용되어 변경된 청크만 다시 임베딩됨
+
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- ============================================
+-- Chunks Table
+-- ============================================
+CREATE TABLE IF NOT EXISTS project_document_chunks (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  document_id UUID NOT NULL REFERENCES project_documents(id) ON DELETE CASCADE,
+  project_id UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+
+  -- Chunk position & content
+  chunk_index INTEGER NOT NULL,
+  heading TEXT, -- 청크가 속한 섹션 제목
+  content TEXT NOT NULL,
+  content_hash TEXT NOT NULL,
+
+  -- Embedding (text-embedding-3-small)
+  embedding vector(1536),
+  embedding_model TEXT,
+
+  -- Keyword search (한국어 2-gram, 20261019_project_documents_search.sql)
+  search_vector tsvector GENERATED ALWAYS AS (korean_ngram_tsvector(content)) STORED,
+
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  updated_at TIMESTAMPTZ DEFAULT NOW(),
+
+  UNIQUE(document_id, content_hash)
+);
+
+-- ============================================
+-- Indexes
+-- ============================================
+CREATE INDEX IF NOT EXISTS idx_project_document_chunks_document
+  ON project_document_chunks(document_id, chunk_index);
+CREATE INDEX IF NOT EXISTS idx_project_document_chunks_project
+  ON project_document_chunks(project_id);
+CREATE INDEX IF NOT EXISTS idx_project_document_chunks_embedding
+  ON project_document_chunks USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
+CREATE INDEX IF NOT EXISTS idx_project_document_chunks_search
+  ON project_document_chunks USING gin(project_id, search_vector);
+
+-- ============================================
+-- RLS Policies
+-- ============================================
+ALTER TABLE project_document_chunks ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "project_document_chunks_select" ON project_document_chunks
+  FOR SELECT USING (
+    EXISTS (
+      SELECT 1 FROM project_documents d
+      WHERE d.id = project_document_chunks.document_id
+    )
+  );
+
+CREATE POLICY "Service role full access" ON project_document_chunks
+  FOR ALL USING (auth.role() = 'service_role');
+
+-- ============================================
+-- Trigger for updated_at
+-- ============================================
+DROP TRIGGER IF EXISTS update_project_document_chunks_updated_at ON project_document_chunks;
+CREATE TRIGGER update_project_document_chunks_updated_at
+  BEFORE UPDATE ON project_document_chunks
+  FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- ============================================
+-- Hybrid search RPC (Reciprocal Rank Fusion)
+-- ============================================
+-- 벡터 상위 N개와 키워드 상위 N개를 RRF(k=60)로 합산, p_vector_weight 로 가중치 조절
+CREATE OR REPLACE FUNCTION match_project_document_chunks(
+  p_project_id UUID,
+  p_query_embedding vector(1536),
+  p_query TEXT,
+  p_match_count INTEGER DEFAULT 8,
+  p_vector_weight FLOAT DEFAULT 0.7
+)
+RETURNS TABLE (
+  id UUID,
+  document_id UUID,
+  document_title TEXT,
+  chunk_index INTEGER,
+  heading TEXT,
+  content TEXT,
+  similarity FLOAT,
+  score FLOAT
+)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH vec AS (
+    SELECT c.id, row_number() OVER (ORDER BY c.embedding <=> p_query_embedding) AS rnk
+    FROM project_document_chunks c
+    WHERE c.project_id = p_project_id
+      AND c.embedding IS NOT NULL
+    ORDER BY c.embedding <=> p_query_embedding
+    LIMIT p_match_count * 4
+  ),
+  kw AS (
+    SELECT c.id, row_number() OVER (ORDER BY ts_rank_cd(c.search_vector, q.tsq, 32) DESC) AS rnk
+    FROM project_document_chunks c, (SELECT korean_ngram_tsquery(p_query) AS tsq) q
+    WHERE c.project_id = p_project_id
+      AND c.search_vector @@ q.tsq
+    ORDER BY ts_rank_cd(c.search_vector, q.tsq, 32) DESC
+    LIMIT p_match_count * 4
+  ),
+  fused AS (
+    SELECT f.id, sum(f.s) AS score
+    FROM (
+      SELECT vec.id, p_vector_weight / (60 + vec.rnk) AS s FROM vec
+      UNION ALL
+      SELECT kw.id, (1 - p_vector_weight) / (60 + kw.rnk) AS s FROM kw
+    ) f
+    GROUP BY f.id
+  )
+  SELECT
+    c.id,
+    c.document_id,
+    d.title AS document_title,
+    c.chunk_index,
+    c.heading,
+    c.content,
+    1 - (c.embedding <=> p_query_embedding) AS similarity,
+    fused.score
+  FROM fused
+  JOIN project_document_chunks c ON c.id = fused.id
+  JOIN project_documents d ON d.id = c.document_id
+  WHERE d.status = 'published'
+  ORDER BY fused.score DESC
+  LIMIT p_match_count;
+$$;
+
+COMMENT ON TABLE project_document_chunks IS '문서 청크 임베딩 - 시맨틱/하이브리드 검색용';
+COMMENT ON COLUMN project_document_chunks.content_hash IS '청크 내용 해시 - 변경된 청크만 재임베딩';
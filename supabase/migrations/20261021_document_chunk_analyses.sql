@@ -0,0 +1,30 @@
+-- Document Chunk Analyses Cache
+-- 긴 문서 map-reduce 분석 시 청크별 부분 결과를 청크 해시 기준으로 캐싱
+-- 일부만 수정된 문서를 다시 분석하면 변경된 청크만 LLM 처리
+
+CREATE TABLE IF NOT EXISTS document_chunk_analyses (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+
+  -- 캐시 키: 청크 내용 + analysis_type + 프롬프트 버전 해시
+  chunk_hash TEXT NOT NULL UNIQUE,
+  analysis_type TEXT NOT NULL,
+  prompt_version TEXT NOT NULL,
+
+  -- 부분 분석 결과
+  result TEXT NOT NULL,
+  model_used TEXT,
+
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  last_used_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_document_chunk_analyses_last_used
+  ON document_chunk_analyses(last_used_at);
+
+ALTER TABLE document_chunk_analyses ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role full access" ON document_chunk_analyses
+  FOR ALL USING (auth.role() = 'service_role');
+
+COMMENT ON TABLE document_chunk_analyses IS '문서 청크별 map 단계 분석 결과 캐시';
+COMMENT ON COLUMN document_chunk_analyses.chunk_hash IS '청크 내용 + analysis_type + prompt_version 해시';
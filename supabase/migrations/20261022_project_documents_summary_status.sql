@@ -0,0 +1,41 @@
+-- Project Documents Deferred Summaries
+-- ai_docs_create 는 요약 없이 즉시 저장하고, 백그라운드 요약기가 pending 문서를 배치로 요약
+
+ALTER TABLE project_documents
+  ADD COLUMN IF NOT EXISTS summary_status TEXT DEFAULT 'done'
+    CHECK (summary_status IN ('pending', 'processing', 'done', 'failed'));
+
+CREATE INDEX IF NOT EXISTS idx_project_documents_summary_pending
+  ON project_documents(created_at)
+  WHERE summary_status IN ('pending', 'processing');
+
+-- ============================================
+-- Claim a batch of pending documents
+-- ============================================
+-- 여러 워커가 동시에 실행되어도 같은 문서를 중복 처리하지 않도록 SKIP LOCKED 사용
+-- processing 상태로 10분 이상 멈춘 문서(워커 중단)는 다시 가져감
+CREATE OR REPLACE FUNCTION claim_pending_document_summaries(p_limit INTEGER DEFAULT 20)
+RETURNS TABLE (
+  id UUID,
+  title TEXT,
+  content TEXT
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  RETURN QUERY
+  UPDATE project_documents d
+  SET summary_status = 'processing'
+  WHERE d.id IN (
+    SELECT p.id FROM project_documents p
+    WHERE p.summary_status = 'pending'
+      OR (p.summary_status = 'processing' AND p.updated_at < NOW() - INTERVAL '10 minutes')
+    ORDER BY p.created_at
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING d.id, d.title, d.content;
+END;
+$$;
+
+COMMENT ON COLUMN project_documents.summary_status IS '자동 요약 상태 (pending: 대기, processing: 처리 중, done: 완료, failed: 실패)';
@@ -0,0 +1,5 @@
+-- Project Documents keyset pagination
+-- ai_docs_list: offset 대신 (created_at, id) 커서로 페이지 조회
+
+CREATE INDEX IF NOT EXISTS idx_project_documents_project_created_keyset
+  ON project_documents(project_id, created_at DESC, id DESC);
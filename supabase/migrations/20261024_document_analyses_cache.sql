@@ -0,0 +1,37 @@
+-- Document Analyses Cache
+-- ai_docs_analyze 결과를 (문서, 내용 해시, analysis_type, 프롬프트 버전) 기준으로 캐싱
+-- 내용이 바뀌면 ai_docs_update 가 해당 문서의 캐시를 삭제
+
+CREATE TABLE IF NOT EXISTS document_analyses (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  document_id UUID NOT NULL REFERENCES project_documents(id) ON DELETE CASCADE,
+
+  -- 캐시 키
+  content_hash TEXT NOT NULL,
+  analysis_type TEXT NOT NULL,
+  prompt_version TEXT NOT NULL,
+
+  -- 분석 결과
+  analysis TEXT NOT NULL,
+  metadata JSONB DEFAULT '{}', -- chunks, chunks_analyzed 등
+  model_used TEXT,
+
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+
+  CONSTRAINT document_analyses_unique UNIQUE (document_id, content_hash, analysis_type, prompt_version)
+);
+
+ALTER TABLE document_analyses ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "document_analyses_select" ON document_analyses
+  FOR SELECT USING (
+    EXISTS (
+      SELECT 1 FROM project_documents d
+      WHERE d.id = document_analyses.document_id
+    )
+  );
+
+CREATE POLICY "Service role full access" ON document_analyses
+  FOR ALL USING (auth.role() = 'service_role');
+
+COMMENT ON TABLE document_analyses IS '문서 AI 분석 결과 캐시 - 동일 버전 재분석 방지';
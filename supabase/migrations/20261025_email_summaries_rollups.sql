@@ -0,0 +1,15 @@
+-- Email Summaries Daily Rollups
+-- email_summarize_inbox 가 일별 요약을 저장하고 재사용 (메일이 바뀐 날만 다시 요약)
+-- source_hash: 해당 일자 메일 목록(id, 중요도) 해시 - 일치하면 저장된 요약 재사용
+
+ALTER TABLE email_summaries ADD COLUMN IF NOT EXISTS source_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_email_summaries_rollup
+  ON email_summaries(account_id, summary_type, period_start)
+  WHERE source_hash IS NOT NULL;
+
+-- 페이지 단위 기간 조회 (account_id, folder, received_at) 정렬
+CREATE INDEX IF NOT EXISTS idx_email_messages_folder_received
+  ON email_messages(account_id, folder, received_at, id);
+
+COMMENT ON COLUMN email_summaries.source_hash IS '일별 롤업 원본 메일 해시 - 변경 시 재요약';
@@ -0,0 +1,39 @@
+-- Email Batch Triage
+-- email_triage_batch: 미분류 이메일 페이지를 한 번의 호출로 일괄 업데이트
+
+-- 미분류 이메일 페이지 조회 (account_id, folder, received_at DESC)
+CREATE INDEX IF NOT EXISTS idx_email_messages_untriaged
+  ON email_messages(account_id, folder, received_at DESC, id DESC)
+  WHERE ai_analyzed_at IS NULL;
+
+-- p_updates: [{id, ai_priority, ai_category, ai_summary, ai_action_required}, ...]
+CREATE OR REPLACE FUNCTION bulk_update_email_triage(p_updates JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  updated INTEGER;
+BEGIN
+  UPDATE email_messages m
+  SET
+    ai_priority = u.ai_priority,
+    ai_category = u.ai_category,
+    ai_summary = u.ai_summary,
+    ai_action_required = u.ai_action_required,
+    ai_analyzed_at = NOW(),
+    updated_at = NOW()
+  FROM jsonb_to_recordset(p_updates) AS u(
+    id UUID,
+    ai_priority TEXT,
+    ai_category TEXT,
+    ai_summary TEXT,
+    ai_action_required BOOLEAN
+  )
+  WHERE m.id = u.id;
+
+  GET DIAGNOSTICS updated = ROW_COUNT;
+  RETURN updated;
+END;
+$$;
+
+COMMENT ON FUNCTION bulk_update_email_triage IS '이메일 일괄 분류 결과 기록 (페이지당 1회 호출)';
@@ -0,0 +1,40 @@
+-- Email AI Results Cache
+-- email_analyze / email_translate 결과를 (이메일, 본문 해시, 분석 유형 또는 대상 언어, 프롬프트 버전) 기준으로 저장
+-- 같은 내용의 이메일을 같은 방식으로 다시 요청하면 LLM 호출 없이 저장된 결과 반환
+
+CREATE TABLE IF NOT EXISTS email_ai_results (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  email_id UUID NOT NULL REFERENCES email_messages(id) ON DELETE CASCADE,
+
+  -- 캐시 키
+  body_hash TEXT NOT NULL,
+  result_type TEXT NOT NULL CHECK (result_type IN ('analysis', 'translation')),
+  result_key TEXT NOT NULL, -- analysis_type 또는 target_language
+  prompt_version TEXT NOT NULL,
+
+  -- 결과
+  result TEXT NOT NULL,
+  model_used TEXT,
+
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+
+  CONSTRAINT email_ai_results_unique UNIQUE (email_id, body_hash, result_type, result_key, prompt_version)
+);
+
+ALTER TABLE email_ai_results ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own email AI results"
+  ON email_ai_results FOR SELECT
+  USING (
+    EXISTS (
+      SELECT 1 FROM email_messages m
+      JOIN email_accounts a ON a.id = m.account_id
+      WHERE m.id = email_ai_results.email_id
+        AND a.user_id = auth.uid()
+    )
+  );
+
+CREATE POLICY "Service role full access" ON email_ai_results
+  FOR ALL USING (auth.role() = 'service_role');
+
+COMMENT ON TABLE email_ai_results IS '이메일 AI 분석/번역 결과 캐시 - 동일 내용 재요청 시 재사용';
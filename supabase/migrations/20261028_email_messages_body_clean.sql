@@ -0,0 +1,28 @@
+-- Email Messages Normalized Body
+-- HTML 제거, 인용문/서명/반복 문구를 제거한 프롬프트용 본문 (tools/email_body.py)
+-- 본문이 바뀌면 트리거가 body_clean 을 비워 다음 조회 시 다시 생성
+
+ALTER TABLE email_messages ADD COLUMN IF NOT EXISTS body_clean TEXT;
+ALTER TABLE email_messages ADD COLUMN IF NOT EXISTS body_clean_version TEXT;
+
+CREATE OR REPLACE FUNCTION email_messages_reset_body_clean()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF NEW.body_text IS DISTINCT FROM OLD.body_text
+     OR NEW.body_html IS DISTINCT FROM OLD.body_html THEN
+    NEW.body_clean := NULL;
+    NEW.body_clean_version := NULL;
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS email_messages_body_clean_reset ON email_messages;
+CREATE TRIGGER email_messages_body_clean_reset
+  BEFORE UPDATE OF body_text, body_html ON email_messages
+  FOR EACH ROW EXECUTE FUNCTION email_messages_reset_body_clean();
+
+COMMENT ON COLUMN email_messages.body_clean IS '정규화된 본문 캐시 - HTML/인용문/서명 제거';
+COMMENT ON COLUMN email_messages.body_clean_version IS 'body_clean 생성 규칙 버전';
@@ -0,0 +1,170 @@
+-- Email Thread Index
+-- 이메일 수신(INSERT) 시 thread_id 를 자동 지정
+--   1. In-Reply-To / References 로 같은 계정의 기존 메일을 찾으면 그 스레드에 합류
+--   2. 먼저 도착한 답장이 이 메일을 참조하고 있으면 그 스레드에 합류 (동기화 순서 역전)
+--   3. 정규화된 제목이 같고 참여자가 겹치는 최근 30일 메일의 스레드에 합류
+--   4. 그 외에는 자신의 Message-ID 로 새 스레드 시작
+
+ALTER TABLE email_messages ADD COLUMN IF NOT EXISTS thread_subject TEXT;
+
+-- Re:/Fwd:/답장:/전달: 등 접두어 제거 후 소문자
+CREATE OR REPLACE FUNCTION normalize_email_subject(p_subject TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT nullif(
+    btrim(regexp_replace(
+      lower(coalesce(p_subject, '')),
+      '^(\s*(re|fw|fwd|aw|답장|회신|전달)\s*(\[\d+\])?\s*:\s*)+',
+      ''
+    )),
+    ''
+  );
+$$;
+
+CREATE OR REPLACE FUNCTION email_thread_id_for(
+  p_account_id UUID,
+  p_message_id TEXT,
+  p_in_reply_to TEXT,
+  p_references JSONB,
+  p_thread_subject TEXT,
+  p_from_address TEXT,
+  p_to_addresses JSONB,
+  p_received_at TIMESTAMPTZ
+)
+RETURNS TEXT
+LANGUAGE plpgsql
+STABLE
+AS $$
+DECLARE
+  v_thread_id TEXT;
+BEGIN
+  -- 1. Parent by In-Reply-To, then by References (most recent reference first)
+  IF p_in_reply_to IS NOT NULL THEN
+    SELECT m.thread_id INTO v_thread_id
+    FROM email_messages m
+    WHERE m.account_id = p_account_id
+      AND m.message_id = p_in_reply_to
+      AND m.thread_id IS NOT NULL
+    LIMIT 1;
+    IF v_thread_id IS NOT NULL THEN
+      RETURN v_thread_id;
+    END IF;
+  END IF;
+
+  IF jsonb_typeof(p_references) = 'array' AND jsonb_array_length(p_references) > 0 THEN
+    SELECT m.thread_id INTO v_thread_id
+    FROM email_messages m
+    JOIN jsonb_array_elements_text(p_references) WITH ORDINALITY AS r(ref, pos) ON r.ref = m.message_id
+    WHERE m.account_id = p_account_id
+      AND m.thread_id IS NOT NULL
+    ORDER BY r.pos DESC
+    LIMIT 1;
+    IF v_thread_id IS NOT NULL THEN
+      RETURN v_thread_id;
+    END IF;
+  END IF;
+
+  -- 2. A reply that was synced before this message
+  SELECT m.thread_id INTO v_thread_id
+  FROM email_messages m
+  WHERE m.account_id = p_account_id
+    AND m.thread_id IS NOT NULL
+    AND (m.in_reply_to = p_message_id OR m.references_list ? p_message_id)
+  LIMIT 1;
+  IF v_thread_id IS NOT NULL THEN
+    RETURN v_thread_id;
+  END IF;
+
+  -- 3. Same normalized subject with overlapping participants
+  IF p_thread_subject IS NOT NULL THEN
+    SELECT m.thread_id INTO v_thread_id
+    FROM email_messages m
+    WHERE m.account_id = p_account_id
+      AND m.thread_subject = p_thread_subject
+      AND m.thread_id IS NOT NULL
+      AND m.received_at BETWEEN coalesce(p_received_at, NOW()) - INTERVAL '30 days' AND coalesce(p_received_at, NOW())
+      AND (
+        m.from_address = p_from_address
+        OR m.to_addresses @> jsonb_build_array(jsonb_build_object('email', p_from_address))
+        OR coalesce(p_to_addresses, '[]'::jsonb) @> jsonb_build_array(jsonb_build_object('email', m.from_address))
+      )
+    ORDER BY m.received_at DESC
+    LIMIT 1;
+    IF v_thread_id IS NOT NULL THEN
+      RETURN v_thread_id;
+    END IF;
+  END IF;
+
+  -- 4. New thread
+  RETURN p_message_id;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION email_messages_assign_thread()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.thread_subject := normalize_email_subject(NEW.subject);
+  IF NEW.thread_id IS NULL THEN
+    NEW.thread_id := email_thread_id_for(
+      NEW.account_id, NEW.message_id, NEW.in_reply_to, NEW.references_list,
+      NEW.thread_subject, NEW.from_address, NEW.to_addresses, NEW.received_at
+    );
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS email_messages_thread ON email_messages;
+CREATE TRIGGER email_messages_thread
+  BEFORE INSERT ON email_messages
+  FOR EACH ROW EXECUTE FUNCTION email_messages_assign_thread();
+
+-- ============================================
+-- Indexes
+-- ============================================
+-- 스레드 전체를 한 번에 조회 (email_draft_reply)
+CREATE INDEX IF NOT EXISTS idx_email_messages_account_thread
+  ON email_messages(account_id, thread_id, received_at DESC);
+CREATE INDEX IF NOT EXISTS idx_email_messages_thread_subject
+  ON email_messages(account_id, thread_subject, received_at DESC)
+  WHERE thread_subject IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_email_messages_in_reply_to
+  ON email_messages(account_id, in_reply_to)
+  WHERE in_reply_to IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_email_messages_references
+  ON email_messages USING gin(references_list);
+
+-- ============================================
+-- Backfill (수신 순서대로 지정해야 부모 스레드를 찾을 수 있음)
+-- ============================================
+UPDATE email_messages
+SET thread_subject = normalize_email_subject(subject)
+WHERE thread_subject IS NULL AND subject IS NOT NULL;
+
+DO $$
+DECLARE
+  msg RECORD;
+BEGIN
+  FOR msg IN
+    SELECT id, account_id, message_id, in_reply_to, references_list,
+           thread_subject, from_address, to_addresses, received_at
+    FROM email_messages
+    WHERE thread_id IS NULL
+    ORDER BY received_at NULLS FIRST, id
+  LOOP
+    UPDATE email_messages
+    SET thread_id = email_thread_id_for(
+      msg.account_id, msg.message_id, msg.in_reply_to, msg.references_list,
+      msg.thread_subject, msg.from_address, msg.to_addresses, msg.received_at
+    )
+    WHERE id = msg.id;
+  END LOOP;
+END;
+$$;
+
+COMMENT ON COLUMN email_messages.thread_subject IS '접두어(Re:/Fwd: 등)를 제거한 제목 - 헤더 없는 메일의 스레드 매칭용';
+COMMENT ON FUNCTION email_thread_id_for IS '이메일 스레드 결정 (References → 역참조 → 제목+참여자 → 새 스레드)';
@@ -0,0 +1,193 @@
+-- Email Search Index
+-- email_search 의 ilike 순차 스캔을 대체
+--   - 제목/발신자(A) + 본문(B) 한국어 2-gram tsvector (20261019_project_documents_search.sql 의 korean_ngram_* 재사용)
+--   - 발신자 정확/접두어 일치, 폴더 필터용 btree 인덱스
+--   - search_vector 는 메일 수신 경로에서 계산하지 않고 index_email_search RPC 가 계정별로 received_at 순서대로 채움
+--     (email_search_state.indexed_through = 계정별 색인 워터마크)
+
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+ALTER TABLE email_messages ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE TABLE IF NOT EXISTS email_search_state (
+  account_id UUID PRIMARY KEY REFERENCES email_accounts(id) ON DELETE CASCADE,
+  indexed_through TIMESTAMPTZ, -- 색인된 가장 최근 received_at
+  indexed_count BIGINT DEFAULT 0,
+  updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+ALTER TABLE email_search_state ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role full access" ON email_search_state
+  FOR ALL USING (auth.role() = 'service_role');
+
+-- ============================================
+-- tsvector builder
+-- ============================================
+-- 본문은 body_clean(정규화 본문) > body_text > body_html(태그 제거) 순, 앞부분 100k 자만 색인
+CREATE OR REPLACE FUNCTION email_search_vector(
+  p_subject TEXT,
+  p_from_name TEXT,
+  p_from_address TEXT,
+  p_body TEXT
+)
+RETURNS tsvector
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT
+    setweight(korean_ngram_tsvector(concat_ws(' ', p_subject, p_from_name, p_from_address)), 'A') ||
+    setweight(korean_ngram_tsvector(left(regexp_replace(coalesce(p_body, ''), '<[^>]*>', ' ', 'g'), 100000)), 'B');
+$$;
+
+-- 제목/본문이 바뀌면 다시 색인 대상이 됨
+CREATE OR REPLACE FUNCTION email_messages_reset_search_vector()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF NEW.subject IS DISTINCT FROM OLD.subject
+     OR NEW.body_text IS DISTINCT FROM OLD.body_text
+     OR NEW.body_html IS DISTINCT FROM OLD.body_html THEN
+    NEW.search_vector := NULL;
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS email_messages_search_vector_reset ON email_messages;
+CREATE TRIGGER email_messages_search_vector_reset
+  BEFORE UPDATE OF subject, body_text, body_html ON email_messages
+  FOR EACH ROW EXECUTE FUNCTION email_messages_reset_search_vector();
+
+-- ============================================
+-- Indexes
+-- ============================================
+-- 기존 'english' 표현식 인덱스는 한국어를 찾지 못하고 ilike 쿼리에서 사용되지도 않음
+DROP INDEX IF EXISTS idx_email_messages_search;
+
+CREATE INDEX IF NOT EXISTS idx_email_messages_search_vector
+  ON email_messages USING gin(account_id, search_vector);
+
+-- 색인 대기 메일 (계정별 received_at 순)
+CREATE INDEX IF NOT EXISTS idx_email_messages_search_pending
+  ON email_messages(account_id, received_at)
+  WHERE search_vector IS NULL;
+
+-- 발신자 정확/접두어 일치
+CREATE INDEX IF NOT EXISTS idx_email_messages_from_address
+  ON email_messages(account_id, lower(from_address) text_pattern_ops);
+
+-- 폴더별 최신순 (검색어 없는 필터 조회)
+CREATE INDEX IF NOT EXISTS idx_email_messages_folder_recent
+  ON email_messages(account_id, folder, received_at DESC);
+
+-- ============================================
+-- Incremental indexing
+-- ============================================
+CREATE OR REPLACE FUNCTION index_email_search(p_account_id UUID, p_limit INTEGER DEFAULT 1000)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_count INTEGER;
+  v_through TIMESTAMPTZ;
+BEGIN
+  WITH batch AS (
+    SELECT e.id FROM email_messages e
+    WHERE e.account_id = p_account_id
+      AND e.search_vector IS NULL
+    ORDER BY e.received_at
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+  ),
+  updated AS (
+    UPDATE email_messages m
+    SET search_vector = email_search_vector(
+      m.subject, m.from_name, m.from_address, coalesce(m.body_clean, m.body_text, m.body_html)
+    )
+    FROM batch
+    WHERE m.id = batch.id
+    RETURNING m.received_at
+  )
+  SELECT count(*), max(updated.received_at) INTO v_count, v_through FROM updated;
+
+  IF v_count > 0 THEN
+    INSERT INTO email_search_state (account_id, indexed_through, indexed_count, updated_at)
+    VALUES (p_account_id, v_through, v_count, NOW())
+    ON CONFLICT (account_id) DO UPDATE SET
+      indexed_through = GREATEST(email_search_state.indexed_through, EXCLUDED.indexed_through),
+      indexed_count = email_search_state.indexed_count + EXCLUDED.indexed_count,
+      updated_at = NOW();
+  END IF;
+
+  RETURN v_count;
+END;
+$$;
+
+-- ============================================
+-- Search RPC
+-- ============================================
+-- p_query 가 비어 있으면 필터만 적용해 최신순, 있으면 ts_rank_cd(1|32) 랭킹순
+-- p_from: '@' 포함 시 정확 일치, 아니면 접두어 일치
+CREATE OR REPLACE FUNCTION search_email_messages(
+  p_account_id UUID,
+  p_query TEXT DEFAULT NULL,
+  p_folder TEXT DEFAULT NULL,
+  p_from TEXT DEFAULT NULL,
+  p_date_from TIMESTAMPTZ DEFAULT NULL,
+  p_date_to TIMESTAMPTZ DEFAULT NULL,
+  p_has_attachments BOOLEAN DEFAULT NULL,
+  p_unread_only BOOLEAN DEFAULT false,
+  p_limit INTEGER DEFAULT 20
+)
+RETURNS TABLE (
+  id UUID,
+  subject TEXT,
+  from_address TEXT,
+  from_name TEXT,
+  snippet TEXT,
+  received_at TIMESTAMPTZ,
+  folder TEXT,
+  is_read BOOLEAN,
+  has_attachments BOOLEAN,
+  rank REAL
+)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH q AS (
+    SELECT CASE WHEN coalesce(btrim(p_query), '') = '' THEN NULL ELSE korean_ngram_tsquery(p_query) END AS tsq
+  )
+  SELECT
+    e.id,
+    e.subject,
+    e.from_address,
+    e.from_name,
+    e.snippet,
+    e.received_at,
+    e.folder,
+    e.is_read,
+    e.has_attachments,
+    CASE WHEN q.tsq IS NULL THEN 0 ELSE ts_rank_cd(e.search_vector, q.tsq, 1 | 32) END AS rank
+  FROM email_messages e, q
+  WHERE e.account_id = p_account_id
+    AND e.is_trash = false
+    AND (q.tsq IS NULL OR e.search_vector @@ q.tsq)
+    AND (p_folder IS NULL OR e.folder = p_folder)
+    AND (
+      p_from IS NULL
+      OR (position('@' IN p_from) > 0 AND lower(e.from_address) = lower(p_from))
+      OR (position('@' IN p_from) = 0 AND lower(e.from_address) LIKE replace(replace(lower(p_from), '%', '\%'), '_', '\_') || '%')
+    )
+    AND (p_date_from IS NULL OR e.received_at >= p_date_from)
+    AND (p_date_to IS NULL OR e.received_at < p_date_to)
+    AND (p_has_attachments IS NULL OR e.has_attachments = p_has_attachments)
+    AND (NOT p_unread_only OR e.is_read = false)
+  ORDER BY rank DESC, e.received_at DESC
+  LIMIT p_limit;
+$$;
+
+COMMENT ON COLUMN email_messages.search_vector IS '제목·발신자(A)/본문(B) 한국어 2-gram tsvector - index_email_search 가 채움';
+COMMENT ON TABLE email_search_state IS '계정별 이메일 검색 색인 워터마크';
+COMMENT ON FUNCTION search_email_messages IS '이메일 전문 검색 (랭킹 + 발신자/폴더/기간/첨부/안읽음 필터)';
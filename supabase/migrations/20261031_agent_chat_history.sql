@@ -0,0 +1,33 @@
+-- Agent Chat History
+-- ai-backend 의 write-behind 버퍼(utils/chat_history.py)가 bulk upsert 하는 대화 기록
+-- id / created_at 은 서버에서 메시지 생성 시점에 지정되어, 지연 저장이나 spill 파일 재처리 시에도 순서와 중복 방지가 유지됨
+
+CREATE TABLE IF NOT EXISTS agent_chat_history (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  agent_id UUID NOT NULL REFERENCES deployed_agents(id) ON DELETE CASCADE,
+  session_id TEXT NOT NULL,
+  role TEXT NOT NULL,
+  content TEXT NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- 세션별 최신순 조회
+CREATE INDEX IF NOT EXISTS idx_agent_chat_history_session
+  ON agent_chat_history(agent_id, session_id, created_at DESC, id DESC);
+
+ALTER TABLE agent_chat_history ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Owners can view agent chat history"
+  ON agent_chat_history FOR SELECT
+  USING (
+    EXISTS (
+      SELECT 1 FROM deployed_agents a
+      WHERE a.id = agent_chat_history.agent_id
+        AND a.owner_id = auth.uid()
+    )
+  );
+
+CREATE POLICY "Service role full access" ON agent_chat_history
+  FOR ALL USING (auth.role() = 'service_role');
+
+COMMENT ON TABLE agent_chat_history IS '배포된 에이전트 대화 기록 - ai-backend 에서 배치로 저장';
@@ -0,0 +1,174 @@
+-- Email Search Index - 쓰기 시점 색인
+-- 20261030_email_search_index.sql 보완
+--   - search_vector 를 검색 경로(index_email_search)가 아니라 INSERT/UPDATE 트리거에서 계산
+--   - index_email_search 는 기존 메일 백필 전용, 최신 메일부터 색인
+--   - 읽히지 않던 indexed_through 워터마크 제거
+--   - search_email_messages 는 지정된 필터만 조건으로 넣는 동적 SQL (검색어가 있으면 `@@` 가 단순 조건이 되어 GIN 인덱스 사용)
+--   - 2글자 미만 검색어(한 글자 한국어 등)는 2-gram 으로 찾을 수 없으므로 ilike 로 검색
+
+-- ============================================
+-- Index on write
+-- ============================================
+-- 본문은 원본(body_text > body_html) 기준 - body_clean 은 조회 시 나중에 채워지므로 쓰기마다 재계산하지 않음
+CREATE OR REPLACE FUNCTION email_messages_set_search_vector()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT'
+     OR NEW.subject IS DISTINCT FROM OLD.subject
+     OR NEW.from_name IS DISTINCT FROM OLD.from_name
+     OR NEW.from_address IS DISTINCT FROM OLD.from_address
+     OR NEW.body_text IS DISTINCT FROM OLD.body_text
+     OR NEW.body_html IS DISTINCT FROM OLD.body_html THEN
+    NEW.search_vector := email_search_vector(
+      NEW.subject, NEW.from_name, NEW.from_address, coalesce(NEW.body_text, NEW.body_html)
+    );
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS email_messages_search_vector_reset ON email_messages;
+DROP FUNCTION IF EXISTS email_messages_reset_search_vector();
+
+DROP TRIGGER IF EXISTS email_messages_search_vector_set ON email_messages;
+CREATE TRIGGER email_messages_search_vector_set
+  BEFORE INSERT OR UPDATE OF subject, from_name, from_address, body_text, body_html ON email_messages
+  FOR EACH ROW EXECUTE FUNCTION email_messages_set_search_vector();
+
+-- ============================================
+-- Backfill (rows synced before the trigger existed), newest first
+-- ============================================
+ALTER TABLE email_search_state DROP COLUMN IF EXISTS indexed_through;
+
+DROP INDEX IF EXISTS idx_email_messages_search_pending;
+CREATE INDEX IF NOT EXISTS idx_email_messages_search_pending
+  ON email_messages(account_id, received_at DESC)
+  WHERE search_vector IS NULL;
+
+CREATE OR REPLACE FUNCTION index_email_search(p_account_id UUID, p_limit INTEGER DEFAULT 1000)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_count INTEGER;
+BEGIN
+  WITH batch AS (
+    SELECT e.id FROM email_messages e
+    WHERE e.account_id = p_account_id
+      AND e.search_vector IS NULL
+    ORDER BY e.received_at DESC
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+  ),
+  updated AS (
+    UPDATE email_messages m
+    SET search_vector = email_search_vector(
+      m.subject, m.from_name, m.from_address, coalesce(m.body_text, m.body_html)
+    )
+    FROM batch
+    WHERE m.id = batch.id
+    RETURNING m.id
+  )
+  SELECT count(*) INTO v_count FROM updated;
+
+  IF v_count > 0 THEN
+    INSERT INTO email_search_state (account_id, indexed_count, updated_at)
+    VALUES (p_account_id, v_count, NOW())
+    ON CONFLICT (account_id) DO UPDATE SET
+      indexed_count = email_search_state.indexed_count + EXCLUDED.indexed_count,
+      updated_at = NOW();
+  END IF;
+
+  RETURN v_count;
+END;
+$$;
+
+-- ============================================
+-- Search RPC
+-- ============================================
+-- 지정된 필터만 WHERE 에 넣어 실행 (catch-all `p IS NULL OR ...` 조건은 인덱스 선택을 막음)
+CREATE OR REPLACE FUNCTION search_email_messages(
+  p_account_id UUID,
+  p_query TEXT DEFAULT NULL,
+  p_folder TEXT DEFAULT NULL,
+  p_from TEXT DEFAULT NULL,
+  p_date_from TIMESTAMPTZ DEFAULT NULL,
+  p_date_to TIMESTAMPTZ DEFAULT NULL,
+  p_has_attachments BOOLEAN DEFAULT NULL,
+  p_unread_only BOOLEAN DEFAULT false,
+  p_limit INTEGER DEFAULT 20
+)
+RETURNS TABLE (
+  id UUID,
+  subject TEXT,
+  from_address TEXT,
+  from_name TEXT,
+  snippet TEXT,
+  received_at TIMESTAMPTZ,
+  folder TEXT,
+  is_read BOOLEAN,
+  has_attachments BOOLEAN,
+  rank REAL
+)
+LANGUAGE plpgsql
+STABLE
+AS $$
+DECLARE
+  v_query TEXT := btrim(coalesce(p_query, ''));
+  v_tsq tsquery;
+  v_pattern TEXT;
+  v_rank TEXT := '0::real';
+  v_order TEXT := 'e.received_at DESC';
+  v_where TEXT[] := ARRAY['e.account_id = $1', 'e.is_trash = false'];
+BEGIN
+  IF length(v_query) >= 2 THEN
+    v_tsq := korean_ngram_tsquery(v_query);
+  END IF;
+
+  IF v_tsq IS NOT NULL AND v_tsq <> ''::tsquery THEN
+    v_where := array_append(v_where, 'e.search_vector @@ $2');
+    v_rank := 'ts_rank_cd(e.search_vector, $2, 1 | 32)';
+    v_order := 'rank DESC, e.received_at DESC';
+  ELSIF v_query <> '' THEN
+    -- 2-gram 으로 표현되지 않는 검색어 (한 글자 등)
+    v_pattern := '%' || replace(replace(replace(v_query, '\', '\\'), '%', '\%'), '_', '\_') || '%';
+    v_where := array_append(v_where, '(e.subject ILIKE $3 OR e.from_name ILIKE $3 OR e.from_address ILIKE $3 OR e.body_text ILIKE $3)');
+  END IF;
+
+  IF p_folder IS NOT NULL THEN
+    v_where := array_append(v_where, 'e.folder = $4');
+  END IF;
+  IF p_from IS NOT NULL THEN
+    -- 접두어 일치 ("kim", "kim@acme", 전체 주소 모두 처리, text_pattern_ops 인덱스 사용)
+    v_where := array_append(v_where, $w$lower(e.from_address) LIKE replace(replace(lower($5), '%', '\%'), '_', '\_') || '%'$w$);
+  END IF;
+  IF p_date_from IS NOT NULL THEN
+    v_where := array_append(v_where, 'e.received_at >= $6');
+  END IF;
+  IF p_date_to IS NOT NULL THEN
+    v_where := array_append(v_where, 'e.received_at < $7');
+  END IF;
+  IF p_has_attachments IS NOT NULL THEN
+    v_where := array_append(v_where, 'e.has_attachments = $8');
+  END IF;
+  IF p_unread_only THEN
+    v_where := array_append(v_where, 'e.is_read = false');
+  END IF;
+
+  RETURN QUERY EXECUTE format(
+    'SELECT e.id, e.subject, e.from_address, e.from_name, e.snippet, e.received_at, e.folder,
+            e.is_read, e.has_attachments, %s AS rank
+     FROM email_messages e
+     WHERE %s
+     ORDER BY %s
+     LIMIT $9',
+    v_rank, array_to_string(v_where, ' AND '), v_order
+  )
+  USING p_account_id, v_tsq, v_pattern, p_folder, p_from, p_date_from, p_date_to, p_has_attachments, p_limit;
+END;
+$$;
+
+COMMENT ON COLUMN email_messages.search_vector IS '제목·발신자(A)/본문(B) 한국어 2-gram tsvector - INSERT/UPDATE 트리거가 채움';
+COMMENT ON TABLE email_search_state IS '계정별 이메일 검색 백필 진행 상황';
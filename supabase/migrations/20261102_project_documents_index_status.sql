@@ -0,0 +1,133 @@
+-- Project Documents Deferred Chunk Indexing
+-- ai_docs_create/ai_docs_update 는 임베딩 없이 즉시 반환하고, 백그라운드 인덱서가 pending 문서의 청크를 배치로 임베딩
+-- 실패한 문서는 지수 백오프(30초 * 2^시도횟수)로 최대 p_max_attempts 번까지 다시 시도
+-- index_attempts 는 연속 실패 횟수 - 색인 성공(done) 또는 문서 수정(pending) 시 0 으로 초기화
+-- 하이브리드 검색은 게시(published) 문서만 후보로 삼도록 두 후보 CTE 안에서 필터
+
+ALTER TABLE project_documents
+  ADD COLUMN IF NOT EXISTS index_status TEXT DEFAULT 'done'
+    CHECK (index_status IN ('pending', 'processing', 'done', 'failed'));
+ALTER TABLE project_documents ADD COLUMN IF NOT EXISTS index_attempts INTEGER DEFAULT 0;
+ALTER TABLE project_documents ADD COLUMN IF NOT EXISTS index_claimed_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_project_documents_index_pending
+  ON project_documents(created_at)
+  WHERE index_status IN ('pending', 'processing', 'failed');
+
+-- ============================================
+-- Claim a batch of documents to index
+-- ============================================
+-- pending 문서, 10분 이상 멈춘 processing 문서(워커 중단), 백오프가 지난 failed 문서를 SKIP LOCKED 로 가져감
+-- 워커를 중단시키는 문서가 무한히 재시도되지 않도록 processing 재회수에도 p_max_attempts 적용
+CREATE OR REPLACE FUNCTION claim_pending_document_index(p_limit INTEGER DEFAULT 20, p_max_attempts INTEGER DEFAULT 5)
+RETURNS TABLE (
+  id UUID,
+  index_attempts INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  -- 시도 횟수를 다 쓰고 멈춘 문서는 failed 로 남김
+  UPDATE project_documents p
+  SET index_status = 'failed'
+  WHERE p.index_status = 'processing'
+    AND p.index_attempts >= p_max_attempts
+    AND p.index_claimed_at < NOW() - INTERVAL '10 minutes';
+
+  RETURN QUERY
+  UPDATE project_documents d
+  SET index_status = 'processing',
+      index_claimed_at = NOW(),
+      index_attempts = d.index_attempts + 1
+  WHERE d.id IN (
+    SELECT p.id FROM project_documents p
+    WHERE p.index_status = 'pending'
+      OR (
+        p.index_status = 'processing'
+        AND p.index_attempts < p_max_attempts
+        AND p.index_claimed_at < NOW() - INTERVAL '10 minutes'
+      )
+      OR (
+        p.index_status = 'failed'
+        AND p.index_attempts < p_max_attempts
+        AND p.index_claimed_at < NOW() - make_interval(secs => 30 * power(2, p.index_attempts))
+      )
+    ORDER BY p.created_at
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING d.id, d.index_attempts;
+END;
+$$;
+
+-- ============================================
+-- Hybrid search RPC: published documents only, filtered before fusion
+-- ============================================
+CREATE OR REPLACE FUNCTION match_project_document_chunks(
+  p_project_id UUID,
+  p_query_embedding vector(1536),
+  p_query TEXT,
+  p_match_count INTEGER DEFAULT 8,
+  p_vector_weight FLOAT DEFAULT 0.7
+)
+RETURNS TABLE (
+  id UUID,
+  document_id UUID,
+  document_title TEXT,
+  chunk_index INTEGER,
+  heading TEXT,
+  content TEXT,
+  similarity FLOAT,
+  score FLOAT
+)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH vec AS (
+    SELECT c.id, row_number() OVER (ORDER BY c.embedding <=> p_query_embedding) AS rnk
+    FROM project_document_chunks c
+    JOIN project_documents d ON d.id = c.document_id
+    WHERE c.project_id = p_project_id
+      AND c.embedding IS NOT NULL
+      AND d.status = 'published'
+    ORDER BY c.embedding <=> p_query_embedding
+    LIMIT p_match_count * 4
+  ),
+  kw AS (
+    SELECT c.id, row_number() OVER (ORDER BY ts_rank_cd(c.search_vector, q.tsq, 32) DESC) AS rnk
+    FROM project_document_chunks c
+    JOIN project_documents d ON d.id = c.document_id,
+    (SELECT korean_ngram_tsquery(p_query) AS tsq) q
+    WHERE c.project_id = p_project_id
+      AND c.search_vector @@ q.tsq
+      AND d.status = 'published'
+    ORDER BY ts_rank_cd(c.search_vector, q.tsq, 32) DESC
+    LIMIT p_match_count * 4
+  ),
+  fused AS (
+    SELECT f.id, sum(f.s) AS score
+    FROM (
+      SELECT vec.id, p_vector_weight / (60 + vec.rnk) AS s FROM vec
+      UNION ALL
+      SELECT kw.id, (1 - p_vector_weight) / (60 + kw.rnk) AS s FROM kw
+    ) f
+    GROUP BY f.id
+  )
+  SELECT
+    c.id,
+    c.document_id,
+    d.title AS document_title,
+    c.chunk_index,
+    c.heading,
+    c.content,
+    1 - (c.embedding <=> p_query_embedding) AS similarity,
+    fused.score
+  FROM fused
+  JOIN project_document_chunks c ON c.id = fused.id
+  JOIN project_documents d ON d.id = c.document_id
+  ORDER BY fused.score DESC
+  LIMIT p_match_count;
+$$;
+
+COMMENT ON COLUMN project_documents.index_status IS '청크 임베딩 상태 (pending: 대기, processing: 처리 중, done: 완료, failed: 실패 - 백오프 후 재시도)';
+COMMENT ON COLUMN project_documents.index_attempts IS '청크 임베딩 연속 시도 횟수 (성공/수정 시 0)';
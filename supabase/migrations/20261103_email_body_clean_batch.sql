@@ -0,0 +1,25 @@
+-- Email Messages Normalized Body - batch write-back
+-- 스레드 다이제스트처럼 여러 메시지의 body_clean 을 한 번에 저장 (메시지별 UPDATE 왕복 대신 1회)
+
+CREATE OR REPLACE FUNCTION set_email_body_clean(
+  p_rows JSONB, -- [{"id": uuid, "body_clean": text}, ...]
+  p_version TEXT
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  updated_count INTEGER;
+BEGIN
+  UPDATE email_messages e
+  SET body_clean = r.body_clean,
+      body_clean_version = p_version
+  FROM jsonb_to_recordset(p_rows) AS r(id UUID, body_clean TEXT)
+  WHERE e.id = r.id;
+
+  GET DIAGNOSTICS updated_count = ROW_COUNT;
+  RETURN updated_count;
+END;
+$$;
+
+COMMENT ON FUNCTION set_email_body_clean IS '여러 메시지의 정규화 본문 캐시를 한 번에 저장';
@@ -0,0 +1,62 @@
+-- Project Documents Summary Retries
+-- 요약 실패(failed) 문서는 지수 백오프(30초 * 2^시도횟수)로 최대 p_max_attempts 번까지 다시 시도
+-- (20261102_project_documents_index_status.sql 의 청크 인덱서와 같은 방식)
+-- summary_attempts 는 연속 실패 횟수 - 요약 성공(done) 또는 문서 수정(pending) 시 0 으로 초기화
+
+ALTER TABLE project_documents ADD COLUMN IF NOT EXISTS summary_attempts INTEGER DEFAULT 0;
+ALTER TABLE project_documents ADD COLUMN IF NOT EXISTS summary_claimed_at TIMESTAMPTZ;
+
+DROP INDEX IF EXISTS idx_project_documents_summary_pending;
+CREATE INDEX IF NOT EXISTS idx_project_documents_summary_pending
+  ON project_documents(created_at)
+  WHERE summary_status IN ('pending', 'processing', 'failed');
+
+-- ============================================
+-- Claim a batch of documents to summarize
+-- ============================================
+-- pending 문서, 10분 이상 멈춘 processing 문서(워커 중단), 백오프가 지난 failed 문서를 SKIP LOCKED 로 가져감
+-- processing 재회수에도 p_max_attempts 를 적용하고, 시도 횟수를 다 쓴 채 멈춘 문서는 failed 로 남김
+DROP FUNCTION IF EXISTS claim_pending_document_summaries(INTEGER);
+
+CREATE OR REPLACE FUNCTION claim_pending_document_summaries(p_limit INTEGER DEFAULT 20, p_max_attempts INTEGER DEFAULT 5)
+RETURNS TABLE (
+  id UUID,
+  title TEXT,
+  content TEXT
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  UPDATE project_documents p
+  SET summary_status = 'failed'
+  WHERE p.summary_status = 'processing'
+    AND p.summary_attempts >= p_max_attempts
+    AND coalesce(p.summary_claimed_at, p.updated_at) < NOW() - INTERVAL '10 minutes';
+
+  RETURN QUERY
+  UPDATE project_documents d
+  SET summary_status = 'processing',
+      summary_claimed_at = NOW(),
+      summary_attempts = d.summary_attempts + 1
+  WHERE d.id IN (
+    SELECT p.id FROM project_documents p
+    WHERE p.summary_status = 'pending'
+      OR (
+        p.summary_status = 'processing'
+        AND p.summary_attempts < p_max_attempts
+        AND coalesce(p.summary_claimed_at, p.updated_at) < NOW() - INTERVAL '10 minutes'
+      )
+      OR (
+        p.summary_status = 'failed'
+        AND p.summary_attempts < p_max_attempts
+        AND coalesce(p.summary_claimed_at, p.updated_at) < NOW() - make_interval(secs => 30 * power(2, p.summary_attempts))
+      )
+    ORDER BY p.created_at
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING d.id, d.title, d.content;
+END;
+$$;
+
+COMMENT ON COLUMN project_documents.summary_attempts IS '자동 요약 연속 시도 횟수 (성공/수정 시 0)';